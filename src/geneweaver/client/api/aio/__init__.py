@@ -0,0 +1,11 @@
+"""Asynchronous counterparts of the GeneWeaver API functions.
+
+The modules mirror geneweaver.client.api, with the same function names and
+arguments, as coroutines built on aiohttp:
+
+    from geneweaver.client.api.aio import genesets
+
+    geneset = await genesets.get(token, 1234)
+
+Every call shares the pooled session of the process wide AsyncAPIClient.
+"""
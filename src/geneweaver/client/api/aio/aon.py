@@ -0,0 +1,59 @@
+"""Coroutines that wrap the GeneWeaver AON API."""
+
+from typing import List, Optional
+
+from geneweaver.client.api.aio.utils import get_async_client
+from geneweaver.client.api.aon import (
+    ORTHOLOG_LIMIT,
+    OrthologPages,
+    get_registry,
+)
+from geneweaver.client.core.config import settings
+from geneweaver.core.enum import Species
+
+
+async def ortholog_mapping(
+    identifiers: List[str], to_species: Species, algorithm_id: Optional[int] = None
+) -> List[dict]:
+    """Get ortholog mapping for a list of genes.
+
+    The mappings are paged through with offset, so every one is returned.
+
+    :param identifiers: List of gene values (must be AON ID type for Species).
+    :param to_species: Species to map to.
+    :param algorithm_id: Algorithm ID for mapping.
+
+    :return: Ortholog mapping dict.
+    """
+    pages = OrthologPages(to_species, algorithm_id, ORTHOLOG_LIMIT)
+    while not pages.add(
+        await get_async_client().request(
+            "POST",
+            settings.AON_API_URL + "/genes/ortholog/mapping",
+            params=pages.params,
+            json=identifiers,
+        )
+    ):
+        pass
+    return pages.rows
+
+
+async def algorithm_id_from_name(algorithm_name: str) -> Optional[int]:
+    """Get algorithm ID from algorithm name.
+
+    The algorithms are listed once and kept by the process wide registry
+    shared with the synchronous functions, see aon.get_registry. A stale list
+    is downloaded here, so the registry is never asked to download it and
+    block the event loop.
+
+    :param algorithm_name: The name of the algorithm.
+    :return: The algorithm ID, None if no algorithm has that name.
+    """
+    registry = get_registry()
+    if registry.stale():
+        registry.update(
+            await get_async_client().request(
+                "GET", settings.AON_API_URL + "/algorithms"
+            )
+        )
+    return registry.id_from_name(algorithm_name, refresh=False)
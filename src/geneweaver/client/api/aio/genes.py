@@ -0,0 +1,29 @@
+"""Coroutines that wrap the Geneweaver /genes endpoint."""
+
+from typing import List
+
+from geneweaver.client.api.aio.utils import get_async_client
+from geneweaver.client.api.genes import ENDPOINT, mappings_body
+from geneweaver.client.api.utils import format_endpoint
+from geneweaver.core.enum import GeneIdentifier, Species
+
+
+async def mappings(
+    access_token: str,
+    source_ids: List[str],
+    target_id_type: GeneIdentifier,
+    species: Species,
+) -> dict:
+    """Get mappings for a list of genes.
+
+    :param access_token: User access token
+    :param source_ids: List of source gene IDs.
+    :param target_id_type: Target gene ID type (one of GeneIdentifier).
+    :param species: Species of the identifiers.
+    """
+    return await get_async_client().request(
+        "POST",
+        format_endpoint(ENDPOINT, "mappings"),
+        token=access_token,
+        json=mappings_body(source_ids, target_id_type, species),
+    )
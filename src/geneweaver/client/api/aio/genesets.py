@@ -0,0 +1,62 @@
+"""Coroutines that wrap the GeneWeaver API on /genesets endpoints."""
+
+from typing import Optional
+
+from geneweaver.client.api.aio.utils import get_async_client
+from geneweaver.client.api.genesets import ENDPOINT, values_params
+from geneweaver.client.api.utils import format_endpoint
+from geneweaver.core.enum import GeneIdentifier
+
+
+async def get(
+    access_token: str, geneset_id: int, gene_id_type: Optional[GeneIdentifier] = None
+) -> dict:
+    """Get a Geneset by ID.
+
+    :param access_token: User access token
+    :param geneset_id: Geneset ID (without the "GS" prefix).
+    :param gene_id_type: Gene ID type (one of GeneIdentifier).
+
+    :return: Geneset dict.
+    """
+    return await get_async_client().request(
+        "GET",
+        format_endpoint(ENDPOINT, str(geneset_id)),
+        token=access_token,
+        params=values_params(gene_id_type),
+    )
+
+
+async def get_values(
+    access_token: str,
+    geneset_id: int,
+    gene_id_type: Optional[GeneIdentifier] = None,
+    in_threshold: Optional[bool] = None,
+) -> dict:
+    """Get a Geneset's values by the Geneset ID.
+
+    :param access_token: User access token
+    :param geneset_id: Geneset ID (without the "GS" prefix).
+    :param gene_id_type: Gene ID type (one of GeneIdentifier).
+    :param in_threshold: Whether to filter genes by threshold.
+
+    :return: Geneset dict.
+    """
+    return await get_async_client().request(
+        "GET",
+        format_endpoint(ENDPOINT + f"/{geneset_id}/values"),
+        token=access_token,
+        params=values_params(gene_id_type, in_threshold),
+    )
+
+
+async def get_genesets(access_token: str) -> list:
+    """Get all visible genesets.
+
+    :param access_token: User access token
+
+    :return: List of genesets dicts.
+    """
+    return await get_async_client().request(
+        "GET", format_endpoint(ENDPOINT), token=access_token
+    )
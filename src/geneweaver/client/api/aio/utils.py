@@ -0,0 +1,155 @@
+"""The pooled aiohttp client shared by the asynchronous API functions."""
+
+import asyncio
+import time
+from typing import Optional
+
+import aiohttp
+from geneweaver.client.api.exc import GeneweaverAPIError
+from geneweaver.client.core import decode, instrumentation
+from geneweaver.client.core.http import DEFAULT_POOL_SIZE
+
+API_ERROR = "There was a problem calling the Geneweaver API: {}"
+
+
+class AsyncAPIClient:
+    """A pool of keep-alive connections for asynchronous API calls.
+
+    The aiohttp session is created on first use, in the running event loop,
+    and again if the client is used from another loop, when the session of
+    the previous loop is closed. Close the client with close_async_client, or
+    use it as an async context manager, before that loop ends.
+    """
+
+    def __init__(
+        self, pool_size: int = DEFAULT_POOL_SIZE, timeout: Optional[float] = None
+    ) -> None:
+        """Create an AsyncAPIClient.
+
+        :param pool_size: The maximum number of connections kept open.
+        :param timeout: The total seconds allowed for each call, defaults to
+                        the aiohttp default.
+        """
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Get the pooled session of the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._session is not None and self._loop is not loop:
+            await self._close_other_loop_session()
+        if self._session is None or self._session.closed:
+            options = {}
+            if self.timeout is not None:
+                options["timeout"] = aiohttp.ClientTimeout(total=self.timeout)
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size), **options
+            )
+            self._loop = loop
+        return self._session
+
+    async def _close_other_loop_session(self) -> None:
+        """Close the session of a previous event loop."""
+        session, loop = self._session, self._loop
+        self._session = None
+        self._loop = None
+        if session.closed:
+            return
+        if loop.is_closed():
+            # The connections went with their loop, this only marks it closed.
+            await session.close()
+        else:
+            # Connections are closed by the loop which owns them.
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        token: Optional[str] = None,
+        params: Optional[dict] = None,
+        json: Optional[object] = None,
+    ) -> object:
+        """Make a call and decode its JSON response.
+
+        :param method: The HTTP method.
+        :param url: The URL to call.
+        :param token: The optional access token.
+        :param params: The query parameters.
+        :param json: The object sent as the JSON body.
+
+        :return: The decoded response.
+
+        :raises GeneweaverAPIError: When the call fails or its status is not 2xx.
+        """
+        headers = {} if token is None else {"Authorization": f"Bearer {token}"}
+        if params:
+            # requests sends booleans as True or False, which aiohttp rejects.
+            params = {
+                k: str(v) if isinstance(v, bool) else v for k, v in params.items()
+            }
+        with instrumentation.record(None, method, url) as event:
+            try:
+                session = await self.get_session()
+                async with session.request(
+                    method, url, params=params, json=json, headers=headers
+                ) as response:
+                    event.status = response.status
+                    body = await response.read()
+                    event.bytes_in = len(body)
+                    if response.status >= 400:
+                        raise GeneweaverAPIError(
+                            API_ERROR.format(body.decode("utf-8", errors="replace"))
+                        )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                raise GeneweaverAPIError(API_ERROR.format(err)) from err
+            b4 = time.perf_counter()
+            value = decode.loads(body)
+            event.decode_time = time.perf_counter() - b4
+        return value
+
+    async def close(self) -> None:
+        """Close the pooled session and its open connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+            self._loop = None
+
+    async def __aenter__(self) -> "AsyncAPIClient":
+        """Enter a context which closes the client on exit."""
+        return self
+
+    async def __aexit__(self, *args: object) -> None:
+        """Close the client."""
+        await self.close()
+
+
+_client: Optional[AsyncAPIClient] = None
+
+
+def get_async_client() -> AsyncAPIClient:
+    """Get the process wide AsyncAPIClient, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = AsyncAPIClient()
+    return _client
+
+
+def set_async_client(client: Optional[AsyncAPIClient]) -> Optional[AsyncAPIClient]:
+    """Replace the process wide AsyncAPIClient.
+
+    :param client: The new client, or None to create a default one on next use.
+
+    :return: The previous client, which is left open.
+    """
+    global _client
+    previous, _client = _client, client
+    return previous
+
+
+async def close_async_client() -> None:
+    """Close the connections of the process wide AsyncAPIClient."""
+    if _client is not None:
+        await _client.close()
@@ -1,12 +1,25 @@
 """Functions that wrap the GeneWeaver API on /genesets endpoints."""
 
+import json
+import threading
 from enum import Enum
-from typing import List, Optional
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Set, Tuple
 
-from geneweaver.client.api.utils import sessionmanager
+from geneweaver.client.api.exc import GeneweaverAPIError
+from geneweaver.client.api.utils import imap_ordered, sessionmanager
+from geneweaver.client.core.app_dir import get_cache_dir
+from geneweaver.client.core.cache import DEFAULT_TTL, CachedResponse, ResponseCache
 from geneweaver.client.core.config import settings
 from geneweaver.core.enum import Species
 
+# The most rows the AON API returns for one ortholog mapping request.
+ORTHOLOG_LIMIT = 30000
+DEFAULT_ORTHOLOG_CHUNK_SIZE = 1000
+DEFAULT_CONCURRENCY = 4
+
+# The cached algorithm list, by normalized name and by ID.
+_Index = Tuple[Optional[CachedResponse], Dict[str, int], Dict[int, str]]
+
 
 class OrthologAlgorithms(Enum):
     """The available ortholog algorithms in Geneweaver AON."""
@@ -27,20 +40,153 @@ class OrthologAlgorithms(Enum):
 
 def ortholog_mapping(
     identifiers: List[str], to_species: Species, algorithm_id: Optional[int] = None
-) -> dict:
+) -> List[dict]:
     """Get ortholog mapping for a list of genes.
 
+    Every mapping is returned, however many there are, see
+    iter_ortholog_mapping.
+
     :param identifiers: List of gene values (must be AON ID type for Species).
     :param to_species: Species to map to.
     :param algorithm_id: Algorithm ID for mapping.
 
     :return: Ortholog mapping dict.
     """
-    params = {"to_species": int(to_species), "limit": 30000}
+    return list(iter_ortholog_mapping(identifiers, to_species, algorithm_id))
 
-    if algorithm_id is not None:
-        params["algorithm_id"] = algorithm_id
 
+def iter_ortholog_mapping(
+    identifiers: Iterable[str],
+    to_species: Species,
+    algorithm_id: Optional[int] = None,
+    chunk_size: int = DEFAULT_ORTHOLOG_CHUNK_SIZE,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    page_size: int = ORTHOLOG_LIMIT,
+) -> Iterator[dict]:
+    """Stream the ortholog mappings of any number of genes.
+
+    The unique identifiers are sent in chunks, concurrently, and each chunk
+    is paged through with offset until a page comes back short, so that no
+    mapping is lost to the row limit of the API. Rows are yielded in the
+    order of their chunks, whichever completes first, so the result for the
+    same identifiers is always in the same order, and a row seen before is
+    not yielded again.
+
+    The AON API takes no ordering parameter, so pages are only consistent
+    while the server returns a chunk's rows in the same order for each
+    request. If it does not, a row can move from a page not yet fetched to
+    one already fetched and be skipped, which deduplication cannot detect.
+    A chunk which fits in one page, as with the default chunk and page
+    sizes, is not affected.
+
+    :param identifiers: The gene values (must be AON ID type for Species).
+    :param to_species: Species to map to.
+    :param algorithm_id: Algorithm ID for mapping.
+    :param chunk_size: The number of identifiers sent in one request.
+    :param concurrency: The number of chunks requested at once.
+    :param page_size: The number of rows asked for in one request.
+
+    :return: Ortholog mapping rows.
+
+    :raises GeneweaverAPIError: When a call fails, or the API ignores offset.
+    """
+    unique = list(dict.fromkeys(identifiers))
+    chunks = (
+        unique[start : start + chunk_size]
+        for start in range(0, len(unique), chunk_size)
+    )
+
+    def fetch(chunk: List[str]) -> List[dict]:
+        pages = OrthologPages(to_species, algorithm_id, page_size)
+        while not pages.add(_post_orthologs(chunk, pages.params)):
+            pass
+        return pages.rows
+
+    seen: Set[Hashable] = set()
+    for rows in imap_ordered(fetch, chunks, concurrency):
+        for row in rows:
+            key = row_key(row)
+            if key not in seen:
+                seen.add(key)
+                yield row
+
+
+class OrthologPages:
+    """The pages of the ortholog mappings of one chunk of identifiers.
+
+    Request with params and add each page, until add returns True:
+
+        pages = OrthologPages(Species.MUS_MUSCULUS)
+        while not pages.add(post(chunk, pages.params)):
+            pass
+
+    Paging relies on the server returning the rows in a stable order, as
+    the API has no parameter to ask for one. Repeated rows are dropped, but
+    a row skipped by a reordering between pages cannot be detected.
+    """
+
+    def __init__(
+        self,
+        to_species: Species,
+        algorithm_id: Optional[int] = None,
+        page_size: int = ORTHOLOG_LIMIT,
+    ) -> None:
+        """Start at the first page.
+
+        :param to_species: Species to map to.
+        :param algorithm_id: Algorithm ID for mapping.
+        :param page_size: The number of rows asked for in one request.
+        """
+        self.to_species = to_species
+        self.algorithm_id = algorithm_id
+        self.page_size = page_size
+        self.offset = 0
+        self.rows: List[dict] = []
+        self._seen: Set[Hashable] = set()
+
+    @property
+    def params(self) -> dict:
+        """The query parameters of the request for the next page."""
+        return ortholog_params(
+            self.to_species, self.algorithm_id, self.page_size, self.offset
+        )
+
+    def add(self, page: List[dict]) -> bool:
+        """Add the rows of a page which were not seen before.
+
+        :param page: The rows returned for params.
+
+        :return: True when this was the last page.
+
+        :raises GeneweaverAPIError: When a full page adds no new rows, as the
+                                    API would then be ignoring offset.
+        """
+        new = 0
+        for row in page:
+            key = row_key(row)
+            if key not in self._seen:
+                self._seen.add(key)
+                self.rows.append(row)
+                new += 1
+        if len(page) < self.page_size:
+            return True
+        if not new:
+            raise GeneweaverAPIError(
+                "The AON API returned the same page at offset {}.".format(self.offset)
+            )
+        self.offset += self.page_size
+        return False
+
+
+def row_key(row: dict) -> Hashable:
+    """Get a hashable key identifying a row of an AON response."""
+    try:
+        return frozenset(row.items())
+    except TypeError:
+        return json.dumps(row, sort_keys=True)
+
+
+def _post_orthologs(identifiers: List[str], params: dict) -> List[dict]:
     with sessionmanager() as session:
         resp = session.post(
             settings.AON_API_URL + "/genes/ortholog/mapping",
@@ -50,17 +196,173 @@ def ortholog_mapping(
     return resp.json()
 
 
-def algorithm_id_from_name(algorithm_name: str) -> int:
+def algorithm_id_from_name(algorithm_name: str) -> Optional[int]:
     """Get algorithm ID from algorithm name.
 
+    The algorithms are listed once and kept by the process wide registry,
+    see get_registry.
+
     :param algorithm_name: The name of the algorithm.
-    :return: The algorithm ID.
+    :return: The algorithm ID, None if no algorithm has that name.
     """
-    with sessionmanager() as session:
-        resp = session.get(settings.AON_API_URL + "/algorithms")
-        algorithms = resp.json()
-        for algorithm in algorithms:
-            if algorithm["alg_name"].lower().replace(
-                " ", ""
-            ) == algorithm_name.lower().replace(" ", ""):
-                return algorithm["alg_id"]
+    return get_registry().id_from_name(algorithm_name)
+
+
+class AlgorithmRegistry:
+    """The ortholog algorithms of AON, indexed by normalized name and by ID.
+
+    The list is downloaded once and kept in a ResponseCache, by default in
+    memory and on disk, so that later calls, and later processes such as
+    other CLI commands, use it without a request until its time to live
+    passes.
+    """
+
+    def __init__(
+        self, cache: Optional[ResponseCache] = None, ttl: float = DEFAULT_TTL
+    ) -> None:
+        """Create an AlgorithmRegistry. Algorithms are listed on first use.
+
+        :param cache: Where to keep the list, defaults to a ResponseCache in
+                      an `aon` folder of the client cache directory, apart
+                      from other caches which may be invalidated.
+        :param ttl: The number of seconds the list is used without a request,
+                    when the default cache is used.
+        """
+        if cache is None:
+            cache = ResponseCache(get_cache_dir() / "aon", ttl=ttl)
+        self.cache = cache
+        self._lock = threading.Lock()
+        self._index: Optional[_Index] = None
+
+    @property
+    def key(self) -> str:
+        """The cache key of the list, the URL it is downloaded from."""
+        return settings.AON_API_URL + "/algorithms"
+
+    def stale(self) -> bool:
+        """Check if the list must be downloaded before it is used."""
+        entry = self.cache.get(self.key)
+        return entry is None or not self.cache.is_fresh(entry)
+
+    def update(self, algorithms: List[dict]) -> None:
+        """Replace the list, e.g. with one downloaded asynchronously.
+
+        :param algorithms: The algorithms listed by the AON API.
+        """
+        self.cache.put(self.key, algorithms)
+
+    def refresh(self) -> None:
+        """Download the list again."""
+        with sessionmanager() as session:
+            resp = session.get(self.key)
+            self.update(resp.json())
+
+    def algorithms(self) -> List[dict]:
+        """Get the algorithms, downloading them if the list is stale."""
+        return self._indexes()[0].body
+
+    def id_from_name(self, algorithm_name: str, refresh: bool = True) -> Optional[int]:
+        """Get an algorithm ID by name, ignoring case and spaces.
+
+        :param algorithm_name: The name of the algorithm.
+        :param refresh: Download the list first if it is stale. With False the
+                        cached list is used as it is, without blocking, e.g.
+                        by coroutines which download it themselves.
+        :return: The algorithm ID, None if no algorithm has that name.
+        """
+        return self._indexes(refresh)[1].get(normalize_algorithm_name(algorithm_name))
+
+    def name_from_id(self, algorithm_id: int, refresh: bool = True) -> Optional[str]:
+        """Get an algorithm name by ID.
+
+        :param algorithm_id: The ID of the algorithm.
+        :param refresh: Download the list first if it is stale, see id_from_name.
+        :return: The algorithm name, None if no algorithm has that ID.
+        """
+        return self._indexes(refresh)[2].get(algorithm_id)
+
+    def _indexes(self, refresh: bool = True) -> _Index:
+        if refresh:
+            with self._lock:
+                if self.stale():
+                    self.refresh()
+        entry = self.cache.get(self.key)
+        index = self._index
+        if index is None or index[0] is not entry:
+            by_name: Dict[str, int] = {}
+            by_id: Dict[int, str] = {}
+            for algorithm in entry.body if entry is not None else ():
+                name = normalize_algorithm_name(algorithm["alg_name"])
+                by_name.setdefault(name, algorithm["alg_id"])
+                by_id.setdefault(algorithm["alg_id"], algorithm["alg_name"])
+            # Replaced whole, so that readers without the lock see one index.
+            index = self._index = (entry, by_name, by_id)
+        return index
+
+
+_registry: Optional[AlgorithmRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> AlgorithmRegistry:
+    """Get the process wide AlgorithmRegistry, creating it on first use."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = AlgorithmRegistry()
+        return _registry
+
+
+def set_registry(registry: Optional[AlgorithmRegistry]) -> Optional[AlgorithmRegistry]:
+    """Replace the process wide AlgorithmRegistry.
+
+    :param registry: The new registry, or None to create a default one on
+                     next use.
+
+    :return: The previous registry.
+    """
+    global _registry
+    with _registry_lock:
+        previous, _registry = _registry, registry
+    return previous
+
+
+def ortholog_params(
+    to_species: Species,
+    algorithm_id: Optional[int] = None,
+    limit: int = ORTHOLOG_LIMIT,
+    offset: int = 0,
+) -> dict:
+    """Build the query parameters of an ortholog mapping request.
+
+    :param to_species: Species to map to.
+    :param algorithm_id: Algorithm ID for mapping.
+    :param limit: The most rows to return.
+    :param offset: The number of rows to skip.
+    """
+    params = {"to_species": int(to_species), "limit": limit}
+    if offset:
+        params["offset"] = offset
+
+    if algorithm_id is not None:
+        params["algorithm_id"] = algorithm_id
+    return params
+
+
+def normalize_algorithm_name(algorithm_name: str) -> str:
+    """Normalize an algorithm name for lookups, ignoring case and spaces."""
+    return algorithm_name.lower().replace(" ", "")
+
+
+def find_algorithm_id(algorithms: List[dict], algorithm_name: str) -> Optional[int]:
+    """Find an algorithm by name, ignoring case and spaces.
+
+    :param algorithms: The algorithms listed by the AON API.
+    :param algorithm_name: The name of the algorithm.
+    :return: The algorithm ID, None if no algorithm has that name.
+    """
+    name = normalize_algorithm_name(algorithm_name)
+    for algorithm in algorithms:
+        if normalize_algorithm_name(algorithm["alg_name"]) == name:
+            return algorithm["alg_id"]
+    return None
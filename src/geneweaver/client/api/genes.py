@@ -24,11 +24,23 @@ def mappings(
     with sessionmanager(token=access_token) as session:
         resp = session.post(
             format_endpoint(ENDPOINT, "mappings"),
-            json={
-                "source_ids": source_ids,
-                "target_gene_id_type": str(target_id_type),
-                "species": str(species),
-            },
+            json=mappings_body(source_ids, target_id_type, species),
         )
 
     return resp.json()
+
+
+def mappings_body(
+    source_ids: List[str], target_id_type: GeneIdentifier, species: Species
+) -> dict:
+    """Build the JSON body of a mappings request.
+
+    :param source_ids: List of source gene IDs.
+    :param target_id_type: Target gene ID type (one of GeneIdentifier).
+    :param species: Species of the identifiers.
+    """
+    return {
+        "source_ids": source_ids,
+        "target_gene_id_type": str(target_id_type),
+        "species": str(species),
+    }
@@ -1,11 +1,40 @@
 """Functions that wrap the GeneWeaver API on /genesets endpoints."""
 
-from typing import Optional
-
-from geneweaver.client.api.utils import format_endpoint, sessionmanager
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Hashable, Iterable, Iterator, List, NamedTuple, Optional, Union
+
+from geneweaver.client.api.exc import GeneweaverAPIError
+from geneweaver.client.api.utils import (
+    format_endpoint,
+    imap_unordered,
+    sessionmanager,
+)
 from geneweaver.core.enum import GeneIdentifier
 
 ENDPOINT = "genesets"
+DEFAULT_CONCURRENCY = 8
+DEFAULT_PAGE_SIZE = 500
+
+
+class ValuesResult(NamedTuple):
+    """The outcome of fetching the values of one geneset in get_values_many."""
+
+    geneset_id: int
+    result: Optional[dict] = None
+    """The decoded response of get_values, None on error or when written to disk."""
+    error: Optional[GeneweaverAPIError] = None
+    """The error of the fetch, if it failed."""
+    path: Optional[Path] = None
+    """The file the values were written to, when a directory was given."""
+
+    @property
+    def ok(self) -> bool:
+        """Check the values were fetched."""
+        return self.error is None
 
 
 def get(
@@ -19,7 +48,7 @@ def get(
 
     :return: Geneset dict.
     """
-    params = {} if gene_id_type is None else {"gene_id_type": int(gene_id_type)}
+    params = values_params(gene_id_type)
     with sessionmanager(token=access_token) as session:
         resp = session.get(
             format_endpoint(ENDPOINT, str(geneset_id)),
@@ -43,13 +72,7 @@ def get_values(
 
     :return: Geneset dict.
     """
-    params = {}
-
-    if gene_id_type is not None:
-        params["gene_id_type"] = int(gene_id_type)
-    if in_threshold is not None:
-        params["in_threshold"] = in_threshold
-
+    params = values_params(gene_id_type, in_threshold)
     with sessionmanager(token=access_token) as session:
         resp = session.get(
             format_endpoint(ENDPOINT + f"/{geneset_id}/values"),
@@ -58,6 +81,77 @@ def get_values(
     return resp.json()
 
 
+def get_values_many(
+    access_token: str,
+    geneset_ids: Iterable[int],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    gene_id_type: Optional[GeneIdentifier] = None,
+    in_threshold: Optional[bool] = None,
+    directory: Optional[Union[str, Path]] = None,
+) -> Iterator[ValuesResult]:
+    """Get the values of many genesets, concurrently.
+
+    Results are yielded as they complete, in no particular order. A geneset
+    which fails is yielded with its error rather than ending the batch. At
+    most concurrency requests are in flight, and no more results than that
+    wait to be consumed, so stopping early stops fetching. Rate limited
+    responses (429) are retried after the delay asked for by the server.
+
+    :param access_token: User access token
+    :param geneset_ids: Geneset IDs (without the "GS" prefix).
+    :param concurrency: The maximum number of requests in flight.
+    :param gene_id_type: Gene ID type (one of GeneIdentifier).
+    :param in_threshold: Whether to filter genes by threshold.
+    :param directory: If given, each geneset's values are written to
+                      <geneset_id>.json in it, undecoded, instead of being
+                      returned.
+
+    :return: A ValuesResult per geneset ID.
+    """
+    params = values_params(gene_id_type, in_threshold)
+    directory = None if directory is None else Path(directory)
+    if directory is not None:
+        directory.mkdir(parents=True, exist_ok=True)
+
+    def fetch(geneset_id: int) -> ValuesResult:
+        return _fetch_values(access_token, geneset_id, params, directory)
+
+    return imap_unordered(fetch, geneset_ids, concurrency)
+
+
+def _fetch_values(
+    access_token: str, geneset_id: int, params: dict, directory: Optional[Path]
+) -> ValuesResult:
+    try:
+        with sessionmanager(token=access_token) as session:
+            resp = session.get(
+                format_endpoint(ENDPOINT + f"/{geneset_id}/values"),
+                params=params,
+            )
+        if directory is None:
+            return ValuesResult(geneset_id, result=resp.json())
+        path = directory / f"{geneset_id}.json"
+        _write_atomic(path, resp.content)
+        return ValuesResult(geneset_id, path=path)
+    except GeneweaverAPIError as err:
+        return ValuesResult(geneset_id, error=err)
+    except (OSError, ValueError) as err:
+        error = GeneweaverAPIError(f"Could not handle geneset {geneset_id}: {err}")
+        error.__cause__ = err
+        return ValuesResult(geneset_id, error=error)
+
+
+def _write_atomic(path: Path, content: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+
 def get_genesets(access_token: str) -> list:
     """Get all visible genesets.
 
@@ -68,3 +162,88 @@ def get_genesets(access_token: str) -> list:
     with sessionmanager(token=access_token) as session:
         resp = session.get(format_endpoint(ENDPOINT))
     return resp.json()
+
+
+def values_params(
+    gene_id_type: Optional[GeneIdentifier] = None,
+    in_threshold: Optional[bool] = None,
+) -> dict:
+    """Build the query parameters of the geneset and values endpoints.
+
+    :param gene_id_type: Gene ID type (one of GeneIdentifier).
+    :param in_threshold: Whether to filter genes by threshold.
+
+    :return: The parameters which are set.
+    """
+    params = {}
+
+    if gene_id_type is not None:
+        params["gene_id_type"] = int(gene_id_type)
+    if in_threshold is not None:
+        params["in_threshold"] = in_threshold
+    return params
+
+
+def iter_genesets(
+    access_token: str,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    filters: Optional[dict] = None,
+) -> Iterator[dict]:
+    """Iterate over the visible genesets, a page at a time.
+
+    Pages are requested with limit and offset, and the next page is fetched
+    in the background while the current one is consumed, so at most two
+    pages are held at once. Stopping early fetches no further pages.
+
+    Genesets already yielded are skipped. Iteration stops at a page which
+    starts with the same geneset as the page before, or which has no new
+    genesets, as the server would then be ignoring offset.
+
+    :param access_token: User access token
+    :param page_size: The number of genesets requested per page.
+    :param filters: Query parameters filtering the genesets on the server,
+                    e.g. {"species": 2, "search_text": "liver"}.
+
+    :return: Geneset dicts, in the order of the server.
+    """
+    params = dict(filters or {}, limit=page_size)
+    offset = 0
+    seen = set()
+    first = None
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        future = pool.submit(_genesets_page, access_token, params, offset)
+        try:
+            while future is not None:
+                page = future.result()
+                future = None
+                if not page or _geneset_key(page[0]) == first:
+                    break
+                first = _geneset_key(page[0])
+                new = [g for g in page if _geneset_key(g) not in seen]
+                seen.update(map(_geneset_key, new))
+                offset += len(page)
+                # A short page is the last one, a long one means the server
+                # did not paginate and has returned every geneset.
+                if new and len(page) == page_size:
+                    future = pool.submit(_genesets_page, access_token, params, offset)
+                yield from new
+        finally:
+            if future is not None:
+                future.cancel()
+
+
+def _geneset_key(geneset: dict) -> Hashable:
+    """Get the id of a geneset, or its JSON when it has no id."""
+    key = geneset.get("id")
+    if key is None:
+        return json.dumps(geneset, sort_keys=True, default=str)
+    return key
+
+
+def _genesets_page(access_token: str, params: dict, offset: int) -> List[dict]:
+    with sessionmanager(token=access_token) as session:
+        resp = session.get(
+            format_endpoint(ENDPOINT), params=dict(params, offset=offset)
+        )
+    body = resp.json()
+    return body["data"] if isinstance(body, dict) else body
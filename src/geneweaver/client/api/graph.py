@@ -17,6 +17,7 @@ from enum import Enum
 from typing import Optional
 
 import requests
+from geneweaver.client.core.http import InstrumentedSession
 
 Source = Enum("Source", ["BAYLOR", "HOMOLOGENE" "ENSEMBL"])
 """
@@ -93,6 +94,14 @@ class VariantGraphClient:
         TODO Authentication?
         """
         self.url = url
+        self._session: Optional[requests.Session] = None
+
+    @property
+    def session(self) -> requests.Session:
+        """The session reused by every call, reporting its calls as "graph"."""
+        if self._session is None:
+            self._session = InstrumentedSession(service="graph")
+        return self._session
 
     def heartbeat(self) -> dict:
         """Check the server connection.
@@ -102,7 +111,7 @@ class VariantGraphClient:
 
         :return: a dict with parameters to define if connected and to where.
         """
-        response = requests.get(self._get_connected_url())
+        response = self.session.get(self._get_connected_url())
         if not response.ok:
             response.raise_for_status()
         return json.loads(response.text)
@@ -205,7 +214,7 @@ class VariantGraphClient:
         ----
 
         """
-        response = requests.post(self._get_search_url(), None, request)
+        response = self.session.post(self._get_search_url(), None, request)
         if not response.ok:
             response.raise_for_status()
 
@@ -1,17 +1,47 @@
-"""Cross-API Geneset Symbol Mapping."""
+"""Cross-API Geneset Symbol Mapping.
 
-from typing import List, Optional
+The ortholog and identifier lookups of a mapping can be kept in a local
+MappingCache, so that genes which were mapped before, by any geneset, are not
+sent to the API again:
+
+    cache = MappingCache()
+    prefetch_mouse_mappings(token, all_human_symbols, cache)
+    values = ensembl_mouse_mapping(token, geneset_id, True, cache=cache)
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
 
 from geneweaver.client.api import aon, genes, genesets
+from geneweaver.client.api.exc import GeneweaverAPIError
+from geneweaver.client.core.cache import MappingCache
 from geneweaver.client.utils.aon import map_symbols
 from geneweaver.core.enum import GeneIdentifier, Species
 
+ORTHOLOGS = "ortholog"
+IDENTIFIERS = "identifier"
+DEFAULT_CHUNK_SIZE = 2000
+DEFAULT_CONCURRENCY = 8
+
+Edges = List[Tuple[str, str]]
+
+
+class MappedGeneset(NamedTuple):
+    """The outcome of mapping one geneset in ensembl_mouse_mappings."""
+
+    geneset_id: int
+    result: Optional[List[dict]] = None
+    """The values, as ensembl_mouse_mapping returns them, None on error."""
+    error: Optional[GeneweaverAPIError] = None
+    """The error fetching or mapping the geneset, if any."""
+
 
 def ensembl_mouse_mapping(
     access_token: str,
     geneset_id: int,
     in_threshold: bool,
     algorithm: Optional[aon.OrthologAlgorithms] = None,
+    cache: Optional[MappingCache] = None,
 ) -> List[dict]:
     """Get a Geneset's values as Ensembl Mouse Gene IDs.
 
@@ -19,6 +49,7 @@ def ensembl_mouse_mapping(
     :param geneset_id: Geneset ID.
     :param in_threshold: Whether to filter genes by threshold.
     :param algorithm: Ortholog mapping algorithm.
+    :param cache: The optional cache of ortholog and identifier mappings.
 
     :return: List of geneset values. `[{"symbol": k, "value": v}, ...]
     """
@@ -41,32 +72,252 @@ def ensembl_mouse_mapping(
         else:
             algorithm_id = None
 
-        aon_response = aon.ortholog_mapping(
-            [g["symbol"] for g in response["data"]],
-            Species.MUS_MUSCULUS,
-            algorithm_id=algorithm_id,
-        )
-
         mgi_result = map_symbols(
             {item["symbol"]: item["value"] for item in response["data"]},
-            [(r["from_gene"], r["to_gene"]) for r in aon_response],
-        )
-
-        gw_map_response = genes.mappings(
-            access_token,
-            list(set(mgi_result.keys())),
-            GeneIdentifier.ENSEMBLE_GENE,
-            Species.MUS_MUSCULUS,
+            mouse_orthologs(
+                [g["symbol"] for g in response["data"]], algorithm_id, cache
+            ),
         )
 
         ensembl_result = map_symbols(
             mgi_result,
-            [
-                (r["original_ref_id"], r["mapped_ref_id"])
-                for r in gw_map_response["gene_ids_map"]
-            ],
+            mouse_ensembl_ids(access_token, list(mgi_result), cache),
         )
 
         result = [{"symbol": k, "value": v} for k, v in ensembl_result.items()]
 
     return result
+
+
+def mouse_orthologs(
+    identifiers: List[str],
+    algorithm_id: Optional[int] = None,
+    cache: Optional[MappingCache] = None,
+) -> Edges:
+    """Get the mouse ortholog edges of some genes from AON.
+
+    With a cache, only the genes it does not hold are requested, and they
+    are then added to it.
+
+    :param identifiers: The genes, as AON ID type for their species.
+    :param algorithm_id: The ortholog algorithm, None for every algorithm.
+    :param cache: The optional cache of ortholog edges.
+
+    :return: (gene, mouse gene) edges, in the order of identifiers, whether
+             they were cached or not.
+    """
+    scope = "{}:{}".format(int(Species.MUS_MUSCULUS), algorithm_id)
+    edges, missing = _cached(cache, ORTHOLOGS, scope, identifiers)
+    if missing:
+        response = aon.ortholog_mapping(
+            missing, Species.MUS_MUSCULUS, algorithm_id=algorithm_id
+        )
+        fetched = [(r["from_gene"], r["to_gene"]) for r in response]
+        if cache is not None:
+            cache.store(ORTHOLOGS, scope, missing, fetched)
+        edges.extend(fetched)
+    return _in_order(identifiers, edges)
+
+
+def mouse_ensembl_ids(
+    access_token: str,
+    identifiers: List[str],
+    cache: Optional[MappingCache] = None,
+) -> Edges:
+    """Get the Ensembl gene IDs of some mouse genes from GeneWeaver.
+
+    :param access_token: User access token.
+    :param identifiers: The mouse genes, e.g. MGI IDs.
+    :param cache: The optional cache of identifier mappings.
+
+    :return: (gene, Ensembl gene ID) edges, in the order of identifiers,
+             whether they were cached or not.
+    """
+    scope = "{}:{}".format(int(Species.MUS_MUSCULUS), int(GeneIdentifier.ENSEMBLE_GENE))
+    edges, missing = _cached(cache, IDENTIFIERS, scope, identifiers)
+    if missing:
+        response = genes.mappings(
+            access_token,
+            missing,
+            GeneIdentifier.ENSEMBLE_GENE,
+            Species.MUS_MUSCULUS,
+        )
+        fetched = [
+            (r["original_ref_id"], r["mapped_ref_id"]) for r in response["gene_ids_map"]
+        ]
+        if cache is not None:
+            cache.store(IDENTIFIERS, scope, missing, fetched)
+        edges.extend(fetched)
+    return _in_order(identifiers, edges)
+
+
+def prefetch_mouse_mappings(
+    access_token: str,
+    identifiers: Iterable[str],
+    cache: MappingCache,
+    algorithm_id: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """Fill a cache with the mouse orthologs, and their Ensembl IDs, of genes.
+
+    Genes already in the cache are skipped, and the rest are requested in
+    chunks, so that later mappings of any geneset of those genes are local.
+
+    :param access_token: User access token.
+    :param identifiers: The genes, as AON ID type for their species.
+    :param cache: The cache to fill.
+    :param algorithm_id: The ortholog algorithm, None for every algorithm.
+    :param chunk_size: The number of genes sent in one request.
+
+    :return: The number of ortholog edges found.
+    """
+    edges = _chunked(
+        lambda chunk: mouse_orthologs(chunk, algorithm_id, cache),
+        identifiers,
+        chunk_size,
+    )
+    _chunked(
+        lambda chunk: mouse_ensembl_ids(access_token, chunk, cache),
+        (target for _, target in edges),
+        chunk_size,
+    )
+    return len(edges)
+
+
+def ensembl_mouse_mappings(
+    access_token: str,
+    geneset_ids: Iterable[int],
+    in_threshold: bool,
+    algorithm: Optional[aon.OrthologAlgorithms] = None,
+    cache: Optional[MappingCache] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[MappedGeneset]:
+    """Get the values of many Genesets as Ensembl Mouse Gene IDs.
+
+    The genesets are fetched concurrently, and each is mapped as soon as it
+    has been fetched. Ortholog and Ensembl lookups are shared by the batch:
+    a geneset only looks up the symbols no earlier geneset of its species
+    has, in chunks. Each geneset is mapped with the edges of its own symbols,
+    in the order of its symbols, as ensembl_mouse_mapping does, so ties are
+    broken the same way.
+
+    :param access_token: User access token.
+    :param geneset_ids: Geneset IDs.
+    :param in_threshold: Whether to filter genes by threshold.
+    :param algorithm: Ortholog mapping algorithm.
+    :param cache: The optional cache of ortholog and identifier mappings.
+    :param concurrency: The number of genesets fetched at once.
+    :param chunk_size: The number of genes sent in one mapping request.
+
+    :return: A MappedGeneset per geneset ID, in the order they complete. A
+             geneset which could not be fetched or mapped has its error set.
+    """
+    algorithm_ids: List[Optional[int]] = []
+
+    def orthologs(chunk: List[str]) -> Edges:
+        if not algorithm_ids:
+            algorithm_ids.append(
+                aon.algorithm_id_from_name(algorithm.value) if algorithm else None
+            )
+        return mouse_orthologs(chunk, algorithm_ids[0], cache)
+
+    ortholog_index: Dict[Species, _EdgeIndex] = {}
+    ensembl_index = _EdgeIndex(
+        lambda chunk: mouse_ensembl_ids(access_token, chunk, cache), chunk_size
+    )
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {
+            pool.submit(
+                _fetch_geneset, access_token, geneset_id, in_threshold
+            ): geneset_id
+            for geneset_id in geneset_ids
+        }
+        try:
+            for future in as_completed(futures):
+                geneset_id = futures[future]
+                try:
+                    species, values = future.result()
+                    if species != Species.MUS_MUSCULUS:
+                        index = ortholog_index.setdefault(
+                            species, _EdgeIndex(orthologs, chunk_size)
+                        )
+                        original = {value["symbol"]: value["value"] for value in values}
+                        mgi_result = map_symbols(original, index.edges(original))
+                        ensembl_result = map_symbols(
+                            mgi_result, ensembl_index.edges(mgi_result)
+                        )
+                        values = [
+                            {"symbol": k, "value": v} for k, v in ensembl_result.items()
+                        ]
+                except GeneweaverAPIError as err:
+                    yield MappedGeneset(geneset_id, error=err)
+                else:
+                    yield MappedGeneset(geneset_id, values)
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+class _EdgeIndex:
+    """Edges looked up on demand, indexed by source to select them in order."""
+
+    def __init__(self, lookup: Callable[[List[str]], Edges], chunk_size: int) -> None:
+        self._lookup = lookup
+        self._chunk_size = chunk_size
+        self._edges: Dict[str, Edges] = {}
+
+    def edges(self, sources: Iterable[str]) -> Edges:
+        """Get the edges of the sources, source by source, in their order."""
+        sources = list(dict.fromkeys(sources))
+        missing = [source for source in sources if source not in self._edges]
+        fetched = _chunked(self._lookup, missing, self._chunk_size)
+        # Sources without edges are known too, and are not looked up again.
+        for source in missing:
+            self._edges[source] = []
+        for source, target in fetched:
+            self._edges.setdefault(source, []).append((source, target))
+        return [edge for source in sources for edge in self._edges[source]]
+
+
+def _fetch_geneset(
+    access_token: str, geneset_id: int, in_threshold: bool
+) -> Tuple[Species, List[dict]]:
+    """Fetch the species and values of a geneset."""
+    response = genesets.get(access_token, geneset_id)
+    species = Species(response["geneset"]["species_id"])
+    gene_id_type = GeneIdentifier.ENSEMBLE_GENE
+    if species == Species.HOMO_SAPIENS:
+        gene_id_type = GeneIdentifier.HGNC
+    response = genesets.get_values(access_token, geneset_id, gene_id_type, in_threshold)
+    return species, response["data"]
+
+
+def _chunked(
+    lookup: Callable[[List[str]], Edges], identifiers: Iterable[str], chunk_size: int
+) -> Edges:
+    """Look up the unique identifiers a chunk at a time, concatenating the edges."""
+    unique = list(dict.fromkeys(identifiers))
+    edges: Edges = []
+    for start in range(0, len(unique), chunk_size):
+        edges.extend(lookup(unique[start : start + chunk_size]))
+    return edges
+
+
+def _in_order(identifiers: List[str], edges: Edges) -> Edges:
+    """Sort edges by the first position of their source in identifiers.
+
+    The sort is stable, so the edges of a source keep their own order.
+    """
+    positions: Dict[str, int] = {}
+    for position, identifier in enumerate(identifiers):
+        positions.setdefault(identifier, position)
+    return sorted(edges, key=lambda edge: positions.get(edge[0], len(identifiers)))
+
+
+def _cached(
+    cache: Optional[MappingCache], kind: str, scope: str, identifiers: List[str]
+) -> Tuple[Edges, List[str]]:
+    if cache is None:
+        return [], list(identifiers)
+    return cache.lookup(kind, scope, identifiers)
@@ -1,11 +1,26 @@
 """API related utilities, helpers, and other internal functions."""
 
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from contextlib import contextmanager
-from typing import Any, Optional
+from typing import Any, Callable, Deque, Iterable, Iterator, Optional, Set, TypeVar
 
 import requests
 from geneweaver.client.api.exc import GeneweaverAPIError
 from geneweaver.client.core.config import settings
+from geneweaver.client.core.http import (
+    DEFAULT_BACKOFF_FACTOR,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_RETRIES,
+    DecodingHTTPAdapter,
+    InstrumentedSession,
+    create_retry,
+    mount_adapter,
+)
+
+T = TypeVar("T")
+R = TypeVar("R")
 
 
 def _raise_for_status_hook(
@@ -15,32 +30,205 @@ def _raise_for_status_hook(
     response.raise_for_status()
 
 
+class APIClient:
+    """A pool of keep-alive connections shared by the api functions.
+
+    Each call gets its own light requests.Session, holding that call's token,
+    mounted on one shared adapter, so calls on any thread reuse the open
+    connections to each host instead of making new ones.
+
+    The process wide client is returned by get_client. Close it, or use a
+    client as a context manager, to release its connections:
+
+        with APIClient(pool_size=20) as client:
+            set_client(client)
+            ...
+    """
+
+    def __init__(
+        self,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        retries: int = DEFAULT_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+    ) -> None:
+        """Create an APIClient. Connections are opened on first use.
+
+        :param pool_size: The maximum number of connections kept open per host.
+        :param retries: The maximum number of retries of an idempotent request.
+        :param backoff_factor: The exponential backoff factor between retries.
+        """
+        self.pool_size = pool_size
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self._adapter: Optional[DecodingHTTPAdapter] = None
+        self._lock = threading.Lock()
+
+    @property
+    def adapter(self) -> DecodingHTTPAdapter:
+        """The adapter holding the shared connection pool."""
+        with self._lock:
+            if self._adapter is None:
+                self._adapter = DecodingHTTPAdapter(
+                    pool_connections=self.pool_size,
+                    pool_maxsize=self.pool_size,
+                    max_retries=create_retry(self.retries, self.backoff_factor),
+                )
+            return self._adapter
+
+    def session(self, token: Optional[str] = None) -> requests.Session:
+        """Create a session for one call, using the shared connections.
+
+        Do not close the session, which would close the shared connections.
+
+        :param token: The optional access token sent with each request.
+        """
+        session = InstrumentedSession()
+        mount_adapter(session, self.adapter)
+        session.hooks = {"response": _raise_for_status_hook}
+        if token is not None:
+            session.headers.update({"Authorization": f"Bearer {token}"})
+        return session
+
+    def close(self) -> None:
+        """Close the open connections. The client reconnects if used again."""
+        with self._lock:
+            adapter, self._adapter = self._adapter, None
+        if adapter is not None:
+            adapter.close()
+
+    def __enter__(self) -> "APIClient":
+        """Enter a context which closes the client on exit."""
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Close the client."""
+        self.close()
+
+
+_client: Optional[APIClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> APIClient:
+    """Get the process wide APIClient, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = APIClient()
+        return _client
+
+
+def set_client(client: Optional[APIClient]) -> Optional[APIClient]:
+    """Replace the process wide APIClient.
+
+    :param client: The new client, or None to create a default one on next use.
+
+    :return: The previous client, which is left open.
+    """
+    global _client
+    with _client_lock:
+        previous, _client = _client, client
+    return previous
+
+
+def close_client() -> None:
+    """Close the connections of the process wide APIClient."""
+    with _client_lock:
+        client = _client
+    if client is not None:
+        client.close()
+
+
 @contextmanager
-def sessionmanager(token: Optional[str] = None) -> requests.Session:
+def sessionmanager(
+    token: Optional[str] = None, client: Optional[APIClient] = None
+) -> requests.Session:
     """Context manager for a requests.Session object.
 
     This context manager will do everything that a requests.Session context manager
     does, but will also raise an exception if the response status code is not 200.
     It will also wrap all exceptions inheriting from
     `requests.exceptions.RequestException` in a GeneweaverAPIException.
+    Response JSON is decoded with the fastest available decoder, and calls are
+    reported to the listeners of `core.instrumentation`.
+
+    The session reuses the pooled connections of the client, by default the
+    process wide client from get_client, which stay open after the block.
     """
-    with requests.Session() as session:
-        session.hooks = {"response": _raise_for_status_hook}
-        if token is not None:
-            session.headers.update({"Authorization": f"Bearer {token}"})
-        try:
-            yield session
-        except requests.exceptions.RequestException as err:
-            # TODO: We SHOULD try extracting the error message from the response,
-            #  could even check the JSON.
-            err_str = (
-                f"There was a problem calling the Geneweaver API: {err.response.text}"
-            )
-            raise GeneweaverAPIError(err_str) from err
-        finally:
-            session.close()
+    session = (client or get_client()).session(token)
+    try:
+        yield session
+    except requests.exceptions.RequestException as err:
+        # TODO: We SHOULD try extracting the error message from the response,
+        #  could even check the JSON.
+        detail = err if err.response is None else err.response.text
+        err_str = f"There was a problem calling the Geneweaver API: {detail}"
+        raise GeneweaverAPIError(err_str) from err
 
 
 def format_endpoint(directory: str, *args: str) -> str:
     """Format the endpoint with the API host and path."""
     return "/".join([settings.API_URL, directory] + list(args))
+
+
+def imap_ordered(
+    func: Callable[[T], R], items: Iterable[T], concurrency: int
+) -> Iterator[R]:
+    """Call func over the items on a thread pool, yielding results in item order.
+
+    As imap_unordered, at most concurrency calls are running or waiting to be
+    consumed, and closing the iterator early stops submitting calls. A result
+    is held until the results of every earlier item have been yielded.
+
+    :param func: The function to call with each item.
+    :param items: The items to call it with, consumed lazily.
+    :param concurrency: The maximum number of calls at once.
+
+    :return: The results, in the order of the items.
+    """
+    pending: Deque[Future] = deque()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        try:
+            for item in items:
+                pending.append(pool.submit(func, item))
+                if len(pending) >= concurrency:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def imap_unordered(
+    func: Callable[[T], R], items: Iterable[T], concurrency: int
+) -> Iterator[R]:
+    """Call func over the items on a thread pool, yielding results as they complete.
+
+    At most concurrency calls are running or waiting to be consumed, so
+    memory stays bounded, and closing the iterator early stops submitting
+    calls. Exceptions of func are raised when their result is reached.
+
+    :param func: The function to call with each item.
+    :param items: The items to call it with, consumed lazily.
+    :param concurrency: The maximum number of calls at once.
+
+    :return: The results, in order of completion.
+    """
+    pending: Set[Future] = set()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        try:
+            for item in items:
+                pending.add(pool.submit(func, item))
+                if len(pending) < concurrency:
+                    continue
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
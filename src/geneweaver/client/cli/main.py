@@ -4,6 +4,7 @@
 import pkg_resources
 import typer
 from geneweaver.client.cli import alpha, beta
+from geneweaver.client.core import instrumentation
 
 cli = typer.Typer(no_args_is_help=True, rich_markup_mode="rich")
 
@@ -27,6 +28,17 @@ def common(
     pretty: bool = typer.Option(
         False, "--pretty", "-p", help="Pretty print data output."
     ),
+    timings: bool = typer.Option(
+        False, "--timings", help="Print a summary of HTTP call timings to stderr."
+    ),
 ) -> None:
     """GeneWeaver CLI client."""
     ctx.obj = {"quiet": quiet, "pretty": pretty}
+    if timings:
+        summary = instrumentation.add_listener(instrumentation.TimingSummary())
+
+        def report() -> None:
+            instrumentation.remove_listener(summary)
+            typer.echo(summary.report(), err=True)
+
+        ctx.call_on_close(report)
@@ -23,6 +23,14 @@ def get_config_file() -> Path:
     return get_config_dir() / "config.json"
 
 
+def get_cache_dir() -> Path:
+    """Get the path to the cache directory.
+
+    :returns: The path to the cache directory.
+    """
+    return get_config_dir() / "cache"
+
+
 def get_auth_token_file() -> Path:
     """Get the path to the authentication token file.
 
@@ -0,0 +1,505 @@
+"""On-disk caches for data which changes rarely or not at all once published.
+
+Each cached DataFrame is stored in its own directory, named by the hash of its
+key, with one NumPy `.npy` file per column. Text columns are stored as
+categorical codes plus a fixed width array of their categories. Every array is
+memory-mapped when reloaded, so a cache hit costs little more than opening the
+files. A loaded frame therefore has categorical text columns and read-only
+numeric columns. The least recently used entries are evicted once the cache
+grows past its size limit.
+
+Small JSON responses, such as metadata which only changes when data is
+ingested, are kept in a ResponseCache. Entries live in memory and in one JSON
+file each, and are served without a request until their time to live passes.
+
+Gene identifier mappings, such as AON ortholog edges, are kept in a
+MappingCache. It is an indexed SQLite table of (source, target) edges per
+kind and scope, which records the sources already looked up, including those
+with no edges, so that only unknown genes are sent to the API.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import numpy
+import pandas
+from geneweaver.client.core.app_dir import get_cache_dir
+
+DEFAULT_MAX_BYTES = 10 * 1024**3
+DEFAULT_TTL = 24 * 60 * 60
+DEFAULT_MAPPING_TTL = 30 * DEFAULT_TTL
+COLUMNS_FILE = "columns.json"
+
+
+def cache_key(*parts: Optional[str]) -> str:
+    """Build the content address of an entry from the parts of its key.
+
+    :param parts: The parts of the key, e.g. ingest id and model version.
+
+    :returns: A hex digest which names the entry on disk.
+    """
+    joined = "\x1f".join("" if part is None else str(part) for part in parts)
+    return hashlib.sha256(joined.encode("utf-8")).hexdigest()
+
+
+class FrameCache:
+    """A size bounded, least recently used, on-disk cache of DataFrames."""
+
+    def __init__(
+        self,
+        directory: Optional[Union[str, Path]] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        """Create a FrameCache.
+
+        :param directory: Where to store entries, defaults to a `frames`
+                          folder in the client cache directory.
+        :param max_bytes: The size past which least recently used entries
+                          are evicted.
+        """
+        if directory is None:
+            directory = get_cache_dir() / "frames"
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    def __contains__(self, key: Iterable[Optional[str]]) -> bool:
+        """Check if an entry exists for a key."""
+        return (self._entry_dir(key) / COLUMNS_FILE).is_file()
+
+    def get(self, key: Iterable[Optional[str]]) -> Optional[pandas.DataFrame]:
+        """Load a cached DataFrame, memory-mapping its columns.
+
+        Text columns are loaded as categoricals, and numeric columns as
+        read-only memory maps, so copy the frame before modifying it. Other
+        object columns are loaded as they were stored.
+
+        :param key: The parts of the key, e.g. (ingest id, model version).
+
+        :returns: The DataFrame, or None when it is not cached.
+        """
+        entry = self._entry_dir(key)
+        try:
+            with open(entry / COLUMNS_FILE, "r") as f:
+                columns = json.load(f)
+        except FileNotFoundError:
+            return None
+
+        data = {}
+        for i, column in enumerate(columns):
+            if column["kind"] == "objects":
+                with open(entry / "{}.json".format(i), "r") as f:
+                    data[column["name"]] = _object_array(json.load(f))
+                continue
+            values = numpy.load(entry / "{}.npy".format(i), mmap_mode="r")
+            if column["kind"] == "category":
+                categories = numpy.load(entry / "{}.categories.npy".format(i))
+                values = pandas.Categorical.from_codes(
+                    values, categories.astype(object)
+                )
+            data[column["name"]] = values
+
+        self._touch(entry)
+        return pandas.DataFrame(data, copy=False)
+
+    def put(self, key: Iterable[Optional[str]], frame: pandas.DataFrame) -> None:
+        """Store a DataFrame, then evict entries past the size limit.
+
+        The entry is written to a temporary directory and moved into place,
+        so readers never see a partly written entry.
+
+        The new entry itself is never evicted, even when it alone is larger
+        than the limit.
+
+        :param key: The parts of the key, e.g. (ingest id, model version).
+        :param frame: The DataFrame to store. Its index is not kept.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entry = self._entry_dir(key)
+        tmp = Path(tempfile.mkdtemp(dir=self.directory, prefix=".tmp-"))
+        try:
+            columns = []
+            for i, name in enumerate(frame.columns):
+                columns.append(self._write_column(tmp, i, name, frame[name]))
+            with open(tmp / COLUMNS_FILE, "w") as f:
+                json.dump(columns, f)
+            if entry.exists():
+                shutil.rmtree(entry)
+            os.replace(tmp, entry)
+        finally:
+            if tmp.exists():
+                shutil.rmtree(tmp)
+
+        self.evict(keep=entry.name)
+
+    def evict(self, keep: Optional[str] = None) -> List[str]:
+        """Remove least recently used entries until under the size limit.
+
+        :param keep: The name of an entry which must not be removed, e.g. the
+                     one just stored.
+
+        :returns: The names of the removed entries.
+        """
+        entries = sorted(self._entries(), key=lambda e: e[1])
+        total = sum(size for _, _, size in entries)
+        removed = []
+        for entry, _, size in entries:
+            if total <= self.max_bytes:
+                break
+            if entry.name == keep:
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            removed.append(entry.name)
+        return removed
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        for entry, _, _ in self._entries():
+            shutil.rmtree(entry, ignore_errors=True)
+
+    @property
+    def size(self) -> int:
+        """The total size in bytes of the cached entries."""
+        return sum(size for _, _, size in self._entries())
+
+    def _entry_dir(self, key: Iterable[Optional[str]]) -> Path:
+        return self.directory / cache_key(*key)
+
+    def _entries(self) -> List[Tuple[Path, float, int]]:
+        if not self.directory.is_dir():
+            return []
+        entries = []
+        for entry in self.directory.iterdir():
+            if entry.name.startswith(".") or not entry.is_dir():
+                continue
+            size = sum(f.stat().st_size for f in entry.iterdir())
+            entries.append((entry, entry.stat().st_mtime, size))
+        return entries
+
+    @staticmethod
+    def _touch(entry: Path) -> None:
+        now = time.time()
+        os.utime(entry, (now, now))
+
+    @staticmethod
+    def _write_column(
+        directory: Path, index: int, name: str, series: pandas.Series
+    ) -> dict:
+        if pandas.api.types.is_numeric_dtype(series) or pandas.api.types.is_bool_dtype(
+            series
+        ):
+            numpy.save(directory / "{}.npy".format(index), series.to_numpy())
+            return {"name": name, "kind": "values"}
+
+        if not series.map(_is_text).all():
+            # Values other than text, such as mixed types, would be coerced
+            # to str by a categorical, so are kept as JSON.
+            with open(directory / "{}.json".format(index), "w") as f:
+                json.dump(series.astype(object).tolist(), f, default=str)
+            return {"name": name, "kind": "objects"}
+
+        categorical = pandas.Categorical(series.astype(object))
+        numpy.save(directory / "{}.npy".format(index), categorical.codes)
+        numpy.save(
+            directory / "{}.categories.npy".format(index),
+            numpy.asarray(categorical.categories, dtype=str),
+        )
+        return {"name": name, "kind": "category"}
+
+
+def _is_text(value: object) -> bool:
+    return isinstance(value, str) or value is None or value != value
+
+
+def _object_array(items: List[object]) -> numpy.ndarray:
+    array = numpy.empty(len(items), dtype=object)
+    array[:] = items
+    return array
+
+
+class CachedResponse(NamedTuple):
+    """A decoded response body held by a ResponseCache."""
+
+    body: object
+    etag: Optional[str]
+    stored: float
+
+
+class ResponseCache:
+    """A time to live cache of decoded JSON responses, in memory and on disk.
+
+    Entries are keyed by a string, usually the request URL. Expired entries
+    are still returned by get, so that a caller can revalidate them with
+    their ETag rather than download them again.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Union[str, Path]] = None,
+        ttl: float = DEFAULT_TTL,
+        revalidate: bool = False,
+        persist: bool = True,
+    ) -> None:
+        """Create a ResponseCache.
+
+        :param directory: Where to store entries, defaults to a `responses`
+                          folder in the client cache directory. Caches which
+                          may be invalidated as a whole need their own.
+        :param ttl: The number of seconds an entry is used without a request.
+        :param revalidate: Send If-None-Match with the ETag of an expired
+                           entry, so an unchanged response is not downloaded.
+        :param persist: Keep entries on disk as well as in memory, so they
+                        are shared between processes and survive restarts.
+        """
+        if directory is None:
+            directory = get_cache_dir() / "responses"
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.revalidate = revalidate
+        self.persist = persist
+        self._memory: Dict[str, CachedResponse] = {}
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Get an entry, fresh or expired.
+
+        :param key: The key of the entry, e.g. its URL.
+
+        :returns: The entry, or None when it is not cached.
+        """
+        entry = self._memory.get(key)
+        if entry is None and self.persist:
+            entry = self._load(key)
+            if entry is not None:
+                self._memory[key] = entry
+        return entry
+
+    def is_fresh(self, entry: CachedResponse) -> bool:
+        """Check if an entry is within its time to live."""
+        return time.time() - entry.stored < self.ttl
+
+    def put(self, key: str, body: object, etag: Optional[str] = None) -> CachedResponse:
+        """Store a decoded response body.
+
+        :param key: The key of the entry, e.g. its URL.
+        :param body: The decoded JSON body.
+        :param etag: The ETag header of the response, if any.
+
+        :returns: The stored entry.
+        """
+        entry = CachedResponse(body=body, etag=etag, stored=time.time())
+        self._memory[key] = entry
+        if self.persist:
+            self._save(key, entry)
+        return entry
+
+    def refresh(self, key: str) -> Optional[CachedResponse]:
+        """Restart the time to live of an entry, e.g. after a 304 response.
+
+        :param key: The key of the entry.
+
+        :returns: The refreshed entry, or None when it is not cached.
+        """
+        entry = self.get(key)
+        if entry is None:
+            return None
+        return self.put(key, entry.body, entry.etag)
+
+    def invalidate(self, *keys: str) -> None:
+        """Remove entries, or every entry when no key is given.
+
+        With no key, every entry in the directory is removed, including those
+        of other ResponseCaches sharing it, so give each use its own
+        directory.
+
+        :param keys: The keys of the entries to remove.
+        """
+        if not keys:
+            self._memory.clear()
+            if self.directory.is_dir():
+                for path in self.directory.glob("*.json"):
+                    path.unlink()
+            return
+        for key in keys:
+            self._memory.pop(key, None)
+            try:
+                self._path(key).unlink()
+            except FileNotFoundError:
+                pass
+
+    def _path(self, key: str) -> Path:
+        return self.directory / "{}.json".format(cache_key(key))
+
+    def _load(self, key: str) -> Optional[CachedResponse]:
+        try:
+            with open(self._path(key), "r") as f:
+                stored = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if stored.get("key") != key:
+            return None
+        return CachedResponse(stored["body"], stored["etag"], stored["stored"])
+
+    def _save(self, key: str, entry: CachedResponse) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(
+                    {
+                        "key": key,
+                        "body": entry.body,
+                        "etag": entry.etag,
+                        "stored": entry.stored,
+                    },
+                    f,
+                )
+            os.replace(tmp, self._path(key))
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+
+Edge = Tuple[str, str]
+
+
+class MappingCache:
+    """A persistent, indexed cache of gene identifier mapping edges.
+
+    Edges are grouped by kind, e.g. "ortholog", and scope, e.g. the target
+    species and algorithm, and indexed by their source gene. Every source
+    looked up is recorded with the time it was stored, so a gene without any
+    mapping is not looked up again until its time to live passes. The cache
+    is safe to share between threads.
+    """
+
+    # SQLite limits the number of parameters of one statement.
+    _BATCH = 500
+
+    def __init__(
+        self,
+        directory: Optional[Union[str, Path]] = None,
+        ttl: Optional[float] = DEFAULT_MAPPING_TTL,
+    ) -> None:
+        """Create a MappingCache.
+
+        :param directory: Where to store the database, defaults to the
+                          client cache directory. ":memory:" keeps it in
+                          memory only.
+        :param ttl: The number of seconds a lookup is valid, None for ever.
+        """
+        if directory is None:
+            directory = get_cache_dir()
+        if str(directory) == ":memory:":
+            path = ":memory:"
+        else:
+            Path(directory).mkdir(parents=True, exist_ok=True)
+            path = str(Path(directory) / "mappings.sqlite")
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS lookups (
+                    kind TEXT, scope TEXT, source TEXT, stored REAL,
+                    PRIMARY KEY (kind, scope, source)
+                );
+                CREATE TABLE IF NOT EXISTS edges (
+                    kind TEXT, scope TEXT, source TEXT, target TEXT
+                );
+                CREATE INDEX IF NOT EXISTS edges_source
+                    ON edges (kind, scope, source);
+                """
+            )
+
+    def lookup(
+        self, kind: str, scope: str, sources: Iterable[str]
+    ) -> Tuple[List[Edge], List[str]]:
+        """Get the cached edges of some sources.
+
+        :param kind: The kind of mapping, e.g. "ortholog".
+        :param scope: The scope of the mapping, e.g. species and algorithm.
+        :param sources: The source genes.
+
+        :returns: The (source, target) edges of the sources which are cached,
+                  and the sources which are not, in their first order.
+        """
+        unique = list(dict.fromkeys(sources))
+        oldest = 0.0 if self.ttl is None else time.time() - self.ttl
+        known = set()
+        edges: List[Edge] = []
+        with self._lock:
+            for batch in _batches(unique, self._BATCH):
+                marks = ",".join("?" * len(batch))
+                known.update(
+                    row[0]
+                    for row in self._db.execute(
+                        "SELECT source FROM lookups WHERE kind = ? AND scope = ? "
+                        "AND stored >= ? AND source IN ({})".format(marks),
+                        (kind, scope, oldest, *batch),
+                    )
+                )
+                edges.extend(
+                    self._db.execute(
+                        "SELECT source, target FROM edges WHERE kind = ? "
+                        "AND scope = ? AND source IN ({}) ORDER BY rowid".format(marks),
+                        (kind, scope, *batch),
+                    )
+                )
+        edges = [edge for edge in edges if edge[0] in known]
+        return edges, [source for source in unique if source not in known]
+
+    def store(
+        self, kind: str, scope: str, sources: Iterable[str], edges: Iterable[Edge]
+    ) -> None:
+        """Store the complete edges of some sources, replacing any cached.
+
+        :param kind: The kind of mapping.
+        :param scope: The scope of the mapping.
+        :param sources: Every source which was looked up, with or without edges.
+        :param edges: The (source, target) edges found for those sources.
+        """
+        unique = list(dict.fromkeys(sources))
+        now = time.time()
+        with self._lock, self._db:
+            for batch in _batches(unique, self._BATCH):
+                self._db.execute(
+                    "DELETE FROM edges WHERE kind = ? AND scope = ? "
+                    "AND source IN ({})".format(",".join("?" * len(batch))),
+                    (kind, scope, *batch),
+                )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO lookups VALUES (?, ?, ?, ?)",
+                [(kind, scope, source, now) for source in unique],
+            )
+            self._db.executemany(
+                "INSERT INTO edges VALUES (?, ?, ?, ?)",
+                [(kind, scope, source, target) for source, target in edges],
+            )
+
+    def clear(self, kind: Optional[str] = None) -> None:
+        """Remove the cached edges of one kind, or of every kind.
+
+        :param kind: The kind to remove, None for all.
+        """
+        where, args = ("", ()) if kind is None else (" WHERE kind = ?", (kind,))
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM lookups" + where, args)
+            self._db.execute("DELETE FROM edges" + where, args)
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._db.close()
+
+
+def _batches(items: List[str], size: int) -> Iterable[List[str]]:
+    return (items[start : start + size] for start in range(0, len(items), size))
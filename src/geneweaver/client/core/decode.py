@@ -0,0 +1,63 @@
+"""Pluggable JSON decoding for the GeneWeaver clients.
+
+Large responses, such as geneset values or expression searches, spend much of
+their client time in JSON decoding. The fastest installed decoder is used,
+falling back to the standard library:
+
+    1. orjson
+    2. ujson
+    3. json
+
+Another decoder can be plugged in with `set_json_decoder`.
+"""
+
+import importlib
+import json
+from typing import Callable, Optional, Tuple, Union
+
+Loads = Callable[[Union[bytes, str]], object]
+
+BACKENDS = ("orjson", "ujson", "json")
+
+
+def _find_json_decoder() -> Tuple[str, Loads]:
+    """Find the first of BACKENDS which can be imported."""
+    for name in BACKENDS[:-1]:
+        try:
+            module = importlib.import_module(name)
+        except ImportError:
+            continue
+        return name, module.loads
+    return "json", json.loads
+
+
+_decoder_name, _loads = _find_json_decoder()
+
+
+def loads(data: Union[bytes, str]) -> object:
+    """Decode a JSON document with the current decoder.
+
+    :param data: The raw bytes, or text, of the document.
+
+    :return: The decoded object.
+    """
+    return _loads(data)
+
+
+def set_json_decoder(decoder: Optional[Loads] = None, name: str = "custom") -> None:
+    """Set the function used to decode JSON.
+
+    :param decoder: A function taking bytes or str and returning the decoded
+                    object. If None, the fastest installed backend is used.
+    :param name: A name reported by `json_decoder_name`.
+    """
+    global _decoder_name, _loads
+    if decoder is None:
+        _decoder_name, _loads = _find_json_decoder()
+    else:
+        _decoder_name, _loads = name, decoder
+
+
+def json_decoder_name() -> str:
+    """Get the name of the current JSON decoder."""
+    return _decoder_name
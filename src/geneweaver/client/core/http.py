@@ -0,0 +1,209 @@
+"""Shared HTTP session construction for the GeneWeaver clients.
+
+Sessions built here keep their connections alive in a pool so that repeated
+calls to the same host do not pay the TCP and TLS setup cost every time. Their
+responses decode JSON with the decoder chosen in `core.decode`, and their calls
+are reported to the listeners of `core.instrumentation`.
+"""
+
+import codecs
+import json
+import time
+from typing import Any, Iterable, Optional
+
+import requests
+from geneweaver.client.core import decode, instrumentation
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+
+_NOT_DECODED = object()
+
+
+class DecodedResponse(requests.Response):
+    """A Response whose json method uses the decoder from `core.decode`."""
+
+    def json(self, **kwargs: Any) -> Any:  # noqa: ANN401
+        """Decode the JSON body of the response.
+
+        Keyword arguments are only understood by the standard library, and
+        the body of a response declaring a charset other than UTF-8 must be
+        decoded to text first, so both fall back to the requests
+        implementation.
+
+        :raises requests.exceptions.JSONDecodeError: When the body is not
+                                                     valid JSON, whichever
+                                                     decoder is used.
+        """
+        if kwargs or not self._is_utf8():
+            return super().json(**kwargs)
+        decoded = self.__dict__.pop("_decoded", _NOT_DECODED)
+        if decoded is _NOT_DECODED:
+            decoded = self._loads()
+        return decoded
+
+    def decode_now(self) -> float:
+        """Decode the JSON body ahead of the json call, timing the decode.
+
+        :return: The seconds spent decoding.
+        """
+        b4 = time.perf_counter()
+        self._decoded = self.json()
+        return time.perf_counter() - b4
+
+    def _is_utf8(self) -> bool:
+        if not self.encoding:
+            return True
+        try:
+            return codecs.lookup(self.encoding).name == "utf-8"
+        except LookupError:
+            return False
+
+    def _loads(self) -> object:
+        try:
+            return decode.loads(self.content)
+        except ValueError as err:
+            if isinstance(err, json.JSONDecodeError):
+                raise requests.exceptions.JSONDecodeError(
+                    err.msg, err.doc, err.pos
+                ) from err
+            raise requests.exceptions.JSONDecodeError(str(err), self.text, 0) from err
+
+
+class DecodingHTTPAdapter(HTTPAdapter):
+    """An HTTPAdapter which builds DecodedResponses."""
+
+    def build_response(self, req: Any, resp: Any) -> requests.Response:  # noqa: ANN401
+        """Build the response, switching it to a DecodedResponse."""
+        response = super().build_response(req, resp)
+        response.__class__ = DecodedResponse
+        return response
+
+
+class InstrumentedSession(requests.Session):
+    """A Session reporting each call it sends to `core.instrumentation`.
+
+    While a listener is registered, successful JSON responses which are not
+    streamed are decoded as they are received, so that their event includes
+    the decode time, and json returns that decoded body.
+    """
+
+    def __init__(self, service: Optional[str] = None) -> None:
+        """Create an InstrumentedSession.
+
+        :param service: The service name of its events, by default derived
+                        from the URL of each call.
+        """
+        super().__init__()
+        self.service = service
+
+    def send(
+        self, request: requests.PreparedRequest, **kwargs: Any  # noqa: ANN401
+    ) -> requests.Response:
+        """Send a request, reporting the call to the instrumentation listeners."""
+        if not instrumentation.active():
+            return super().send(request, **kwargs)
+        with instrumentation.record(
+            self.service, request.method, request.url, _body_size(request.body)
+        ) as event:
+            try:
+                response = super().send(request, **kwargs)
+            except requests.RequestException as err:
+                if err.response is not None:
+                    _measure(event, err.response, kwargs.get("stream", False))
+                raise
+            _measure(event, response, kwargs.get("stream", False))
+            if (
+                response.ok
+                and not kwargs.get("stream", False)
+                and isinstance(response, DecodedResponse)
+                and "json" in response.headers.get("Content-Type", "")
+            ):
+                try:
+                    event.decode_time = response.decode_now()
+                except ValueError:
+                    pass
+        return response
+
+
+def _body_size(body: object) -> Optional[int]:
+    if body is None:
+        return 0
+    if isinstance(body, (bytes, str)):
+        return len(body)
+    return None
+
+
+def _measure(
+    event: instrumentation.CallEvent, response: requests.Response, stream: bool
+) -> None:
+    event.status = response.status_code
+    if not stream:
+        event.bytes_in = len(response.content)
+    history = getattr(getattr(response.raw, "retries", None), "history", ())
+    event.retries += len(history or ())
+
+
+def mount_adapter(session: requests.Session, adapter: HTTPAdapter) -> None:
+    """Mount an adapter on a session for both http and https.
+
+    :param session: The session to mount on.
+    :param adapter: The adapter to mount.
+    """
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+
+def create_retry(
+    retries: int = DEFAULT_RETRIES,
+    backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+    status_forcelist: Iterable[int] = RETRY_STATUS_CODES,
+) -> Retry:
+    """Create the urllib3 retry policy used by pooled sessions.
+
+    Only idempotent methods are retried. Once the retries are exhausted the last
+    response is returned so that callers can still `raise_for_status` on it.
+
+    :param retries: The maximum number of retries for a single request.
+    :param backoff_factor: The exponential backoff factor between retries.
+    :param status_forcelist: The status codes which should trigger a retry.
+
+    :return: A configured Retry object.
+    """
+    return Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=tuple(status_forcelist),
+        raise_on_status=False,
+    )
+
+
+def create_session(
+    pool_size: int = DEFAULT_POOL_SIZE,
+    retries: int = DEFAULT_RETRIES,
+    backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+    service: Optional[str] = None,
+) -> requests.Session:
+    """Create a requests.Session with a keep-alive connection pool.
+
+    :param pool_size: The maximum number of connections kept open per host.
+    :param retries: The maximum number of retries for a single request.
+    :param backoff_factor: The exponential backoff factor between retries.
+    :param service: The service name reported with each call, by default
+                    derived from its URL.
+
+    :return: A configured requests.Session.
+    """
+    adapter = DecodingHTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=create_retry(retries, backoff_factor),
+    )
+    session = InstrumentedSession(service)
+    mount_adapter(session, adapter)
+    session.headers.update({"Connection": "keep-alive"})
+    return session
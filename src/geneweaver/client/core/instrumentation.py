@@ -0,0 +1,264 @@
+"""Per-call instrumentation of the HTTP clients.
+
+Every request made by the GEDB, GeneWeaver API, AON and graph clients is
+described by a CallEvent, with its endpoint, status, bytes sent and received,
+latency, retries and JSON decode time. Listeners registered with add_listener
+are called with each event once its call has finished:
+
+    from geneweaver.client.core import instrumentation
+
+    summary = instrumentation.add_listener(instrumentation.TimingSummary())
+    ...
+    print(summary.report())
+
+With no listener registered nothing is measured. When OpenTelemetry is
+installed, use_opentelemetry turns every event into a span.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from geneweaver.client.core.config import settings
+
+
+@dataclass
+class CallEvent:
+    """The measurements of one HTTP call."""
+
+    service: str
+    """The service called: gedb, api, aon, graph, or the host of the URL."""
+    method: str
+    url: str
+    status: Optional[int] = None
+    """The response status, None when no response was received."""
+    bytes_out: Optional[int] = None
+    """The size of the request body, None when it is streamed."""
+    bytes_in: Optional[int] = None
+    """The size of the response body, None when it is streamed."""
+    latency: float = 0.0
+    """The seconds from sending the request to reading the response body."""
+    retries: int = 0
+    """The retries made before this response, by the transport or the caller."""
+    decode_time: float = 0.0
+    """The seconds spent decoding the JSON body."""
+    error: Optional[str] = None
+    """The name of the exception raised by the call, if any."""
+    start: float = field(default_factory=time.time)
+    """The wall clock time the call started, in seconds since the epoch."""
+
+    @property
+    def endpoint(self) -> str:
+        """The path of the URL, without its query."""
+        return urlsplit(self.url).path or "/"
+
+
+Listener = Callable[[CallEvent], None]
+
+_listeners: Tuple[Listener, ...] = ()
+_lock = threading.Lock()
+
+# The attempt of the caller's retry loop which is sending the current request.
+current_attempt: ContextVar[int] = ContextVar("current_attempt", default=0)
+
+
+def add_listener(listener: Listener) -> Listener:
+    """Call a listener with the CallEvent of every finished call.
+
+    :param listener: The callable, which must be thread safe.
+
+    :return: The listener, so it can be created and registered at once.
+    """
+    global _listeners
+    with _lock:
+        _listeners = _listeners + (listener,)
+    return listener
+
+
+def remove_listener(listener: Listener) -> None:
+    """Stop calling a listener. Unknown listeners are ignored."""
+    global _listeners
+    with _lock:
+        _listeners = tuple(item for item in _listeners if item is not listener)
+
+
+def active() -> bool:
+    """Check if any listener is registered."""
+    return bool(_listeners)
+
+
+def service_for_url(url: str) -> str:
+    """Name the service a URL belongs to, from the configured service URLs.
+
+    :param url: The URL called.
+
+    :return: gedb, aon or api, or otherwise the host of the URL.
+    """
+    for name, base in (
+        ("aon", settings.AON_API_URL),
+        ("gedb", settings.GEDB),
+        ("api", settings.API_URL),
+    ):
+        if base and url.startswith(base):
+            return name
+    return urlsplit(url).hostname or "unknown"
+
+
+def emit(event: CallEvent) -> None:
+    """Hand an event to every listener."""
+    for listener in _listeners:
+        listener(event)
+
+
+@contextmanager
+def record(
+    service: Optional[str], method: str, url: str, bytes_out: Optional[int] = None
+) -> Iterator[CallEvent]:
+    """Measure a call, emitting its event when the block exits.
+
+    The block fills in the status, bytes_in and decode_time of the event,
+    latency, retries and any error are set here.
+
+    :param service: The service name, None to derive it from the URL.
+    :param method: The HTTP method.
+    :param url: The URL called.
+    :param bytes_out: The size of the request body.
+    """
+    event = CallEvent(
+        service=service or service_for_url(url),
+        method=method,
+        url=url,
+        bytes_out=bytes_out,
+        retries=current_attempt.get(),
+    )
+    b4 = time.perf_counter()
+    try:
+        yield event
+    except BaseException as error:
+        event.error = type(error).__name__
+        raise
+    finally:
+        event.latency = time.perf_counter() - b4
+        emit(event)
+
+
+@dataclass
+class _Totals:
+    calls: int = 0
+    errors: int = 0
+    latency: float = 0.0
+    max_latency: float = 0.0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    retries: int = 0
+    decode_time: float = 0.0
+
+
+class TimingSummary:
+    """A listener totalling calls per service and endpoint."""
+
+    def __init__(self) -> None:
+        """Create an empty TimingSummary."""
+        self.totals: Dict[Tuple[str, str, str], _Totals] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event: CallEvent) -> None:
+        """Add an event to the totals."""
+        key = (event.service, event.method, event.endpoint)
+        with self._lock:
+            totals = self.totals.setdefault(key, _Totals())
+            totals.calls += 1
+            totals.errors += event.error is not None or (event.status or 0) >= 400
+            totals.latency += event.latency
+            totals.max_latency = max(totals.max_latency, event.latency)
+            totals.bytes_in += event.bytes_in or 0
+            totals.bytes_out += event.bytes_out or 0
+            totals.retries += event.retries
+            totals.decode_time += event.decode_time
+
+    def report(self) -> str:
+        """Format the totals as a table, slowest endpoints first."""
+        with self._lock:
+            rows = sorted(self.totals.items(), key=lambda item: -item[1].latency)
+        lines: List[str] = [
+            "{:<6} {:<6} {:<44} {:>6} {:>6} {:>9} {:>9} {:>9} {:>10} {:>10} "
+            "{:>7}".format(
+                "svc",
+                "method",
+                "endpoint",
+                "calls",
+                "errors",
+                "total s",
+                "mean s",
+                "max s",
+                "in KB",
+                "out KB",
+                "retries",
+            )
+        ]
+        for (service, method, endpoint), t in rows:
+            lines.append(
+                "{:<6} {:<6} {:<44} {:>6} {:>6} {:>9.3f} {:>9.3f} {:>9.3f} "
+                "{:>10.1f} {:>10.1f} {:>7}".format(
+                    service,
+                    method,
+                    endpoint[-44:],
+                    t.calls,
+                    t.errors,
+                    t.latency,
+                    t.latency / t.calls,
+                    t.max_latency,
+                    t.bytes_in / 1024,
+                    t.bytes_out / 1024,
+                    t.retries,
+                )
+            )
+            if t.decode_time:
+                lines[-1] += "  (decode {:.3f}s)".format(t.decode_time)
+        return "\n".join(lines)
+
+
+def use_opentelemetry(tracer: Optional[object] = None) -> Listener:
+    """Register a listener recording every call as an OpenTelemetry span.
+
+    :param tracer: The tracer to use, defaults to the global tracer for this
+                   package. Requires the opentelemetry-api package.
+
+    :return: The registered listener, to pass to remove_listener.
+    """
+    if tracer is None:
+        try:
+            from opentelemetry import trace
+        except ImportError as err:
+            raise ImportError(
+                "use_opentelemetry needs the opentelemetry-api package."
+            ) from err
+        tracer = trace.get_tracer("geneweaver.client")
+
+    def to_span(event: CallEvent) -> None:
+        start = int(event.start * 1e9)
+        span = tracer.start_span(
+            "{} {} {}".format(event.service, event.method, event.endpoint),
+            start_time=start,
+        )
+        attributes = {
+            "http.method": event.method,
+            "http.url": event.url,
+            "http.status_code": event.status,
+            "http.request_content_length": event.bytes_out,
+            "http.response_content_length": event.bytes_in,
+            "geneweaver.service": event.service,
+            "geneweaver.retries": event.retries,
+            "geneweaver.decode_time": event.decode_time,
+            "geneweaver.error": event.error,
+        }
+        for key, value in attributes.items():
+            if value is not None:
+                span.set_attribute(key, value)
+        span.end(end_time=start + int(event.latency * 1e9))
+
+    return add_listener(to_span)
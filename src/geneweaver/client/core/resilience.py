@@ -0,0 +1,326 @@
+"""Retries and a circuit breaker for calls to flaky backend services.
+
+A RetryPolicy repeats a request which failed with a connection error, a
+timeout or a transient status code, waiting an exponentially growing, fully
+jittered delay between attempts. A CircuitBreaker shared by those calls opens
+after consecutive failures and rejects calls until a cool down has passed, so
+that a batch stops queueing requests on a service which is down.
+
+Both report what they do to an optional metrics hook, a callable taking an
+event name and a dict of details:
+
+    retry              url, attempt, delay, reason
+    give_up            url, attempts, reason
+    breaker_state      state, previous, failures
+    breaker_rejected   state, retry_in
+"""
+
+import random
+import threading
+import time
+from typing import Callable, Dict, Iterable, Mapping, Optional
+
+import requests
+from geneweaver.client.core import instrumentation
+from geneweaver.client.core.http import (
+    DEFAULT_BACKOFF_FACTOR,
+    DEFAULT_RETRIES,
+    RETRY_STATUS_CODES,
+)
+
+DEFAULT_MAX_BACKOFF = 60.0
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30.0
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_READ_TIMEOUT = 3600.0
+
+# Status codes which mean the service itself is unavailable, rather than
+# asking the client to slow down as 429 does.
+UNAVAILABLE_STATUS_CODES = (502, 503, 504)
+
+MetricsHook = Callable[[str, Mapping[str, object]], None]
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of making a call while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """A thread safe, consecutive failure, circuit breaker.
+
+    Closed, calls go through. After failure_threshold failures in a row it
+    opens and every call is rejected with CircuitOpenError. Once
+    reset_timeout seconds have passed it is half open and lets one trial
+    call through, which closes it again on success or reopens it on failure.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+        metrics: Optional[MetricsHook] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Create a CircuitBreaker.
+
+        :param failure_threshold: The consecutive failures which open it.
+        :param reset_timeout: The seconds to stay open before a trial call.
+        :param metrics: The optional hook told of state changes.
+        :param clock: The monotonic clock, replaceable for tests.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.metrics = metrics
+        self.clock = clock
+        self.failures = 0
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """The current state, one of closed, open or half_open."""
+        with self._lock:
+            return self._current_state()
+
+    def before_call(self) -> None:
+        """Check a call may go ahead.
+
+        :raises CircuitOpenError: When the breaker is open, or half open with
+                                  its trial call already running.
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return
+            if state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return
+            retry_in = max(0.0, self._opened_at + self.reset_timeout - self.clock())
+        self._emit("breaker_rejected", {"state": state, "retry_in": retry_in})
+        raise CircuitOpenError(
+            "The service is unavailable, calls resume in {:.1f}s".format(retry_in)
+        )
+
+    def record_success(self) -> None:
+        """Record a successful call, closing the breaker."""
+        with self._lock:
+            self.failures = 0
+            self._trial_running = False
+            change = self._set_state(self.CLOSED, self._current_state())
+        self._emit_change(change)
+
+    def release(self) -> None:
+        """Record a call which says nothing of the service's health, e.g. a 429.
+
+        The state is unchanged, but a half open breaker lets its next call
+        through as the trial.
+        """
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the breaker past the threshold."""
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            previous = self._current_state()
+            change = None
+            if previous == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self._opened_at = self.clock()
+                change = self._set_state(self.OPEN, previous)
+        self._emit_change(change)
+
+    def _current_state(self) -> str:
+        if (
+            self._state == self.OPEN
+            and self.clock() - self._opened_at >= self.reset_timeout
+        ):
+            return self.HALF_OPEN
+        return self._state
+
+    def _set_state(self, state: str, previous: str) -> Optional[Dict[str, object]]:
+        self._state = state
+        if previous == state:
+            return None
+        return {"state": state, "previous": previous, "failures": self.failures}
+
+    def _emit_change(self, change: Optional[Dict[str, object]]) -> None:
+        if change is not None:
+            self._emit("breaker_state", change)
+
+    def _emit(self, event: str, details: Mapping[str, object]) -> None:
+        if self.metrics is not None:
+            self.metrics(event, details)
+
+
+def backoff_delay(
+    attempt: int,
+    backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+    max_backoff: float = DEFAULT_MAX_BACKOFF,
+    rng: random.Random = random,
+) -> float:
+    """Get a fully jittered exponential backoff delay.
+
+    :param attempt: The number of the retry, starting at 0.
+    :param backoff_factor: The delay ceiling of the first retry.
+    :param max_backoff: The largest delay ceiling.
+    :param rng: The source of the jitter.
+
+    :return: A delay in seconds, uniform between 0 and the ceiling.
+    """
+    return rng.uniform(0, min(max_backoff, backoff_factor * 2**attempt))
+
+
+class RetryPolicy:
+    """Retry requests with jittered exponential backoff and a circuit breaker.
+
+    Only use it for idempotent requests, each attempt sends the request again.
+    """
+
+    def __init__(
+        self,
+        retries: int = DEFAULT_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        max_backoff: float = DEFAULT_MAX_BACKOFF,
+        status_forcelist: Iterable[int] = RETRY_STATUS_CODES,
+        breaker: Optional[CircuitBreaker] = None,
+        metrics: Optional[MetricsHook] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """Create a RetryPolicy.
+
+        :param retries: The maximum number of retries of one request.
+        :param backoff_factor: The delay ceiling of the first retry, doubled
+                               for every further retry.
+        :param max_backoff: The largest delay between two attempts.
+        :param status_forcelist: The status codes which are retried.
+        :param breaker: The optional circuit breaker guarding the service.
+        :param metrics: The optional hook told of retries.
+        :param sleep: The function waiting between attempts.
+        """
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.status_forcelist = frozenset(status_forcelist)
+        self.breaker = breaker
+        self.metrics = metrics
+        self.sleep = sleep
+
+    def call(
+        self,
+        send: Callable[[], requests.Response],
+        url: str,
+        retries: Optional[int] = None,
+        retry_read_timeout: bool = True,
+    ) -> requests.Response:
+        """Send a request until it succeeds or the retries are used up.
+
+        :param send: Sends the request and returns its response.
+        :param url: The URL, reported to the metrics hook.
+        :param retries: Overrides the number of retries of the policy.
+        :param retry_read_timeout: Retry a request whose response did not
+                                   arrive in time. Disable it for long running
+                                   calls, where each attempt takes the whole
+                                   read timeout.
+
+        :return: The first response which is not retried, or the last one.
+
+        :raises CircuitOpenError: When the circuit breaker is open.
+        :raises requests.RequestException: The connection error or timeout
+                                           of the last attempt.
+        """
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries + 1):
+            last = attempt == retries
+            try:
+                response = self._attempt(send, attempt)
+            except (requests.ConnectionError, requests.Timeout) as error:
+                if isinstance(error, CircuitOpenError):
+                    raise
+                reason = type(error).__name__
+                if last or (
+                    not retry_read_timeout
+                    and isinstance(error, requests.exceptions.ReadTimeout)
+                ):
+                    self._emit("give_up", url=url, attempts=attempt + 1, reason=reason)
+                    raise
+                self._wait(url, attempt, reason, None)
+                continue
+
+            status = response.status_code
+            if status not in self.status_forcelist:
+                return response
+            if last:
+                self._emit("give_up", url=url, attempts=attempt + 1, reason=status)
+                return response
+            retry_after = _retry_after(response)
+            response.close()
+            self._wait(url, attempt, status, retry_after)
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    def _attempt(
+        self, send: Callable[[], requests.Response], attempt: int
+    ) -> requests.Response:
+        """Send the request once, recording its outcome with the breaker.
+
+        Every call let through by the breaker is recorded, so that a half
+        open breaker never waits on a trial which has finished. Exceptions
+        count as failures of the service, statuses which only ask the client
+        to slow down, such as 429, release the breaker without a verdict.
+        """
+        if self.breaker is not None:
+            self.breaker.before_call()
+        token = instrumentation.current_attempt.set(attempt)
+        try:
+            response = send()
+        except Exception:
+            self._failure()
+            raise
+        except BaseException:
+            self._release()
+            raise
+        finally:
+            instrumentation.current_attempt.reset(token)
+
+        status = response.status_code
+        if status in UNAVAILABLE_STATUS_CODES:
+            self._failure()
+        elif status in self.status_forcelist:
+            self._release()
+        elif self.breaker is not None:
+            self.breaker.record_success()
+        return response
+
+    def _wait(
+        self, url: str, attempt: int, reason: object, retry_after: Optional[float]
+    ) -> None:
+        delay = backoff_delay(attempt, self.backoff_factor, self.max_backoff)
+        if retry_after is not None:
+            delay = min(self.max_backoff, max(delay, retry_after))
+        self._emit("retry", url=url, attempt=attempt + 1, delay=delay, reason=reason)
+        self.sleep(delay)
+
+    def _failure(self) -> None:
+        if self.breaker is not None:
+            self.breaker.record_failure()
+
+    def _release(self) -> None:
+        if self.breaker is not None:
+            self.breaker.release()
+
+    def _emit(self, event: str, **details: object) -> None:
+        if self.metrics is not None:
+            self.metrics(event, details)
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
@@ -6,20 +6,67 @@ are supported using a json object. This intentionally
 wraps the underlying BigQuery database for the reasons
 of security and scalability.
 """
-import io
+import bz2
+import gzip
+import lzma
+import tempfile
+import threading
+import time
 from collections import OrderedDict
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, fields
 from enum import Enum
+from functools import lru_cache
 from io import StringIO
-from typing import List, Mapping, Set
+from pathlib import Path
+from typing import (
+    BinaryIO,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    TextIO,
+    Tuple,
+    Type,
+    Union,
+)
 
 import numpy
 import pandas
 import requests
+from geneweaver.client.core.cache import CachedResponse, FrameCache, ResponseCache
 from geneweaver.client.core.config import settings
+from geneweaver.client.core.http import (
+    DEFAULT_BACKOFF_FACTOR,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_RETRIES,
+    create_session,
+)
+from geneweaver.client.core.resilience import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_MAX_BACKOFF,
+    DEFAULT_READ_TIMEOUT,
+    CircuitBreaker,
+    MetricsHook,
+    RetryPolicy,
+)
 from pandas import DataFrame
 from requests.models import Response
 
+DEFAULT_CHUNKSIZE = 50000
+"""The default number of rows in each chunk of streamed bulk data."""
+
+DEFAULT_GENE_CHUNK_SIZE = 2000
+"""A gene_chunk_size which keeps each search request of a moderate size."""
+
+# Returned by _store_metadata for a 304 whose cached entry has gone.
+UNCACHED_304 = object()
+
 SourceType = Enum("Source", ["IMPUTED", "EXPERIMENT"])
 """
 The source either experimentally determined or imputed using
@@ -74,6 +121,618 @@ class DataResult:
     sexes: List[str] = None  # noqa: N815
 
 
+class ColumnarDataResult(Sequence):
+    """Search results held as columns rather than one DataResult per item.
+
+    Built in a single pass over the JSON returned by search. Each result
+    item is one row. The values, weights, names and sexes of every row are
+    concatenated into flat arrays, and offsets[i]:offsets[i + 1] slices out
+    the entries of row i. The per row gene id, strain and tissue are held
+    as pandas Categoricals.
+
+    Indexing or iterating builds DataResult objects lazily, one row at a
+    time, so code written against a list of DataResults keeps working.
+    """
+
+    def __init__(
+        self,
+        values: numpy.ndarray,
+        weights: numpy.ndarray,
+        offsets: numpy.ndarray,
+        names: pandas.Categorical,
+        sexes: pandas.Categorical,
+        gene_ids: pandas.Categorical,
+        strains: pandas.Categorical,
+        tissues: pandas.Categorical,
+        has_weights: numpy.ndarray,
+    ) -> None:
+        """Create a ColumnarDataResult from its columns, see from_json."""
+        self.values = values
+        self.weights = weights
+        self.offsets = offsets
+        self.names = names
+        self.sexes = sexes
+        self.gene_ids = gene_ids
+        self.strains = strains
+        self.tissues = tissues
+        self.has_weights = has_weights
+
+    @classmethod
+    def from_json(
+        cls: Type["ColumnarDataResult"], items: List[dict]
+    ) -> "ColumnarDataResult":
+        """Build the columns from the items of a search response.
+
+        Each item is expected to hold a single gene id, as the service returns
+        one result per gene and strain.
+
+        @param items: The decoded JSON list returned by the search endpoint.
+        """
+        values: List[float] = []
+        names: List[Optional[str]] = []
+        sexes: List[Optional[str]] = []
+        lengths: List[int] = []
+        gene_ids: List[Optional[str]] = []
+        strains: List[Optional[str]] = []
+        tissues: List[Optional[str]] = []
+        weighted: List[tuple] = []
+
+        # Bind the appends once, this loop runs for every item of the response.
+        add_values, add_names, add_sexes = values.extend, names.extend, sexes.extend
+        add_length, add_gene_id = lengths.append, gene_ids.append
+        add_strain, add_tissue = strains.append, tissues.append
+
+        for row, item in enumerate(items):
+            item_values = item.get("values") or ()
+            count = len(item_values)
+            add_values(item_values)
+            add_names(item.get("names") or (None,) * count)
+            add_sexes(item.get("sexes") or (None,) * count)
+            add_length(count)
+            item_gene_ids = item.get("geneIds")
+            add_gene_id(item_gene_ids[0] if item_gene_ids else None)
+            add_strain(item.get("strain"))
+            add_tissue(item.get("tissue"))
+            item_weights = item.get("weights")
+            if item_weights is not None:
+                weighted.append((row, item_weights))
+
+        offsets = numpy.zeros(len(lengths) + 1, dtype=numpy.int64)
+        numpy.cumsum(lengths, out=offsets[1:])
+
+        weights = numpy.full(len(values), numpy.nan)
+        has_weights = numpy.zeros(len(lengths), dtype=bool)
+        for row, item_weights in weighted:
+            weights[offsets[row] : offsets[row + 1]] = item_weights
+            has_weights[row] = True
+
+        return cls(
+            values=numpy.array(values, dtype=numpy.float64),
+            weights=weights,
+            offsets=offsets,
+            names=_factorize(names),
+            sexes=_factorize(sexes),
+            gene_ids=_factorize(gene_ids),
+            strains=_factorize(strains),
+            tissues=_factorize(tissues),
+            has_weights=has_weights,
+        )
+
+    def __len__(self) -> int:
+        """Get the number of result items."""
+        return len(self.offsets) - 1
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[DataResult, List[DataResult]]:
+        """Build the DataResult for a row, or a list of them for a slice."""
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ColumnarDataResult index out of range")
+        return self._row(index)
+
+    def row_index(self) -> numpy.ndarray:
+        """Get the row number of every entry in the flat value arrays."""
+        return numpy.repeat(numpy.arange(len(self)), numpy.diff(self.offsets))
+
+    def to_frame(self) -> DataFrame:
+        """Get one DataFrame row per value, with its gene, strain and tissue."""
+        rows = self.row_index()
+        return pandas.DataFrame(
+            {
+                "gene_id": self.gene_ids.take(rows),
+                "strain": self.strains.take(rows),
+                "tissue": self.tissues.take(rows),
+                "name": self.names,
+                "sex": self.sexes,
+                "value": self.values,
+                "weight": self.weights,
+            }
+        )
+
+    def _row(self, index: int) -> DataResult:
+        start, stop = self.offsets[index], self.offsets[index + 1]
+        gene_id = self.gene_ids[index]
+        return DataResult(
+            values=self.values[start:stop].tolist(),
+            names=_categorical_list(self.names, start, stop),
+            weights=(
+                self.weights[start:stop].tolist() if self.has_weights[index] else None
+            ),
+            geneIds=None if pandas.isna(gene_id) else [gene_id],
+            strain=_none_if_na(self.strains[index]),
+            tissue=_none_if_na(self.tissues[index]),
+            sexes=_categorical_list(self.sexes, start, stop),
+        )
+
+
+def _factorize(values: List[Optional[str]]) -> pandas.Categorical:
+    codes, categories = pandas.factorize(numpy.array(values, dtype=object))
+    return pandas.Categorical.from_codes(codes, categories)
+
+
+def _all_genes(drequest: DataRequest) -> bool:
+    """Check if a request asks for every gene, having no geneIds."""
+    return not drequest.geneIds
+
+
+def _as_tuple(values: Optional[List[str]]) -> Optional[tuple]:
+    return None if values is None else tuple(values)
+
+
+def _none_if_na(value: object) -> object:
+    return None if pandas.isna(value) else value
+
+
+def _categorical_list(
+    categorical: pandas.Categorical, start: int, stop: int
+) -> Optional[List[str]]:
+    values = [_none_if_na(v) for v in categorical[start:stop]]
+    return None if values and all(v is None for v in values) else values
+
+
+class RandomResult(Sequence):
+    """Random genesets held as one array rather than one DataFrame each.
+
+    The CSV body returned by the random endpoint is parsed once. Row i of
+    scores holds the size scores of random geneset i, and the matching row of
+    codes indexes into names for the indiv_name of each score.
+
+    Indexing or iterating builds the indiv_name and score DataFrame of a
+    geneset lazily, so code written against the list returned by random keeps
+    working.
+    """
+
+    def __init__(
+        self, scores: numpy.ndarray, codes: numpy.ndarray, names: pandas.Index
+    ) -> None:
+        """Create a RandomResult from its arrays, see from_text."""
+        self.scores = scores
+        self.codes = codes
+        self.names = names
+        self._name_values = numpy.asarray(names, dtype=object)
+
+    @classmethod
+    def from_text(cls: Type["RandomResult"], text: str, size: int) -> "RandomResult":
+        """Parse the CSV body of a random response.
+
+        Trailing lines which do not fill a whole geneset are dropped.
+
+        @param text: The indiv_name,score lines, without a header.
+        @param size: The size of each random geneset.
+        """
+        frame = DataFrame({"indiv_name": pandas.Categorical([]), "score": []})
+        if size > 0 and text.strip():
+            frame = pandas.read_csv(
+                StringIO(text),
+                header=None,
+                names=["indiv_name", "score"],
+                dtype={"indiv_name": "category", "score": numpy.float64},
+            )
+        count = len(frame) // size if size > 0 else 0
+        names = frame["indiv_name"].cat
+        return cls(
+            scores=frame["score"].to_numpy()[: count * size].reshape(count, size),
+            codes=names.codes.to_numpy()[: count * size].reshape(count, size),
+            names=names.categories,
+        )
+
+    def __len__(self) -> int:
+        """Get the number of random genesets."""
+        return len(self.scores)
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[DataFrame, List[DataFrame]]:
+        """Build the DataFrame of a geneset, or a list of them for a slice."""
+        if isinstance(index, slice):
+            return [self._frame(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("RandomResult index out of range")
+        return self._frame(index)
+
+    def frames(self) -> List[DataFrame]:
+        """Get every geneset as an indiv_name and score DataFrame."""
+        return self[:]
+
+    def indiv_names(self) -> numpy.ndarray:
+        """Get the indiv_name of every score, in the shape of scores."""
+        return self._name_values[self.codes]
+
+    def _frame(self, index: int) -> DataFrame:
+        return DataFrame(
+            {
+                "indiv_name": self._name_values[self.codes[index]],
+                "score": self.scores[index],
+            }
+        )
+
+
+class ScoreTable(Mapping):
+    """Gene scores of a signature file, as a gene index and a float array.
+
+    Behaves as a read only mapping of gene id to score, so it can be used
+    wherever the dict returned by read_scores is. Rows which have no gene id
+    or no numeric score are left out and listed in malformed, as tuples of
+    (line number, gene id, value).
+    """
+
+    def __init__(
+        self,
+        gene_ids: pandas.Index,
+        values: numpy.ndarray,
+        malformed: Optional[List[Tuple[int, str, str]]] = None,
+    ) -> None:
+        """Create a ScoreTable from its arrays, see read_csv."""
+        self.gene_ids = gene_ids
+        self.values = values
+        self.malformed = malformed or []
+
+    @classmethod
+    def read_csv(
+        cls: Type["ScoreTable"], path: Union[str, Path], strict: bool = False
+    ) -> "ScoreTable":
+        """Read the first two columns of a csv file of gene id and score.
+
+        Lines starting with # are comments. Files ending in .gz, .bz2 or .xz
+        are decompressed as they are read. Leading spaces are stripped from
+        gene ids. A gene listed twice keeps its first position and its last
+        score.
+
+        When pyarrow is installed, well formed files are parsed by its
+        multithreaded reader. Any other file is parsed by pandas, which finds
+        the malformed rows. Either way the gene ids are Arrow strings when
+        pyarrow is installed, and objects when it is not.
+
+        @param path: Path to read.
+        @param strict: Raise a ValueError if any row is malformed.
+        """
+        parsed = _read_scores_arrow(path)
+        if parsed is None:
+            parsed = _read_scores_pandas(path)
+        index, values, malformed = parsed
+
+        if malformed and strict:
+            raise ValueError(
+                "{} malformed score rows in {}, the first at line {}: {}".format(
+                    len(malformed), path, malformed[0][0], malformed[0][1:]
+                )
+            )
+        if not index.is_unique:
+            last = pandas.Series(values, index=index)
+            last = last[~index.duplicated(keep="last")]
+            index = index.unique()
+            values = last.reindex(index).to_numpy()
+        return cls(index, values, malformed)
+
+    def __getitem__(self, gene_id: str) -> float:
+        """Get the score of a gene."""
+        return self.values[self.gene_ids.get_loc(gene_id)]
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the gene ids in file order."""
+        return iter(self.gene_ids)
+
+    def __len__(self) -> int:
+        """Get the number of genes."""
+        return len(self.gene_ids)
+
+    def to_series(self) -> pandas.Series:
+        """Get the scores as a Series indexed by gene id."""
+        return pandas.Series(self.values, index=self.gene_ids, name="score")
+
+
+ParsedScores = Tuple[pandas.Index, numpy.ndarray, List[Tuple[int, str, str]]]
+
+
+def _unified_schema(schemas: List[object], empty: List[Set[str]]) -> object:
+    """Get one pyarrow schema which every chunk of a download can be cast to.
+
+    A column keeps its type if every chunk where it has values agrees. Int
+    and float columns become float64, and any other mix becomes string.
+    """
+    import pyarrow
+
+    fields = []
+    for field in schemas[0]:
+        types = {
+            schema.field(field.name).type
+            for schema, nulls in zip(schemas, empty)
+            if field.name not in nulls
+        }
+        if not types:
+            column_type = field.type
+        elif len(types) == 1:
+            column_type = types.pop()
+        elif all(
+            pyarrow.types.is_integer(t) or pyarrow.types.is_floating(t) for t in types
+        ):
+            column_type = pyarrow.float64()
+        else:
+            column_type = pyarrow.string()
+        fields.append(pyarrow.field(field.name, column_type))
+    return pyarrow.schema(fields)
+
+
+def _read_scores_arrow(path: Union[str, Path]) -> Optional[ParsedScores]:
+    # None when pyarrow is missing or the file is not perfectly regular.
+    try:
+        import pyarrow
+        from pyarrow import compute, csv
+    except ImportError:
+        return None
+
+    invalid: List[object] = []
+    try:
+        with _open_binary(path) as file:
+            table = csv.read_csv(
+                file,
+                read_options=csv.ReadOptions(
+                    skip_rows=_leading_comment_lines(path),
+                    autogenerate_column_names=True,
+                ),
+                parse_options=csv.ParseOptions(
+                    invalid_row_handler=lambda row: invalid.append(row) or "skip"
+                ),
+                convert_options=csv.ConvertOptions(
+                    include_columns=["f0", "f1"],
+                    column_types={"f0": pyarrow.string(), "f1": pyarrow.float64()},
+                ),
+            )
+    except (pyarrow.ArrowInvalid, KeyError):
+        return None
+
+    genes = compute.utf8_ltrim_whitespace(table.column("f0"))
+    scores = table.column("f1")
+    if invalid or scores.null_count or not len(genes):
+        return None
+    if (
+        compute.any(compute.starts_with(genes, "#")).as_py()
+        or compute.any(compute.equal(genes, "")).as_py()
+    ):
+        return None
+    values = scores.to_numpy()
+    if numpy.isnan(values).any():
+        return None
+    return _gene_index(genes), values, []
+
+
+def _read_scores_pandas(path: Union[str, Path]) -> ParsedScores:
+    try:
+        with _open_text(path) as file:
+            frame = pandas.read_csv(
+                file,
+                header=None,
+                names=["gene_id", "score"],
+                usecols=[0, 1],
+                comment="#",
+                dtype={"gene_id": str},
+                skipinitialspace=True,
+                keep_default_na=False,
+                na_values=[""],
+            )
+    except pandas.errors.EmptyDataError:
+        return _gene_index([]), numpy.empty(0), []
+
+    genes, raw = frame["gene_id"], frame["score"]
+    if raw.dtype.kind in "fiu":
+        values = raw.to_numpy(dtype=numpy.float64)
+    else:
+        values = pandas.to_numeric(raw, errors="coerce").to_numpy(dtype=numpy.float64)
+
+    malformed: List[Tuple[int, str, str]] = []
+    bad = numpy.isnan(values) | genes.isna().to_numpy()
+    if bad.any():
+        rows = numpy.flatnonzero(bad)
+        lines = _data_line_numbers(path, rows)
+        malformed = [
+            (lines[row], _text(genes.iloc[row]), _text(raw.iloc[row])) for row in rows
+        ]
+        genes, values = genes[~bad], values[~bad]
+    return _gene_index(genes), values, malformed
+
+
+def _gene_index(genes: Iterable[str]) -> pandas.Index:
+    # Arrow strings when pyarrow is installed, whichever parser read them.
+    try:
+        import pyarrow
+    except ImportError:
+        return pandas.Index(genes, dtype=object)
+    return pandas.Index(pandas.array(genes, dtype=pandas.ArrowDtype(pyarrow.string())))
+
+
+# The openers of compressed score files, by suffix.
+_OPENERS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+
+
+def _open_binary(path: Union[str, Path]) -> BinaryIO:
+    return _OPENERS.get(Path(path).suffix, open)(path, "rb")
+
+
+def _open_text(path: Union[str, Path]) -> TextIO:
+    return _OPENERS.get(Path(path).suffix, open)(path, "rt")
+
+
+def _leading_comment_lines(path: Union[str, Path]) -> int:
+    count = 0
+    with _open_text(path) as file:
+        for line in file:
+            stripped = line.strip()
+            if stripped and not stripped.startswith("#"):
+                break
+            count += 1
+    return count
+
+
+def _text(value: object) -> str:
+    return "" if pandas.isna(value) else str(value)
+
+
+def _data_line_numbers(path: Union[str, Path], rows: numpy.ndarray) -> Dict[int, int]:
+    # Map data row positions back to file line numbers, skipping comments and
+    # blank lines as read_csv does. Only used when there are malformed rows.
+    wanted = set(rows.tolist())
+    found: Dict[int, int] = {}
+    row = -1
+    with _open_text(path) as file:
+        for number, line in enumerate(file, start=1):
+            stripped = line.strip()
+            if not stripped or stripped.startswith("#"):
+                continue
+            row += 1
+            if row in wanted:
+                found[row] = number
+                if len(found) == len(wanted):
+                    break
+    return found
+
+
+@dataclass
+class SearchCall:
+    """One server call made by search_many.
+
+    Several inputs share a call when they are identical, or when they only
+    differ in their geneIds and were coalesced into one request.
+    """
+
+    drequest: DataRequest
+    """The request sent to the server."""
+    inputs: List[int]
+    """The positions of the inputs answered by this call."""
+    elapsed: float = None
+    """The wall time of the call in seconds."""
+    results: int = None
+    """The number of result items returned by the call."""
+
+
+class SearchManyResult(Sequence):
+    """The results of search_many, aligned with its requests.
+
+    Item i is the list of DataResults for request i. The server calls made
+    are kept in calls, and timing gives the time of the call that answered
+    each request.
+    """
+
+    def __init__(
+        self, results: List[List[DataResult]], calls: List[SearchCall]
+    ) -> None:
+        """Create a SearchManyResult from per-request results and the calls."""
+        self.results = results
+        self.calls = calls
+        self._call_of = [0] * len(results)
+        for index, call in enumerate(calls):
+            for position in call.inputs:
+                self._call_of[position] = index
+
+    def __len__(self) -> int:
+        """Get the number of requests."""
+        return len(self.results)
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[List[DataResult], List[List[DataResult]]]:
+        """Get the results of a request, or a list of them for a slice."""
+        return self.results[index]
+
+    def call(self, index: int) -> SearchCall:
+        """Get the server call which answered a request."""
+        return self.calls[self._call_of[index]]
+
+    @property
+    def timing(self) -> List[float]:
+        """The elapsed seconds of the call behind each request."""
+        return [self.calls[c].elapsed for c in self._call_of]
+
+
+@lru_cache(maxsize=None)
+def _init_field_names(class_name: type) -> frozenset:
+    return frozenset(f.name for f in fields(class_name) if f.init)
+
+
+class StrainExpressions(Mapping):
+    """The strain_expressions of a StrainResult held in one float32 array.
+
+    Row i of matrix holds the expression of every gene for keys[i], an
+    "indiv@Sex" key. Looking up a key returns a view of its row, so it can
+    stand in for the dict of lists built by default, at a quarter of the
+    memory of boxed Python floats.
+    """
+
+    def __init__(
+        self, keys: pandas.Index, matrix: numpy.ndarray, gene_ids: numpy.ndarray
+    ) -> None:
+        """Create StrainExpressions from its arrays, see from_json."""
+        self.keys_index = keys
+        self.matrix = matrix
+        self.gene_ids = gene_ids
+        self._position = {key: i for i, key in enumerate(keys)}
+
+    @classmethod
+    def from_json(
+        cls: Type["StrainExpressions"],
+        expressions: Mapping[str, List[float]],
+        gene_ids: List[str],
+    ) -> "StrainExpressions":
+        """Build the array from the strain_expressions of a response item.
+
+        @param expressions: The "indiv@Sex" to expression list mapping.
+        @param gene_ids: The gene ids of the columns.
+        """
+        matrix = numpy.array(list(expressions.values()), dtype=numpy.float32)
+        return cls(
+            keys=pandas.Index(list(expressions), dtype=object),
+            matrix=matrix.reshape(len(expressions), len(gene_ids or ())),
+            gene_ids=numpy.array(gene_ids or (), dtype=object),
+        )
+
+    def __getitem__(self, key: str) -> numpy.ndarray:
+        """Get the expression row of an "indiv@Sex" key, as a view."""
+        return self.matrix[self._position[key]]
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the "indiv@Sex" keys."""
+        return iter(self.keys_index)
+
+    def __len__(self) -> int:
+        """Get the number of individuals."""
+        return len(self.keys_index)
+
+    def frame(self, key: str) -> DataFrame:
+        """Get the gene_id and expr DataFrame of a key without copying."""
+        return DataFrame({"gene_id": self.gene_ids, "expr": self[key]}, copy=False)
+
+    def to_frame(self) -> DataFrame:
+        """Get a view of every individual by every gene."""
+        return DataFrame(
+            self.matrix, index=self.keys_index, columns=self.gene_ids, copy=False
+        )
+
+
 @dataclass
 class StrainResult:
     """Object which contains results for strain search."""
@@ -144,7 +803,242 @@ class Bulk:
     ingestid: str = None  # noqa: N815
 
 
-class GeneExpressionDatabaseClient:
+class BaseGeneExpressionDatabaseClient:
+    """Common state of the synchronous and asynchronous GEDB clients.
+
+    Holds the server URL and auth cookie, builds the endpoint URLs and turns
+    the JSON and CSV payloads of the server into result objects.
+    """
+
+    def __init__(
+        self,
+        url: str = None,
+        auth_proxy: str = None,
+        meta_cache: Optional[ResponseCache] = None,
+        gene_chunk_size: Optional[int] = None,
+    ) -> None:
+        """Create a client from a URL.
+
+        @param url: The optional URL to which we will connect
+        when making gedb server queries.
+        @param auth_proxy: The optional value of a cookie to
+        connect to https version of the API.
+        @param meta_cache: The optional cache of distinct and get_meta
+        responses, which only change when data is ingested.
+        @param gene_chunk_size: Searches for more geneIds than this are split
+        into several requests, sent concurrently and merged, e.g.
+        DEFAULT_GENE_CHUNK_SIZE. None, the default, disables it. The results
+        of a chunked search come chunk by chunk, so they are only in the
+        order of one unchunked search if the server orders them by gene.
+        """
+        if url is None:
+            url = settings.GEDB
+        self.url = url
+        self.auth_proxy = auth_proxy
+        self.meta_cache = meta_cache
+        self.gene_chunk_size = gene_chunk_size
+
+    def invalidate_metadata(self) -> None:
+        """Drop every cached distinct and get_meta response."""
+        if self.meta_cache is not None:
+            self.meta_cache.invalidate()
+
+    def _fresh_metadata(self, url: str) -> Optional[CachedResponse]:
+        if self.meta_cache is None:
+            return None
+        entry = self.meta_cache.get(url)
+        if entry is not None and self.meta_cache.is_fresh(entry):
+            return entry
+        return None
+
+    def _revalidation_headers(self, url: str) -> dict:
+        if self.meta_cache is None or not self.meta_cache.revalidate:
+            return {}
+        entry = self.meta_cache.get(url)
+        if entry is None or entry.etag is None:
+            return {}
+        return {"If-None-Match": entry.etag}
+
+    def _store_metadata(
+        self, url: str, status: int, etag: Optional[str], body: object
+    ) -> object:
+        """Cache a metadata response, returning its body.
+
+        A 304 refreshes the cached entry. If that entry was invalidated while
+        the request was in flight, there is no body to return, so
+        UNCACHED_304 is returned and the caller requests it again, without
+        If-None-Match.
+        """
+        if self.meta_cache is None:
+            return body
+        if status == 304:
+            entry = self.meta_cache.refresh(url)
+            if entry is None:
+                return UNCACHED_304
+            return entry.body
+        return self.meta_cache.put(url, body, etag).body
+
+    def _class_from_args(self, class_name: object, arg_dict: dict) -> object:
+        field_set = _init_field_names(class_name)
+        filtered = {k: v for k, v in arg_dict.items() if k in field_set}
+        return class_name(**filtered)
+
+    def _data_results(
+        self, items: List[dict], columnar: bool
+    ) -> Union[List[DataResult], ColumnarDataResult]:
+        if columnar:
+            return ColumnarDataResult.from_json(items)
+        return [self._class_from_args(DataResult, item) for item in items]
+
+    def _random_result(
+        self, text: str, size: int, columnar: bool
+    ) -> Union[List[DataFrame], RandomResult]:
+        result = RandomResult.from_text(text, size)
+        return result if columnar else result.frames()
+
+    def _coalesce_requests(self, drequests: List[DataRequest]) -> List[SearchCall]:
+        # Requests equal in all but their geneIds are sent once, with the
+        # union of the genes. A request without geneIds, or with an empty
+        # list, asks for every gene, so it is never merged with one naming
+        # genes, only with identical requests.
+        groups: Dict[Hashable, SearchCall] = {}
+        genes: Dict[Hashable, Dict[str, None]] = {}
+        for position, drequest in enumerate(drequests):
+            key = (
+                drequest.tissue,
+                _as_tuple(drequest.strains),
+                getattr(drequest.sourceType, "name", drequest.sourceType),
+                _as_tuple(drequest.sexes),
+                _all_genes(drequest),
+            )
+            if key not in groups:
+                groups[key] = SearchCall(
+                    drequest=DataRequest(**drequest.__dict__), inputs=[]
+                )
+                genes[key] = {}
+            groups[key].inputs.append(position)
+            genes[key].update(dict.fromkeys(drequest.geneIds or ()))
+
+        for key, call in groups.items():
+            if not _all_genes(call.drequest):
+                call.drequest.geneIds = list(genes[key])
+        return list(groups.values())
+
+    def _scatter_results(
+        self,
+        drequests: List[DataRequest],
+        calls: List[SearchCall],
+        answers: List[List[DataResult]],
+    ) -> SearchManyResult:
+        results: List[List[DataResult]] = [None] * len(drequests)
+        for call, answer in zip(calls, answers):
+            call.results = len(answer)
+            for position in call.inputs:
+                if _all_genes(drequests[position]) or len(call.inputs) == 1:
+                    results[position] = list(answer)
+                    continue
+                # A result naming no genes cannot be told apart, so every
+                # request of the call gets it.
+                wanted = set(drequests[position].geneIds)
+                results[position] = [
+                    r for r in answer if not r.geneIds or wanted.intersection(r.geneIds)
+                ]
+        return SearchManyResult(results, calls)
+
+    def _gene_chunks(self, drequest: DataRequest) -> List[DataRequest]:
+        gene_ids = drequest.geneIds
+        size = self.gene_chunk_size
+        if not size or gene_ids is None or len(gene_ids) <= size:
+            return [drequest]
+        return [
+            DataRequest(**{**drequest.__dict__, "geneIds": gene_ids[i : i + size]})
+            for i in range(0, len(gene_ids), size)
+        ]
+
+    @staticmethod
+    def _merge_search_items(parts: List[List[dict]]) -> List[dict]:
+        return [item for part in parts for item in part]
+
+    @staticmethod
+    def _merge_strain_items(parts: List[List[dict]]) -> List[dict]:
+        # Each chunk returns every strain for its own genes. Join them per
+        # strain, keeping the gene order of the chunks. An individual missing
+        # from a chunk gets NaN for that chunk's genes.
+        if len(parts) == 1:
+            return parts[0]
+        merged: Dict[str, dict] = {}
+        for part in parts:
+            for item in part:
+                strain = merged.setdefault(
+                    item.get("strain"),
+                    {
+                        "strain": item.get("strain"),
+                        "gene_ids": [],
+                        "gene_names": [],
+                        "strain_expressions": {},
+                    },
+                )
+                before = len(strain["gene_ids"])
+                strain["gene_ids"].extend(item.get("gene_ids") or ())
+                strain["gene_names"].extend(item.get("gene_names") or ())
+                after = len(strain["gene_ids"])
+                expressions = strain["strain_expressions"]
+                for name, values in (item.get("strain_expressions") or {}).items():
+                    expressions.setdefault(name, [numpy.nan] * before).extend(values)
+                for values in expressions.values():
+                    values.extend([numpy.nan] * (after - len(values)))
+        return list(merged.values())
+
+    def _strain_results(self, items: List[dict], columnar: bool) -> List[StrainResult]:
+        results = [self._class_from_args(StrainResult, item) for item in items]
+        if columnar:
+            for result in results:
+                result.strain_expressions = StrainExpressions.from_json(
+                    result.strain_expressions or {}, result.gene_ids
+                )
+        return results
+
+    def _split_list(self, lst: List, chunk_size: int) -> List[List]:
+        return list(zip(*[iter(lst)] * chunk_size))
+
+    def _frame(self, randoms: List[str]) -> DataFrame:
+        # Make them into a frame.
+        csv_content = "\n".join(randoms) + "\n"
+        csv_content = "{}{}".format("indiv_name,score\n", csv_content)
+        ret: DataFrame = pandas.read_csv(StringIO(csv_content))
+        return ret
+
+    def _get_search_url(self) -> str:
+        return "{}{}".format(self.url, "/gene/expression/search")
+
+    def _get_search_expression_url(self) -> str:
+        return "{}{}".format(self.url, "/gene/expression/search-expression")
+
+    def _get_distinct_url(self) -> str:
+        return "{}{}".format(self.url, "/meta/distinct")
+
+    def _get_meta_url(self) -> str:
+        return "{}{}".format(self.url, "/meta/where/tissue/is")
+
+    def _get_bulk_url(self) -> str:
+        return "{}{}".format(self.url, "/bulk/all/where/ingest/is")
+
+    def _get_bulk_expression_url(self, ingest_id: str) -> str:
+        return "{}/{}".format(self._get_bulk_url(), ingest_id)
+
+    def _get_random_url(self) -> str:
+        return "{}{}".format(self.url, "/bulk/random/where/ingest/is")
+
+    def _get_random_spearmanrho_url(self) -> str:
+        return "{}{}".format(self.url, "/bulk/random/spearmanrho/")
+
+    def _cookies(self) -> Optional[dict]:
+        if self.auth_proxy is None:
+            return None
+        return {"_oauth2_proxy": self.auth_proxy}
+
+
+class GeneExpressionDatabaseClient(BaseGeneExpressionDatabaseClient):
     """Gene Expression Database Client.
 
     Client object to which you make DataRequests and from which
@@ -153,37 +1047,159 @@ class GeneExpressionDatabaseClient:
     the examples of supported searches are listed on the swagger page of the server.
     e.g. at https://geneweaver-dev.jax.org/gedb/ under for instance
     the 'gene/expression/search' endpoint.
+
+    The client keeps one pooled, keep-alive HTTP session for all of its calls.
+    Use it as a context manager, or call close, to release the connections:
+
+        with GeneExpressionDatabaseClient() as client:
+            client.search(drequest)
     """
 
-    def __init__(self, url: str = None, auth_proxy: str = None) -> None:
+    def __init__(
+        self,
+        url: str = None,
+        auth_proxy: str = None,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        retries: int = DEFAULT_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        bulk_cache: Optional[FrameCache] = None,
+        meta_cache: Optional[ResponseCache] = None,
+        gene_chunk_size: Optional[int] = None,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        max_backoff: float = DEFAULT_MAX_BACKOFF,
+        breaker: Optional[CircuitBreaker] = None,
+        metrics: Optional[MetricsHook] = None,
+    ) -> None:
         """Create a GeneExpressionDatabaseClient from a URL.
 
         @param url: The optional URL to which we will connect
         when making gedb server queries.
         @param auth_proxy: The optional value of a cookie to
         connect to https version of the API.
+        @param pool_size: The number of connections kept alive to the server.
+        @param retries: The number of retries of each request. The searches
+        only read data, so they are retried as well. A read timeout of
+        random_spearmanrho is not retried.
+        @param backoff_factor: The exponential backoff factor between retries.
+        Search retries wait a random delay of up to backoff_factor * 2^n.
+        @param bulk_cache: The optional on-disk cache for read_expression_data.
+        Ingests never change once loaded, so repeat reads can come from disk.
+        @param meta_cache: The optional cache of distinct and get_meta
+        responses. With an on-disk ResponseCache, a new process makes no
+        metadata requests until the entries expire.
+        @param gene_chunk_size: Searches for more geneIds than this are split
+        into several requests, sent concurrently over the pool and merged,
+        e.g. DEFAULT_GENE_CHUNK_SIZE. None, the default, disables it. The
+        results of a chunked search come chunk by chunk, so they are only in
+        the order of one unchunked search if the server orders them by gene.
+        @param connect_timeout: The seconds to wait for a connection.
+        @param read_timeout: The seconds to wait for the server to answer.
+        @param max_backoff: The longest wait between two search attempts.
+        @param breaker: The optional CircuitBreaker which fails calls fast
+        while the service is down. It may be shared between clients.
+        @param metrics: The optional hook told of every retry and give up,
+        see core.resilience.
         """
-        if url is None:
-            url = settings.GEDB
-        self.url = url
-        self.auth_proxy = auth_proxy
+        super().__init__(url, auth_proxy, meta_cache, gene_chunk_size)
+        self.pool_size = pool_size
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.bulk_cache = bulk_cache
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retry_policy = RetryPolicy(
+            retries=retries,
+            backoff_factor=backoff_factor,
+            max_backoff=max_backoff,
+            breaker=breaker,
+            metrics=metrics,
+        )
+        self._session = None
+        self._session_lock = threading.Lock()
 
-    def search(self, drequest: DataRequest) -> List[DataResult]:
+    @property
+    def session(self) -> requests.Session:
+        """The pooled session shared by every call of this client.
+
+        The session is created on first use, and again after close. Worker
+        threads of search_many may be first to use it, so it is created under
+        a lock, once.
+        """
+        with self._session_lock:
+            if self._session is None:
+                # Every call is retried by retry_policy, so the session must
+                # not retry as well, or the attempts would multiply.
+                self._session = create_session(self.pool_size, 0, service="gedb")
+            return self._session
+
+    def close(self) -> None:
+        """Close the pooled session and its open connections."""
+        with self._session_lock:
+            session, self._session = self._session, None
+        if session is not None:
+            session.close()
+
+    def __enter__(self) -> "GeneExpressionDatabaseClient":
+        """Enter a context which closes the client on exit."""
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Close the client."""
+        self.close()
+
+    def search(
+        self, drequest: DataRequest, columnar: bool = False
+    ) -> Union[List[DataResult], ColumnarDataResult]:
         """Do a gene expression search on the Gene Expression Database.
 
         using fields available in the DataRequest object.
         @param drequest: The request which we want to make to the client
         to get results.
+        @param columnar: Return a ColumnarDataResult rather than a list of
+        DataResults, which is much faster to build for large searches.
         """
         url = self._get_search_url()
 
-        response = self._post(url, drequest.__dict__)
+        items = self._merge_search_items(self._post_chunked(url, drequest))
 
         # TODO Not sure if need to deal with typing here.
         # Need to write test to check.
-        return [self._class_from_args(DataResult, item) for item in response.json()]
-
-    def search_expression(self, drequest: DataRequest) -> List[StrainResult]:
+        return self._data_results(items, columnar)
+
+    def search_many(
+        self, drequests: Iterable[DataRequest], concurrency: Optional[int] = None
+    ) -> SearchManyResult:
+        """Do many searches with as few server calls as possible.
+
+        Identical requests are sent once. Requests which differ only in their
+        geneIds, e.g. the same genes split over several jobs, are coalesced
+        into one request for all of their genes, and its results are split
+        back by gene id. The remaining calls, e.g. one per tissue, are made
+        concurrently over the pooled session.
+
+        @param drequests: The requests to search.
+        @param concurrency: The maximum number of calls in flight, defaults to
+        the pool size of the client.
+        @return: The results of each request, in the order of the requests,
+        with the calls made and the time taken by each.
+        """
+        drequests = list(drequests)
+        calls = self._coalesce_requests(drequests)
+
+        def timed_search(call: SearchCall) -> List[DataResult]:
+            b4 = time.perf_counter()
+            answer = self.search(call.drequest)
+            call.elapsed = time.perf_counter() - b4
+            return answer
+
+        with ThreadPoolExecutor(max_workers=concurrency or self.pool_size) as pool:
+            answers = list(pool.map(timed_search, calls))
+        return self._scatter_results(drequests, calls, answers)
+
+    def search_expression(
+        self, drequest: DataRequest, columnar: bool = False
+    ) -> List[StrainResult]:
         """Do a gene expression search on the Gene Expression Database.
 
         using fields available in the DataRequest object.
@@ -193,14 +1209,16 @@ class GeneExpressionDatabaseClient:
 
         @param drequest: The request which we want to make to the client
         to get results.
+        @param columnar: Hold each strain_expressions as StrainExpressions,
+        one float32 array, instead of a dict of lists of floats.
         """
         url = self._get_search_expression_url()
 
-        response = self._post(url, drequest.__dict__)
+        items = self._merge_strain_items(self._post_chunked(url, drequest))
 
         # TODO Not sure if need to deal with typing here.
         # Need to write test to check.
-        return [self._class_from_args(StrainResult, item) for item in response.json()]
+        return self._strain_results(items, columnar)
 
     def distinct(self, field: str) -> Set[str]:
         """Get list of unique fields from metadata.
@@ -213,34 +1231,135 @@ class GeneExpressionDatabaseClient:
         """
         url = "{}/{}".format(self._get_distinct_url(), field)
 
-        response = self._get(url)
-
-        return response.json()
+        return self._get_metadata(url)
 
     def get_meta(self, tissue: str) -> List[Metadata]:
         """Get metadata from database."""
         url = "{}/{}".format(self._get_meta_url(), tissue)
-        response = self._get(url)
-        return [self._class_from_args(Metadata, item) for item in response.json()]
+        items = self._get_metadata(url)
+        return [self._class_from_args(Metadata, item) for item in items]
 
-    def _class_from_args(self, class_name: object, arg_dict: dict) -> object:
-        field_set = {f.name for f in fields(class_name) if f.init}
-        filtered = {k: v for k, v in arg_dict.items() if k in field_set}
-        return class_name(**filtered)
-
-    def read_expression_data(self, ingest_id: str) -> DataFrame:
+    def read_expression_data(
+        self, ingest_id: str, model_version: Optional[str] = None
+    ) -> DataFrame:
         """Get expression data from database.
 
-        Reads full data for a given ingest_id, inefficient and slow.
-        Do not use, too slow, use search and
+        Reads full data for a given ingest_id into memory, which is slow for
+        large ingests. Prefer search, or iter_expression_data and
+        download_expression_data which hold only one chunk at a time.
+
+        When the client has a bulk_cache, the data is stored on first read and
+        later reads of the same ingest_id and model_version are memory-mapped
+        from disk without contacting the server. Every read then returns the
+        frame as FrameCache.get loads it, with categorical text columns and
+        read-only numeric columns, whether or not it was cached before.
+
+        @param ingest_id: from which we ingested data
+        @param model_version: the modelversion of the ingest Metadata, part of
+        the cache key.
         """
-        url = "{}/{}".format(self._get_bulk_url(), ingest_id)
+        key = (ingest_id, model_version)
+        if self.bulk_cache is not None:
+            cached = self.bulk_cache.get(key)
+            if cached is not None:
+                return cached
+
+        with self._get_stream(self._get_bulk_expression_url(ingest_id)) as download:
+            frame: DataFrame = pandas.read_csv(download.raw)
+
+        if self.bulk_cache is not None:
+            self.bulk_cache.put(key, frame)
+            cached = self.bulk_cache.get(key)
+            if cached is not None:
+                return cached
+        return frame
+
+    def iter_expression_data(
+        self, ingest_id: str, chunksize: int = DEFAULT_CHUNKSIZE
+    ) -> Iterator[DataFrame]:
+        """Stream expression data from database in chunks.
+
+        The response body is parsed as it arrives, so peak memory is bounded
+        by the chunk size rather than the size of the ingest. Stopping the
+        iteration early closes the connection.
 
-        with requests.Session() as s:
-            download = s.get(url)
-            decoded_content = download.content.decode("utf-8")
-            frame: DataFrame = pandas.read_csv(io.StringIO(decoded_content))
-            return frame
+        @param ingest_id: from which we ingested data
+        @param chunksize: the number of rows in each DataFrame
+        """
+        with self._get_stream(self._get_bulk_expression_url(ingest_id)) as download:
+            with pandas.read_csv(download.raw, chunksize=chunksize) as reader:
+                yield from reader
+
+    def download_expression_data(
+        self,
+        ingest_id: str,
+        path: Union[str, Path],
+        file_format: str = "parquet",
+        chunksize: int = DEFAULT_CHUNKSIZE,
+    ) -> Path:
+        """Stream expression data from database into a local file.
+
+        Each chunk is parsed on its own, so a column can be parsed as int in
+        one chunk and as float, or text, in another. The chunks are kept in
+        a temporary directory beside the file until the types of every
+        column are known, then written with one schema: int and float
+        columns become float, any other mix becomes text, and chunks where a
+        column is empty do not decide its type. Requires pyarrow.
+
+        @param ingest_id: from which we ingested data
+        @param path: the file to write, removed again if the download fails
+        @param file_format: "parquet" or "feather"
+        @param chunksize: the number of rows parsed and written at a time
+        """
+        try:
+            import pyarrow
+            from pyarrow import ipc, parquet
+        except ImportError as err:
+            raise ImportError(
+                "Writing expression data to a file requires pyarrow, "
+                "install it with `pip install pyarrow`."
+            ) from err
+
+        if file_format == "parquet":
+            open_writer = parquet.ParquetWriter
+        elif file_format == "feather":
+            open_writer = ipc.new_file
+        else:
+            raise ValueError("Unknown file format {}".format(file_format))
+
+        path = Path(path)
+        writer = None
+        try:
+            with tempfile.TemporaryDirectory(dir=path.parent) as parts:
+                schemas: List[object] = []
+                empty: List[Set[str]] = []
+                for chunk in self.iter_expression_data(ingest_id, chunksize):
+                    table = pyarrow.Table.from_pandas(chunk, preserve_index=False)
+                    part = Path(parts, str(len(schemas)))
+                    with ipc.new_file(str(part), table.schema) as part_writer:
+                        part_writer.write_table(table)
+                    schemas.append(table.schema)
+                    empty.append(set(chunk.columns[chunk.isna().all().to_numpy()]))
+                if not schemas:
+                    return path
+
+                schema = _unified_schema(schemas, empty)
+                writer = open_writer(str(path), schema)
+                for index in range(len(schemas)):
+                    with pyarrow.memory_map(str(Path(parts, str(index)))) as source:
+                        writer.write_table(
+                            ipc.open_file(source).read_all().cast(schema)
+                        )
+        except BaseException:
+            if writer is not None:
+                writer.close()
+                writer = None
+            path.unlink(missing_ok=True)
+            raise
+        finally:
+            if writer is not None:
+                writer.close()
+        return path
 
     def sort_by_field(
         self, prop: str, expressions: List[DataResult]
@@ -265,36 +1384,42 @@ class GeneExpressionDatabaseClient:
     def frame(
         self, data: Mapping[str, StrainResult], strain: str, indiv_name: str, sex: Sex
     ) -> DataFrame:
-        """Convert a dictionary of gene expression to frame."""
+        """Convert a dictionary of gene expression to frame.
+
+        For results of a columnar search_expression, the frame is a view
+        over their StrainExpressions and nothing is copied.
+        """
         res: StrainResult = data[strain]
+        key = "{}@{}".format(indiv_name, sex.name)
+        if isinstance(res.strain_expressions, StrainExpressions):
+            return res.strain_expressions.frame(key)
 
         ids: List[str] = res.gene_ids
-        exprs: List[float] = res.strain_expressions[
-            "{}@{}".format(indiv_name, sex.name)
-        ]
+        exprs: List[float] = res.strain_expressions[key]
         ret: DataFrame = pandas.DataFrame(
             {"gene_id": numpy.array(ids), "expr": numpy.array(exprs)}
         )
         return ret
 
-    def random(self, ingest_id: str, size: int, count: int = 1) -> List[DataFrame]:
+    def random(
+        self, ingest_id: str, size: int, count: int = 1, columnar: bool = False
+    ) -> Union[List[DataFrame], RandomResult]:
         """Get a random gene expression frame.
 
         @param ingest_id: from which we ingested data
         @param size: size of the geneset
+        @param count: number of random genesets
+        @param columnar: return a RandomResult holding every geneset in one
+        (count, size) array, instead of a list of DataFrames.
         """
         url = "{}/{}?gsize={}&random_size={}".format(
             self._get_random_url(), ingest_id, size, count
         )
         response = self._get(url)
 
-        csv_data: List[str] = list(response.text.split("\n"))
-
         # We return them as one long array which should be faster on the BQ side.
-        # Then we split them into sections of size count
-        ret: List[List[str]] = self._split_list(csv_data, size)
-
-        return [self._frame(r) for r in ret]
+        # It is parsed once, then split into sections of size.
+        return self._random_result(response.text, size, columnar)
 
     def random_spearmanrho(
         self, ingest_id: str, scores: List[float], r_size: int = 1, timeout: int = 3600
@@ -308,86 +1433,120 @@ class GeneExpressionDatabaseClient:
         nvr: NullVarianceRequest = NullVarianceRequest(
             id=ingest_id, scores=list(scores), rSz=r_size
         )
-        response = self._post(url, nvr.__dict__, timeout=timeout)
+        # A read timeout here means the server spent the whole, long, timeout
+        # computing, so only connection failures are worth another attempt.
+        response = self._post(
+            url, nvr.__dict__, timeout=timeout, retry_read_timeout=False
+        )
 
         rhos: List[float] = response.json()
 
         return rhos
 
-    def _split_list(self, lst: List, chunk_size: int) -> List[List]:
-        return list(zip(*[iter(lst)] * chunk_size))
-
-    def _frame(self, randoms: List[str]) -> DataFrame:
-        # Make them into a frame.
-        csv_content = "\n".join(randoms) + "\n"
-        csv_content = "{}{}".format("indiv_name,score\n", csv_content)
-        ret: DataFrame = pandas.read_csv(StringIO(csv_content))
-        return ret
-
-    def _get_search_url(self) -> str:
-        return "{}{}".format(self.url, "/gene/expression/search")
-
-    def _get_search_expression_url(self) -> str:
-        return "{}{}".format(self.url, "/gene/expression/search-expression")
-
-    def _get_distinct_url(self) -> str:
-        return "{}{}".format(self.url, "/meta/distinct")
-
-    def _get_meta_url(self) -> str:
-        return "{}{}".format(self.url, "/meta/where/tissue/is")
-
-    def _get_bulk_url(self) -> str:
-        return "{}{}".format(self.url, "/bulk/all/where/ingest/is")
-
-    def _get_random_url(self) -> str:
-        return "{}{}".format(self.url, "/bulk/random/where/ingest/is")
-
-    def _get_random_spearmanrho_url(self) -> str:
-        return "{}{}".format(self.url, "/bulk/random/spearmanrho/")
+    def _post(
+        self,
+        url: str,
+        postable_object: dict,
+        timeout: Optional[float] = None,
+        retry_read_timeout: bool = True,
+    ) -> Response:
+        # Every POST of this client is a read, so it is safe to send again.
+        response = self.retry_policy.call(
+            lambda: self.session.post(
+                url,
+                None,
+                postable_object,
+                cookies=self._cookies(),
+                timeout=self._timeout(timeout),
+            ),
+            url,
+            retry_read_timeout=retry_read_timeout,
+        )
 
-    def _post(self, url: str, postable_object: dict, timeout: int = 3600) -> Response:
+        if not response.ok:
+            response.raise_for_status()
 
-        cookies = None
-        if self.auth_proxy is not None:
-            cookies = {"_oauth2_proxy": self.auth_proxy}
+        return response
 
-        with requests.Session() as s:
-            response = s.post(
-                url, None, postable_object, cookies=cookies, timeout=timeout
+    def _post_chunked(self, url: str, drequest: DataRequest) -> List[List[dict]]:
+        chunks = self._gene_chunks(drequest)
+        if len(chunks) == 1:
+            return [self._post(url, drequest.__dict__).json()]
+        with ThreadPoolExecutor(max_workers=min(len(chunks), self.pool_size)) as pool:
+            return list(
+                pool.map(lambda chunk: self._post(url, chunk.__dict__).json(), chunks)
             )
 
-            if not response.ok:
-                response.raise_for_status()
-
-            return response
+    def _get_metadata(self, url: str) -> object:
+        entry = self._fresh_metadata(url)
+        if entry is not None:
+            return entry.body
+
+        headers = self._revalidation_headers(url)
+        while True:
+            response = self._get(url, headers=headers)
+            body = None if response.status_code == 304 else response.json()
+            result = self._store_metadata(
+                url, response.status_code, response.headers.get("ETag"), body
+            )
+            if result is not UNCACHED_304 or not headers:
+                return result
+            headers = {}
+
+    def _timeout(self, read_timeout: Optional[float] = None) -> tuple:
+        return (self.connect_timeout, read_timeout or self.read_timeout)
+
+    def _get(self, url: str, headers: Optional[dict] = None) -> Response:
+        response = self.retry_policy.call(
+            lambda: self.session.get(
+                url, cookies=self._cookies(), headers=headers, timeout=self._timeout()
+            ),
+            url,
+        )
 
-    def _get(self, url: str) -> Response:
+        if not response.ok:
+            response.raise_for_status()
 
-        cookies = None
-        if self.auth_proxy is not None:
-            cookies = {"_oauth2_proxy": self.auth_proxy}
+        return response
 
-        with requests.Session() as s:
-            response = s.get(url, cookies=cookies)
+    def _get_stream(self, url: str) -> Response:
+        response = self.retry_policy.call(
+            lambda: self.session.get(
+                url, cookies=self._cookies(), stream=True, timeout=self._timeout()
+            ),
+            url,
+        )
 
-            if not response.ok:
-                response.raise_for_status()
+        if not response.ok:
+            response.close()
+            response.raise_for_status()
 
-            return response
+        # Let urllib3 undo any gzip transfer encoding as the body is read.
+        response.raw.decode_content = True
+        return response
 
-    def read_scores(self, path: str) -> Mapping[str, str]:
+    def read_scores(
+        self, path: str, columnar: bool = False
+    ) -> Union[Mapping[str, str], ScoreTable]:
         """Will read first two columns of csv file.
 
         into a dictionary of gene: log2fc for use in concordance calc.
         @param path: Path to read.
+        @param columnar: Return a ScoreTable of float scores, which also
+        reads gzip files and reports malformed rows. The file is parsed
+        by pyarrow when it is installed, and by pandas when it is not or
+        when a row is malformed, see ScoreTable.read_csv.
         """
+        if columnar:
+            return ScoreTable.read_csv(path)
+
         # We keep the keys in order here as
         # it is easier to use the debugger and
         # check the dict
         gene_values = OrderedDict()
         with open(path, "r") as file:
             # reading each line from original text file
-            for line in file.readlines():
+            for line in file:
                 line = line.strip()
                 if not (line.startswith("#")):
                     sa = line.split(",")
@@ -0,0 +1,307 @@
+"""Asynchronous gene expression service client.
+
+The same operations as the GeneExpressionDatabaseClient, built on asyncio and
+aiohttp, so that many BigQuery backed searches can be in flight at once. For
+example, to search every tissue concurrently:
+
+    async with AsyncGeneExpressionDatabaseClient() as client:
+        results = await client.fan_out(client.search, drequests, concurrency=4)
+"""
+
+import asyncio
+import time
+from typing import (
+    Awaitable,
+    Callable,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    TypeVar,
+    Union,
+)
+
+import aiohttp
+from geneweaver.client.core import decode, instrumentation
+from geneweaver.client.core.cache import ResponseCache
+from geneweaver.client.core.http import DEFAULT_POOL_SIZE
+from geneweaver.client.gedb import (
+    UNCACHED_304,
+    BaseGeneExpressionDatabaseClient,
+    ColumnarDataResult,
+    DataRequest,
+    DataResult,
+    Metadata,
+    NullVarianceRequest,
+    RandomResult,
+    SearchCall,
+    SearchManyResult,
+    StrainResult,
+)
+from pandas import DataFrame
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+DEFAULT_CONCURRENCY = 8
+
+
+async def gather_bounded(
+    func: Callable[[T], Awaitable[R]], items: Iterable[T], concurrency: int
+) -> List[R]:
+    """Await func over every item, with at most concurrency calls in flight.
+
+    @param func: The coroutine function to call with each item.
+    @param items: The items to call it with.
+    @param concurrency: The maximum number of calls awaited at once.
+    @return: The results, in the same order as the items.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(item: T) -> R:
+        async with semaphore:
+            return await func(item)
+
+    return list(await asyncio.gather(*[bounded(item) for item in items]))
+
+
+class AsyncGeneExpressionDatabaseClient(BaseGeneExpressionDatabaseClient):
+    """Asynchronous Gene Expression Database Client.
+
+    Mirrors the search methods of GeneExpressionDatabaseClient. All calls
+    share one pooled aiohttp session which is created on first use, and
+    must be closed with close or by using the client as an async context
+    manager. Failed calls raise aiohttp.ClientResponseError.
+    """
+
+    def __init__(
+        self,
+        url: str = None,
+        auth_proxy: str = None,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        meta_cache: Optional[ResponseCache] = None,
+        gene_chunk_size: Optional[int] = None,
+    ) -> None:
+        """Create an AsyncGeneExpressionDatabaseClient from a URL.
+
+        @param url: The optional URL to which we will connect
+        when making gedb server queries.
+        @param auth_proxy: The optional value of a cookie to
+        connect to https version of the API.
+        @param pool_size: The number of connections kept alive to the server.
+        @param concurrency: The default number of requests run at once by fan_out.
+        @param meta_cache: The optional cache of distinct and get_meta responses.
+        @param gene_chunk_size: Searches for more geneIds than this are split
+        into several requests, sent concurrently and merged, e.g.
+        DEFAULT_GENE_CHUNK_SIZE. None, the default, disables it. The results
+        of a chunked search come chunk by chunk, so they are only in the
+        order of one unchunked search if the server orders them by gene.
+        """
+        super().__init__(url, auth_proxy, meta_cache, gene_chunk_size)
+        self.pool_size = pool_size
+        self.concurrency = concurrency
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """The pooled session shared by every call of this client.
+
+        The session is created on first use, and again after close. It must
+        be first used from within a running event loop.
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size)
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """Close the pooled session and its open connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self) -> "AsyncGeneExpressionDatabaseClient":
+        """Enter a context which closes the client on exit."""
+        return self
+
+    async def __aexit__(self, *args: object) -> None:
+        """Close the client."""
+        await self.close()
+
+    async def search(
+        self, drequest: DataRequest, columnar: bool = False
+    ) -> Union[List[DataResult], ColumnarDataResult]:
+        """Do a gene expression search on the Gene Expression Database.
+
+        @param drequest: The request which we want to make to the client
+        to get results.
+        @param columnar: Return a ColumnarDataResult rather than DataResults.
+        """
+        parts = await self._post_chunked(self._get_search_url(), drequest)
+        return self._data_results(self._merge_search_items(parts), columnar)
+
+    async def search_many(
+        self, drequests: Iterable[DataRequest], concurrency: Optional[int] = None
+    ) -> SearchManyResult:
+        """Do many searches with as few server calls as possible.
+
+        Identical requests are sent once, and requests which differ only in
+        their geneIds are coalesced, as in GeneExpressionDatabaseClient.
+
+        @param drequests: The requests to search.
+        @param concurrency: The maximum number of calls in flight, defaults
+        to the concurrency of the client.
+        @return: The results of each request, in the order of the requests,
+        with the calls made and the time taken by each.
+        """
+        drequests = list(drequests)
+        calls = self._coalesce_requests(drequests)
+
+        async def timed_search(call: SearchCall) -> List[DataResult]:
+            b4 = time.perf_counter()
+            answer = await self.search(call.drequest)
+            call.elapsed = time.perf_counter() - b4
+            return answer
+
+        answers = await gather_bounded(
+            timed_search, calls, concurrency or self.concurrency
+        )
+        return self._scatter_results(drequests, calls, answers)
+
+    async def search_expression(
+        self, drequest: DataRequest, columnar: bool = False
+    ) -> List[StrainResult]:
+        """Do a gene expression search ordered by strain, individual and sex.
+
+        @param drequest: The request which we want to make to the client
+        to get results.
+        @param columnar: Hold each strain_expressions as StrainExpressions.
+        """
+        parts = await self._post_chunked(self._get_search_expression_url(), drequest)
+        return self._strain_results(self._merge_strain_items(parts), columnar)
+
+    async def distinct(self, field: str) -> Set[str]:
+        """Get list of unique fields from metadata.
+
+        @param field: For instance to get the
+         strains return field = "tissue"
+        """
+        return await self._get_metadata("{}/{}".format(self._get_distinct_url(), field))
+
+    async def get_meta(self, tissue: str) -> List[Metadata]:
+        """Get metadata from database."""
+        items = await self._get_metadata("{}/{}".format(self._get_meta_url(), tissue))
+        return [self._class_from_args(Metadata, item) for item in items]
+
+    async def random(
+        self, ingest_id: str, size: int, count: int = 1, columnar: bool = False
+    ) -> Union[List[DataFrame], RandomResult]:
+        """Get a random gene expression frame.
+
+        @param ingest_id: from which we ingested data
+        @param size: size of the geneset
+        @param count: number of random genesets
+        @param columnar: return a RandomResult holding every geneset in one
+        (count, size) array, instead of a list of DataFrames.
+        """
+        url = "{}/{}?gsize={}&random_size={}".format(
+            self._get_random_url(), ingest_id, size, count
+        )
+        text = await self._get(url, as_json=False)
+        return self._random_result(text, size, columnar)
+
+    async def random_spearmanrho(
+        self, ingest_id: str, scores: List[float], r_size: int = 1, timeout: int = 3600
+    ) -> List[float]:
+        """Get a random gene expression frame and process random rhos.
+
+        @param ingest_id: from which we ingested data
+        @param scores: the scores of the geneset
+        @param r_size: the number of random rhos
+        """
+        nvr = NullVarianceRequest(id=ingest_id, scores=list(scores), rSz=r_size)
+        return await self._post(
+            self._get_random_spearmanrho_url(), nvr.__dict__, timeout=timeout
+        )
+
+    async def fan_out(
+        self,
+        method: Callable[[DataRequest], Awaitable[R]],
+        drequests: Iterable[DataRequest],
+        concurrency: Optional[int] = None,
+    ) -> List[R]:
+        """Run one search method over many requests concurrently.
+
+        @param method: The bound search method, e.g. client.search_expression.
+        @param drequests: The requests, for instance one per tissue.
+        @param concurrency: The maximum number of requests in flight, defaults
+        to the concurrency of the client.
+        @return: The results of each request, in the order of the requests.
+        """
+        return await gather_bounded(method, drequests, concurrency or self.concurrency)
+
+    async def _post(
+        self, url: str, postable_object: dict, timeout: int = 3600
+    ) -> object:
+        with instrumentation.record("gedb", "POST", url) as event:
+            async with self.session.post(
+                url,
+                json=postable_object,
+                cookies=self._cookies(),
+                timeout=aiohttp.ClientTimeout(total=timeout),
+            ) as response:
+                return await _read(response, event)
+
+    async def _post_chunked(self, url: str, drequest: DataRequest) -> List[List[dict]]:
+        async def post(chunk: DataRequest) -> List[dict]:
+            return await self._post(url, chunk.__dict__)
+
+        return await gather_bounded(post, self._gene_chunks(drequest), self.concurrency)
+
+    async def _get_metadata(self, url: str) -> object:
+        entry = self._fresh_metadata(url)
+        if entry is not None:
+            return entry.body
+
+        headers = self._revalidation_headers(url)
+        while True:
+            with instrumentation.record("gedb", "GET", url, 0) as event:
+                async with self.session.get(
+                    url, cookies=self._cookies(), headers=headers
+                ) as response:
+                    body = await _read(response, event, response.status != 304)
+                    result = self._store_metadata(
+                        url, response.status, response.headers.get("ETag"), body
+                    )
+            if result is not UNCACHED_304 or not headers:
+                return result
+            headers = {}
+
+    async def _get(self, url: str, as_json: bool = True) -> object:
+        with instrumentation.record("gedb", "GET", url, 0) as event:
+            async with self.session.get(url, cookies=self._cookies()) as response:
+                body = await _read(response, event, as_json)
+                return body if as_json else await response.text()
+
+
+async def _read(
+    response: aiohttp.ClientResponse,
+    event: instrumentation.CallEvent,
+    as_json: bool = True,
+) -> object:
+    """Read a response into its call event, decoding it when it is JSON.
+
+    :raises aiohttp.ClientResponseError: When the status is an error.
+    """
+    event.status = response.status
+    body = await response.read()
+    event.bytes_in = len(body)
+    response.raise_for_status()
+    if not as_json:
+        return None
+    b4 = time.perf_counter()
+    value = decode.loads(body)
+    event.decode_time = time.perf_counter() - b4
+    return value
@@ -0,0 +1,207 @@
+"""Spearman concordance between a gene signature and strain expression.
+
+The observed statistic for an individual is the Spearman rank correlation
+between the signature scores, e.g. the gene -> log2fc map from `read_scores`,
+and the individual's expression of the same genes, taken from the
+`strain_expressions` of each `StrainResult` returned by `search_expression`.
+
+Ranks are computed once and stored centred with unit norm, so every
+correlation is a dot product. Permutation nulls shuffle the ranked scores in
+batches and score each batch against every individual with one matrix
+multiplication.
+"""
+
+from typing import Iterable, List, Mapping, Optional, Tuple, Union
+
+import numpy
+import pandas
+from geneweaver.client.gedb import StrainExpressions, StrainResult
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def rankdata(values: numpy.ndarray) -> numpy.ndarray:
+    """Rank a 1-D array, giving tied values the average of their ranks.
+
+    :param values: The values to rank.
+
+    :return: The ranks, starting at 1, as floats.
+    """
+    values = numpy.asarray(values, dtype=numpy.float64)
+    sorter = numpy.argsort(values, kind="mergesort")
+    inverse = numpy.empty(sorter.size, dtype=numpy.intp)
+    inverse[sorter] = numpy.arange(sorter.size)
+
+    ordered = values[sorter]
+    first_of_group = numpy.r_[True, ordered[1:] != ordered[:-1]]
+    dense = first_of_group.cumsum()[inverse]
+    bounds = numpy.r_[numpy.nonzero(first_of_group)[0], len(first_of_group)]
+    return 0.5 * (bounds[dense] + bounds[dense - 1] + 1)
+
+
+def unit_ranks(matrix: numpy.ndarray) -> numpy.ndarray:
+    """Rank each row of a matrix, then centre and scale it to unit length.
+
+    The dot product of two rows returned here is their Spearman correlation.
+    Constant rows, and rows holding a NaN, have no defined correlation and
+    are returned as NaN.
+
+    :param matrix: A 2-D array, one series per row.
+
+    :return: The transformed rows, as float64.
+    """
+    matrix = numpy.atleast_2d(numpy.asarray(matrix, dtype=numpy.float64))
+    ranks = numpy.full_like(matrix, numpy.nan)
+    for i, row in enumerate(matrix):
+        if not numpy.isnan(row).any():
+            ranks[i] = rankdata(row)
+    ranks -= ranks.mean(axis=1, keepdims=True)
+    norms = numpy.linalg.norm(ranks, axis=1, keepdims=True)
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        return ranks / norms
+
+
+class SpearmanConcordance:
+    """Spearman concordance of a signature with every strain individual.
+
+    Only genes found in both the scores and every StrainResult are used, in
+    the order of the first StrainResult.
+    """
+
+    def __init__(
+        self,
+        scores: Mapping[str, Union[str, float]],
+        strain_results: Iterable[StrainResult],
+    ) -> None:
+        """Align the scores and expressions, and cache their ranks.
+
+        :param scores: Gene id to score, e.g. the output of `read_scores`.
+                       Values may be strings, they are converted to floats.
+        :param strain_results: The results of a `search_expression` call.
+        """
+        strain_results = list(strain_results)
+        self.gene_ids: List[str] = self._shared_genes(scores, strain_results)
+
+        self.keys: List[Tuple[str, str]] = []
+        blocks: List[numpy.ndarray] = []
+        for result in strain_results:
+            position = {gene: i for i, gene in enumerate(result.gene_ids)}
+            columns = [position[gene] for gene in self.gene_ids]
+            expressions = result.strain_expressions
+            self.keys.extend((result.strain, individual) for individual in expressions)
+            if isinstance(expressions, StrainExpressions):
+                blocks.append(expressions.matrix[:, columns])
+            else:
+                blocks.append(
+                    numpy.array(
+                        [
+                            [values[c] for c in columns]
+                            for values in expressions.values()
+                        ],
+                        dtype=numpy.float64,
+                    ).reshape(len(expressions), len(columns))
+                )
+
+        self.scores = numpy.array(
+            [float(scores[gene]) for gene in self.gene_ids], dtype=numpy.float64
+        )
+        self.expressions = numpy.concatenate(
+            [numpy.empty((0, len(self.gene_ids)))] + blocks
+        ).astype(numpy.float64, copy=False)
+        self._score_ranks = unit_ranks(self.scores)[0]
+        self._expression_ranks = unit_ranks(self.expressions)
+
+    @staticmethod
+    def _shared_genes(
+        scores: Mapping[str, Union[str, float]], strain_results: List[StrainResult]
+    ) -> List[str]:
+        if not strain_results:
+            return [gene for gene in scores]
+        shared = set(scores)
+        for result in strain_results[1:]:
+            shared.intersection_update(result.gene_ids)
+        return [gene for gene in strain_results[0].gene_ids if gene in shared]
+
+    def observed(self) -> numpy.ndarray:
+        """Get the Spearman rho of the scores with each individual.
+
+        :return: One rho per entry of `keys`.
+        """
+        return self._expression_ranks @ self._score_ranks
+
+    def frame(self) -> pandas.DataFrame:
+        """Get the observed rho as a frame of strain, individual and rho."""
+        return pandas.DataFrame(
+            {
+                "strain": [strain for strain, _ in self.keys],
+                "individual": [individual for _, individual in self.keys],
+                "rho": self.observed(),
+            }
+        )
+
+    def null_batches(
+        self,
+        n_permutations: int,
+        seed: Optional[Union[int, numpy.random.Generator]] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> Iterable[numpy.ndarray]:
+        """Yield permutation null rhos, one batch of permutations at a time.
+
+        Each permutation shuffles the scores across genes. Peak memory is
+        bounded by batch_size times the number of individuals.
+
+        :param n_permutations: The total number of permutations.
+        :param seed: A seed, or Generator, for reproducible permutations.
+        :param batch_size: The number of permutations in each batch.
+
+        :return: Arrays of shape (batch, len(keys)).
+        """
+        rng = numpy.random.default_rng(seed)
+        remaining = n_permutations
+        while remaining > 0:
+            size = min(batch_size, remaining)
+            shuffled = rng.permuted(numpy.tile(self._score_ranks, (size, 1)), axis=1)
+            yield shuffled @ self._expression_ranks.T
+            remaining -= size
+
+    def null_distribution(
+        self,
+        n_permutations: int,
+        seed: Optional[Union[int, numpy.random.Generator]] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> numpy.ndarray:
+        """Get permutation null rhos for every individual.
+
+        :param n_permutations: The number of permutations.
+        :param seed: A seed, or Generator, for reproducible permutations.
+        :param batch_size: The number of permutations computed at once.
+
+        :return: An array of shape (n_permutations, len(keys)).
+        """
+        batches = list(self.null_batches(n_permutations, seed, batch_size))
+        if not batches:
+            return numpy.empty((0, len(self.keys)))
+        return numpy.concatenate(batches)
+
+    def p_values(
+        self,
+        n_permutations: int,
+        seed: Optional[Union[int, numpy.random.Generator]] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> numpy.ndarray:
+        """Get two sided permutation p-values without keeping the nulls.
+
+        :param n_permutations: The number of permutations.
+        :param seed: A seed, or Generator, for reproducible permutations.
+        :param batch_size: The number of permutations computed at once.
+
+        :return: One p-value per entry of `keys`, as (extreme + 1) / (n + 1),
+                 NaN where the observed rho is NaN.
+        """
+        observed = numpy.abs(self.observed())
+        extreme = numpy.zeros(len(self.keys), dtype=numpy.int64)
+        for batch in self.null_batches(n_permutations, seed, batch_size):
+            extreme += (numpy.abs(batch) >= observed - 1e-12).sum(axis=0)
+        p_values = (extreme + 1) / (n_permutations + 1)
+        p_values[numpy.isnan(observed)] = numpy.nan
+        return p_values
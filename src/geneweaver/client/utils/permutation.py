@@ -0,0 +1,278 @@
+"""Local, multi-process, random geneset nulls for Spearman concordance.
+
+This is a local counterpart of `GeneExpressionDatabaseClient.random_spearmanrho`.
+Each random draw picks one individual and as many random genes as there are
+scores, and gives the Spearman rho of the scores with that individual's
+expression of those genes. The server does every draw in one call. Here the
+draws are split into chunks and run across a process pool, so a large null
+reports progress and keeps its partial results.
+
+The expression matrix is moved once into shared memory, and every worker
+attaches to it, rather than having it pickled with each task. Each chunk draws
+from its own seed stream, spawned from one master seed, so the result for a
+seed is the same whatever the number of workers or the order chunks finish in.
+"""
+
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Iterator, Optional, Sequence, Tuple, Union
+
+import numpy
+import pandas
+from geneweaver.client.utils.concordance import unit_ranks
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# The shared expression matrix of this worker process, set by _attach_worker.
+_WORKER_STATE: Dict[str, object] = {}
+
+
+def draw_rhos(
+    expression: numpy.ndarray,
+    score_ranks: numpy.ndarray,
+    count: int,
+    seed: numpy.random.SeedSequence,
+) -> numpy.ndarray:
+    """Compute the rho of the scores with count random genesets.
+
+    Tied expression values are given the average of their ranks, as in
+    `scipy.stats.spearmanr`.
+
+    :param expression: The expression matrix, individuals by genes.
+    :param score_ranks: The scores ranked, centred and with unit norm.
+    :param count: The number of random draws.
+    :param seed: The seed stream of these draws.
+
+    :return: One rho per draw.
+    """
+    rng = numpy.random.default_rng(seed)
+    individuals, genes = expression.shape
+
+    rows = rng.integers(0, individuals, size=count)
+    columns = random_genesets(rng, genes, len(score_ranks), count)
+    values = expression[rows[:, None], columns]
+
+    ranks = _average_ranks(values)
+    ranks -= ranks.mean(axis=1, keepdims=True)
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        ranks /= numpy.linalg.norm(ranks, axis=1, keepdims=True)
+    return ranks @ score_ranks
+
+
+def random_genesets(
+    rng: numpy.random.Generator, genes: int, size: int, count: int
+) -> numpy.ndarray:
+    """Draw count random genesets of size distinct genes each.
+
+    Small genesets are drawn for every row at once: genes are drawn with
+    replacement, with some to spare, and repeats are dropped in draw order,
+    which is sampling without replacement. Rows left short, and genesets too
+    large for few repeats, are drawn one row at a time.
+
+    :param rng: The random generator to draw from.
+    :param genes: The number of genes to draw from.
+    :param size: The number of genes in each geneset.
+    :param count: The number of genesets.
+
+    :return: An array of gene indexes, one geneset per row.
+    """
+    columns = numpy.empty((count, size), dtype=numpy.int64)
+    short = numpy.arange(count)
+    if size * size <= genes * 4:
+        draws = rng.integers(0, genes, size=(count, size + size * size // genes + 16))
+        sorter = numpy.argsort(draws, axis=1, kind="stable")
+        ordered = numpy.take_along_axis(draws, sorter, axis=1)
+        repeat = numpy.zeros(draws.shape, dtype=bool)
+        repeat[:, 1:] = ordered[:, 1:] == ordered[:, :-1]
+        keep = numpy.empty_like(repeat)
+        numpy.put_along_axis(keep, sorter, ~repeat, axis=1)
+        keep &= keep.cumsum(axis=1) <= size
+        full = keep.sum(axis=1) == size
+        columns[full] = draws[full][keep[full]].reshape(-1, size)
+        short = short[~full]
+    for row in short:
+        columns[row] = rng.choice(genes, size, replace=False)
+    return columns
+
+
+def _average_ranks(values: numpy.ndarray) -> numpy.ndarray:
+    """Rank each row of a matrix, giving tied values the average of their ranks."""
+    sorter = numpy.argsort(values, axis=1, kind="stable")
+    ordered = numpy.take_along_axis(values, sorter, axis=1)
+    positions = numpy.broadcast_to(numpy.arange(values.shape[1]), values.shape)
+    starts = numpy.ones(values.shape, dtype=bool)
+    starts[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    ends = numpy.ones(values.shape, dtype=bool)
+    ends[:, :-1] = starts[:, 1:]
+
+    first = numpy.maximum.accumulate(numpy.where(starts, positions, 0), axis=1)
+    last = numpy.where(ends, positions, values.shape[1])[:, ::-1]
+    last = numpy.minimum.accumulate(last, axis=1)[:, ::-1]
+    ranks = numpy.empty(values.shape, dtype=numpy.float64)
+    numpy.put_along_axis(ranks, sorter, 0.5 * (first + last) + 1, axis=1)
+    return ranks
+
+
+def _attach_worker(
+    name: str, shape: Tuple[int, int], dtype: str, score_ranks: numpy.ndarray
+) -> None:
+    """Attach a pool worker to the shared expression matrix."""
+    memory = shared_memory.SharedMemory(name=name)
+    _WORKER_STATE["memory"] = memory
+    _WORKER_STATE["expression"] = numpy.ndarray(shape, dtype=dtype, buffer=memory.buf)
+    _WORKER_STATE["score_ranks"] = score_ranks
+
+
+def _worker_draw(
+    index: int, count: int, seed: numpy.random.SeedSequence
+) -> Tuple[int, numpy.ndarray]:
+    """Run one chunk of draws in a pool worker."""
+    return index, draw_rhos(
+        _WORKER_STATE["expression"], _WORKER_STATE["score_ranks"], count, seed
+    )
+
+
+class RandomGenesetNull:
+    """Random geneset Spearman nulls computed locally over a process pool.
+
+    Use as a context manager, or call close, to release the pool and the
+    shared memory:
+
+        with RandomGenesetNull(expression, scores, workers=8) as null:
+            rhos = null.rhos(10000, seed=42)
+    """
+
+    def __init__(
+        self,
+        expression: Union[numpy.ndarray, pandas.DataFrame],
+        scores: Sequence[float],
+        workers: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> None:
+        """Create a RandomGenesetNull.
+
+        :param expression: The expression of every gene of an ingest, with
+                           one row per individual and one column per gene.
+        :param scores: The scores of the geneset, e.g. its log2fc values.
+        :param workers: The number of worker processes, defaults to the
+                        number of CPUs. With 0 every draw runs in this process.
+        :param chunk_size: The number of draws in each task.
+        """
+        self.expression = numpy.ascontiguousarray(expression, dtype=numpy.float64)
+        self.score_ranks = unit_ranks(numpy.asarray(scores, dtype=numpy.float64))[0]
+        if len(self.score_ranks) > self.expression.shape[1]:
+            raise ValueError("There are more scores than genes to draw from.")
+        self.workers = os.cpu_count() if workers is None else workers
+        self.chunk_size = chunk_size
+        self._memory: Optional[shared_memory.SharedMemory] = None
+        self._pool: Optional[Executor] = None
+
+    def __enter__(self) -> "RandomGenesetNull":
+        """Enter a context which closes the pool on exit."""
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Close the pool and release the shared memory."""
+        self.close()
+
+    def close(self) -> None:
+        """Shut down the worker pool and release the shared memory."""
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+        if self._memory is not None:
+            # Take the matrix back out of the shared memory before it is freed.
+            self.expression = self.expression.copy()
+            self._memory.close()
+            self._memory.unlink()
+            self._memory = None
+
+    def iter_chunks(
+        self, r_size: int, seed: Optional[int] = None
+    ) -> Iterator[Tuple[int, numpy.ndarray]]:
+        """Yield chunks of null rhos as they are completed.
+
+        Stopping early cancels the chunks which have not started.
+
+        :param r_size: The total number of random draws.
+        :param seed: The master seed. None draws fresh entropy.
+
+        :return: Tuples of (chunk index, rhos of that chunk).
+        """
+        chunks = self._chunks(r_size, seed)
+        if self.workers == 0:
+            for index, count, chunk_seed in chunks:
+                yield index, draw_rhos(
+                    self.expression, self.score_ranks, count, chunk_seed
+                )
+            return
+
+        pool = self._get_pool()
+        futures = [pool.submit(_worker_draw, *chunk) for chunk in chunks]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def rhos(
+        self,
+        r_size: int,
+        seed: Optional[int] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> numpy.ndarray:
+        """Compute r_size null rhos.
+
+        :param r_size: The number of random draws.
+        :param seed: The master seed. None draws fresh entropy.
+        :param progress: Called with (draws done, r_size) after each chunk.
+
+        :return: The rhos, in the same order for a seed on any pool size.
+        """
+        done = 0
+        parts: Dict[int, numpy.ndarray] = {}
+        for index, rhos in self.iter_chunks(r_size, seed):
+            parts[index] = rhos
+            done += len(rhos)
+            if progress is not None:
+                progress(done, r_size)
+        if not parts:
+            return numpy.empty(0)
+        return numpy.concatenate([parts[i] for i in sorted(parts)])
+
+    def _chunks(
+        self, r_size: int, seed: Optional[int]
+    ) -> Iterator[Tuple[int, int, numpy.random.SeedSequence]]:
+        counts = [
+            min(self.chunk_size, r_size - start)
+            for start in range(0, r_size, self.chunk_size)
+        ]
+        seeds = numpy.random.SeedSequence(seed).spawn(len(counts))
+        return zip(range(len(counts)), counts, seeds)
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            self._memory = shared_memory.SharedMemory(
+                create=True, size=max(self.expression.nbytes, 1)
+            )
+            shared = numpy.ndarray(
+                self.expression.shape,
+                dtype=self.expression.dtype,
+                buffer=self._memory.buf,
+            )
+            shared[:] = self.expression
+            # Draw from the shared copy, so the matrix is only held once.
+            self.expression = shared
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_attach_worker,
+                initargs=(
+                    self._memory.name,
+                    self.expression.shape,
+                    self.expression.dtype.str,
+                    self.score_ranks,
+                ),
+            )
+        return self._pool
@@ -0,0 +1,15 @@
+"""Pytest fixtures shared by every test."""
+
+# ruff: noqa: ANN001
+import pytest
+from geneweaver.client.api import aon
+from geneweaver.client.core.cache import ResponseCache
+
+
+@pytest.fixture(autouse=True)
+def algorithm_registry(tmp_path) -> aon.AlgorithmRegistry:
+    """Keep the AON algorithm list in a fresh cache for each test."""
+    registry = aon.AlgorithmRegistry(ResponseCache(tmp_path / "responses"))
+    previous = aon.set_registry(registry)
+    yield registry
+    aon.set_registry(previous)
@@ -0,0 +1,155 @@
+"""Test the asynchronous API functions against a local stub server."""
+
+import asyncio
+import json
+import time
+
+import pytest
+from geneweaver.client.api.aio import aon, genes, genesets
+from geneweaver.client.api.aio.utils import (
+    AsyncAPIClient,
+    close_async_client,
+    get_async_client,
+    set_async_client,
+)
+from geneweaver.client.api.exc import GeneweaverAPIError
+from geneweaver.client.core.config import settings
+from geneweaver.core.enum import GeneIdentifier, Species
+
+
+@pytest.fixture()
+def api(stub_server, monkeypatch):
+    """Point the API and AON URLs at the stub server, with a fresh client."""
+    monkeypatch.setattr(settings, "API_URL", stub_server.url + "/api")
+    monkeypatch.setattr(settings, "AON_API_URL", stub_server.url + "/aon/api")
+    previous = set_async_client(AsyncAPIClient())
+    yield stub_server
+    set_async_client(previous)
+
+
+def _run(coroutine) -> object:
+    async def run() -> object:
+        try:
+            return await coroutine
+        finally:
+            await close_async_client()
+
+    return asyncio.run(run())
+
+
+def test_genesets(api):
+    """Test the geneset coroutines send the same requests as the functions."""
+    api.add_json("GET", "/api/genesets/12", {"geneset": {"id": 12}})
+    api.add_json("GET", "/api/genesets/12/values", {"data": [1]})
+    api.add_json("GET", "/api/genesets", [{"id": 1}, {"id": 2}])
+
+    async def calls() -> list:
+        return list(
+            await asyncio.gather(
+                genesets.get("tok", 12, GeneIdentifier.MGI),
+                genesets.get_values("tok", 12, in_threshold=True),
+                genesets.get_genesets("tok"),
+            )
+        )
+
+    assert _run(calls()) == [
+        {"geneset": {"id": 12}},
+        {"data": [1]},
+        [{"id": 1}, {"id": 2}],
+    ]
+    paths = sorted(path for _, path, _ in api.requests)
+    assert paths == [
+        "/api/genesets",
+        "/api/genesets/12/values?in_threshold=True",
+        "/api/genesets/12?gene_id_type={}".format(int(GeneIdentifier.MGI)),
+    ]
+    assert api.connections <= 3
+
+
+def test_genes_and_aon(api):
+    """Test the mapping, ortholog and algorithm coroutines."""
+    api.add_json("POST", "/api/genes/mappings", {"gene_ids_map": []})
+    api.add_json("POST", "/aon/api/genes/ortholog/mapping", [{"from_gene": "a"}])
+    api.add_json(
+        "GET", "/aon/api/algorithms", [{"alg_name": "Ensembl Compara", "alg_id": 7}]
+    )
+
+    async def calls() -> list:
+        return [
+            await genes.mappings(
+                "tok", ["A"], GeneIdentifier.ENSEMBLE_GENE, Species.MUS_MUSCULUS
+            ),
+            await aon.ortholog_mapping(["a"], Species.MUS_MUSCULUS, 7),
+            await aon.algorithm_id_from_name("ensemblcompara"),
+            await aon.algorithm_id_from_name("nope"),
+        ]
+
+    assert _run(calls()) == [{"gene_ids_map": []}, [{"from_gene": "a"}], 7, None]
+    mapping = json.loads(api.requests[0][2])
+    assert mapping["source_ids"] == ["A"]
+    assert api.requests[1][1].endswith("algorithm_id=7")
+    assert [path for _, path, _ in api.requests].count("/aon/api/algorithms") == 1
+    assert api.connections == 1
+
+
+def test_algorithm_lookup_never_refreshes_synchronously(
+    api, algorithm_registry, monkeypatch
+):
+    """Test a stale algorithm list is downloaded by the coroutine."""
+    api.add_json("GET", "/aon/api/algorithms", [{"alg_name": "OMA", "alg_id": 9}])
+    algorithm_registry.update([{"alg_name": "OMA", "alg_id": 8}])
+    algorithm_registry.cache.ttl = 0
+
+    def refresh() -> None:
+        raise AssertionError("refreshed synchronously")
+
+    monkeypatch.setattr(algorithm_registry, "refresh", refresh)
+    assert _run(aon.algorithm_id_from_name("oma")) == 9
+    assert algorithm_registry.id_from_name("oma", refresh=False) == 9
+
+
+def test_errors(api):
+    """Test error statuses and connection failures raise GeneweaverAPIError."""
+    api.add_json("GET", "/api/genesets/1", {"detail": "forbidden"}, status=403)
+    with pytest.raises(GeneweaverAPIError, match="forbidden"):
+        _run(genesets.get("tok", 1))
+
+    client = AsyncAPIClient()
+    set_async_client(client)
+    with pytest.raises(GeneweaverAPIError, match="problem calling"):
+        _run(client.request("GET", "http://127.0.0.1:1/closed"))
+
+
+def test_client_survives_event_loops(api):
+    """Test the process wide client can be used from successive loops."""
+    api.add_json("GET", "/api/genesets", [])
+    client = get_async_client()
+    assert _run(genesets.get_genesets("tok")) == []
+    assert _run(genesets.get_genesets("tok")) == []
+    assert get_async_client() is client
+
+
+def test_session_of_a_previous_loop_is_closed(api):
+    """Test moving to another event loop closes the old loop's session."""
+    api.add_json("GET", "/api/genesets", [])
+    client = get_async_client()
+    assert asyncio.run(genesets.get_genesets("tok")) == []
+    first = client._session
+    assert not first.closed
+
+    assert _run(genesets.get_genesets("tok")) == []
+    assert first.closed
+    assert client._session is None
+
+
+def test_timeouts_are_api_errors(api):
+    """Test a call over the client timeout raises a GeneweaverAPIError."""
+
+    def slow(handler, body) -> tuple:  # noqa: ANN001
+        time.sleep(0.5)
+        return 200, b"[]"
+
+    api.routes[("GET", "/api/genesets")] = slow
+    set_async_client(AsyncAPIClient(timeout=0.05))
+    with pytest.raises(GeneweaverAPIError, match="problem calling"):
+        _run(genesets.get_genesets("tok"))
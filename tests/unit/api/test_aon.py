@@ -0,0 +1,188 @@
+"""Test the AON API client functions."""
+
+import json
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from geneweaver.client.api import aon
+from geneweaver.client.api.exc import GeneweaverAPIError
+from geneweaver.client.core.cache import ResponseCache
+from geneweaver.client.core.config import settings
+from geneweaver.client.utils.aon import map_symbols
+from geneweaver.core.enum import Species
+
+# Each gene maps to three mouse genes, and every gene also maps to "shared".
+TARGETS = 3
+
+
+def _rows(identifiers: list) -> list:
+    rows = [
+        {"from_gene": gene, "to_gene": "{}-{}".format(gene, i)}
+        for gene in identifiers
+        for i in range(TARGETS)
+    ]
+    rows += [{"from_gene": "all", "to_gene": "shared"}]
+    return rows
+
+
+@pytest.fixture()
+def orthologs_server(stub_server, monkeypatch):
+    """Serve the ortholog rows of the posted genes with limit and offset."""
+    monkeypatch.setattr(settings, "AON_API_URL", stub_server.url + "/aon/api")
+
+    def page(handler, body) -> tuple:
+        query = parse_qs(urlsplit(handler.path).query)
+        offset = int(query.get("offset", ["0"])[0])
+        limit = int(query["limit"][0])
+        rows = _rows(json.loads(body))[offset : offset + limit]
+        return 200, json.dumps(rows).encode()
+
+    stub_server.routes[("POST", "/aon/api/genes/ortholog/mapping")] = page
+    return stub_server
+
+
+@pytest.mark.parametrize(
+    ("chunk_size", "page_size"), [(1000, 30000), (7, 5), (50, 4), (3, 10), (1, 1)]
+)
+def test_iter_ortholog_mapping_is_complete(orthologs_server, chunk_size, page_size):
+    """Test every row is yielded once, whatever the chunk and page sizes."""
+    genes = ["g{}".format(i) for i in range(40)]
+    rows = list(
+        aon.iter_ortholog_mapping(
+            genes + genes[:5],
+            Species.MUS_MUSCULUS,
+            chunk_size=chunk_size,
+            page_size=page_size,
+        )
+    )
+    expected = _rows(genes)
+    assert len(rows) == len(expected)
+    assert sorted(map(aon.row_key, rows), key=str) == sorted(
+        map(aon.row_key, expected), key=str
+    )
+
+    posted = [json.loads(body) for _, _, body in orthologs_server.requests]
+    assert {gene for chunk in posted for gene in chunk} == set(genes)
+    assert max(len(chunk) for chunk in posted) <= chunk_size
+
+
+def test_chunks_are_yielded_in_order(stub_server, monkeypatch):
+    """Test a tie across two chunks resolves the same way however they finish."""
+    monkeypatch.setattr(settings, "AON_API_URL", stub_server.url + "/aon/api")
+
+    def page(handler, body) -> tuple:
+        genes = json.loads(body)
+        if "a" in genes:
+            # The first chunk completes last.
+            time.sleep(0.2)
+        rows = [{"from_gene": gene, "to_gene": "M"} for gene in genes]
+        return 200, json.dumps(rows).encode()
+
+    stub_server.routes[("POST", "/aon/api/genes/ortholog/mapping")] = page
+    rows = list(
+        aon.iter_ortholog_mapping(["a", "b"], Species.MUS_MUSCULUS, chunk_size=1)
+    )
+    assert [row["from_gene"] for row in rows] == ["a", "b"]
+    edges = [(row["from_gene"], row["to_gene"]) for row in rows]
+    assert map_symbols({"a": -1, "b": 1}, edges) == {"M": -1}
+
+
+def test_ortholog_mapping_pages(orthologs_server):
+    """Test ortholog_mapping follows offset past a full page."""
+    rows = aon.ortholog_mapping(["a", "b"], Species.MUS_MUSCULUS, algorithm_id=3)
+    assert len(rows) == 2 * TARGETS + 1
+    assert len(orthologs_server.requests) == 1
+    assert "algorithm_id=3" in orthologs_server.requests[0][1]
+
+    orthologs_server.requests.clear()
+    rows = list(
+        aon.iter_ortholog_mapping(["a", "b"], Species.MUS_MUSCULUS, page_size=3)
+    )
+    assert len(rows) == 2 * TARGETS + 1
+    offsets = [
+        parse_qs(urlsplit(path).query).get("offset", ["0"])[0]
+        for _, path, _ in orthologs_server.requests
+    ]
+    assert offsets == ["0", "3", "6"]
+
+
+def test_ortholog_mapping_ignored_offset(stub_server, monkeypatch):
+    """Test a server repeating full pages raises instead of looping."""
+    monkeypatch.setattr(settings, "AON_API_URL", stub_server.url + "/aon/api")
+    stub_server.add_json(
+        "POST", "/aon/api/genes/ortholog/mapping", [{"from_gene": "a", "to_gene": "b"}]
+    )
+    with pytest.raises(GeneweaverAPIError, match="same page"):
+        list(aon.iter_ortholog_mapping(["a"], Species.MUS_MUSCULUS, page_size=1))
+    assert len(stub_server.requests) == 2
+
+
+def test_ortholog_pages_suppresses_duplicates():
+    """Test rows repeated across pages are kept once."""
+    pages = aon.OrthologPages(Species.MUS_MUSCULUS, page_size=2)
+    assert pages.params == {"to_species": int(Species.MUS_MUSCULUS), "limit": 2}
+    assert not pages.add([{"a": 1}, {"a": 2}])
+    assert pages.params["offset"] == 2
+    assert pages.add([{"a": 2}])
+    assert pages.rows == [{"a": 1}, {"a": 2}]
+
+
+ALGORITHMS = [
+    {"alg_id": 1, "alg_name": "HGNC"},
+    {"alg_id": 7, "alg_name": "Ensembl Compara"},
+]
+
+
+@pytest.fixture()
+def algorithms_server(stub_server, monkeypatch):
+    """Serve the AON algorithm list."""
+    monkeypatch.setattr(settings, "AON_API_URL", stub_server.url + "/aon/api")
+    stub_server.add_json("GET", "/aon/api/algorithms", ALGORITHMS)
+    return stub_server
+
+
+def test_algorithm_id_from_name_is_memoized(algorithms_server):
+    """Test the algorithms are listed once for any number of lookups."""
+    assert aon.algorithm_id_from_name("EnsemblCompara") == 7
+    assert aon.algorithm_id_from_name("ensembl compara") == 7
+    assert aon.algorithm_id_from_name("HGNC") == 1
+    assert aon.algorithm_id_from_name("nope") is None
+    assert aon.get_registry().name_from_id(7) == "Ensembl Compara"
+    assert aon.get_registry().name_from_id(2) is None
+    assert len(algorithms_server.requests) == 1
+
+
+def test_algorithm_registry_on_disk(algorithms_server, tmp_path):
+    """Test a registry on the same directory reuses the list until it expires."""
+    first = aon.AlgorithmRegistry(ResponseCache(tmp_path))
+    assert first.algorithms() == ALGORITHMS
+
+    second = aon.AlgorithmRegistry(ResponseCache(tmp_path))
+    assert second.id_from_name(aon.OrthologAlgorithms.HGNC.value) == 1
+    assert len(algorithms_server.requests) == 1
+
+    expired = aon.AlgorithmRegistry(ResponseCache(tmp_path, ttl=0))
+    assert expired.stale()
+    assert expired.id_from_name("HGNC") == 1
+    assert len(algorithms_server.requests) == 2
+
+
+def test_algorithm_registry_refreshes_index(algorithms_server, tmp_path):
+    """Test the indexes follow an updated list."""
+    registry = aon.AlgorithmRegistry(ResponseCache(tmp_path))
+    assert registry.id_from_name("OMA") is None
+    registry.update(ALGORITHMS + [{"alg_id": 9, "alg_name": "OMA"}])
+    assert registry.id_from_name("oma") == 9
+    assert len(algorithms_server.requests) == 1
+
+
+def test_algorithm_registry_has_its_own_directory(monkeypatch, tmp_path):
+    """Test invalidating the default response cache keeps the algorithms."""
+    monkeypatch.setattr(aon, "get_cache_dir", lambda: tmp_path)
+    registry = aon.AlgorithmRegistry()
+    registry.update(ALGORITHMS)
+    assert registry.cache.directory == tmp_path / "aon"
+
+    ResponseCache(tmp_path / "responses").invalidate()
+    assert not aon.AlgorithmRegistry().stale()
@@ -1,6 +1,7 @@
 """Tests for API utilities."""
 
 # ruff: noqa: B905, ANN001, ANN201
+from concurrent.futures import ThreadPoolExecutor
 from itertools import chain
 from unittest.mock import Mock, patch
 
@@ -8,9 +9,13 @@ import pytest
 import requests
 from geneweaver.client.api.exc import GeneweaverAPIError
 from geneweaver.client.api.utils import (
+    APIClient,
     _raise_for_status_hook,
+    close_client,
     format_endpoint,
+    get_client,
     sessionmanager,
+    set_client,
 )
 
 INFO = list(range(100, 104))
@@ -72,3 +77,54 @@ def test_format_endpoint(parts, expected):
     assert type(format_endpoint(*parts)) == str  # noqa: E721
     assert isinstance(format_endpoint(*parts), str)
     assert format_endpoint(*parts).endswith(expected)
+
+
+def test_sessionmanager_reuses_connections(stub_server):
+    """Test calls from many threads share the pooled keep-alive connections."""
+    stub_server.add_json("GET", "/api/genesets", [])
+
+    def call(token) -> str:
+        with sessionmanager(token=token) as session:
+            response = session.get(stub_server.url + "/api/genesets")
+            return response.request.headers.get("Authorization")
+
+    with APIClient(pool_size=4) as client:
+        previous = set_client(client)
+        try:
+            tokens = [call(str(i)) for i in range(5)]
+            with ThreadPoolExecutor(4) as pool:
+                tokens += list(pool.map(call, [str(i) for i in range(40)]))
+        finally:
+            set_client(previous)
+
+    assert tokens[:5] == ["Bearer {}".format(i) for i in range(5)]
+    assert tokens[5:] == ["Bearer {}".format(i) for i in range(40)]
+    assert len(stub_server.requests) == 45
+    assert stub_server.connections <= 4
+
+
+def test_client_lifecycle(stub_server):
+    """Test a closed client reconnects on its next call."""
+    stub_server.add_json("GET", "/api/genesets", [])
+    client = APIClient()
+    for _ in range(2):
+        with sessionmanager(client=client) as session:
+            session.get(stub_server.url + "/api/genesets")
+    assert stub_server.connections == 1
+
+    client.close()
+    with sessionmanager(client=client) as session:
+        session.get(stub_server.url + "/api/genesets")
+    client.close()
+    assert stub_server.connections == 2
+
+
+def test_get_client_is_process_wide():
+    """Test the default client is created once and can be replaced."""
+    client = get_client()
+    assert get_client() is client
+    other = APIClient()
+    assert set_client(other) is client
+    assert get_client() is other
+    set_client(client)
+    close_client()
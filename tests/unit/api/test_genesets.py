@@ -1,9 +1,13 @@
 """Test the genesets API client functions."""
 
+import json
 from unittest.mock import patch
+from urllib.parse import parse_qs, urlsplit
 
 import pytest
 from geneweaver.client.api import genesets
+from geneweaver.client.api.exc import GeneweaverAPIError
+from geneweaver.client.core.config import settings
 from geneweaver.core.enum import GeneIdentifier
 
 
@@ -78,3 +82,116 @@ def test_get_values():
             mock_sessionmanager.return_value.__enter__.return_value.get.return_value.json.call_count
             == 1
         )
+
+
+@pytest.fixture()
+def values_server(stub_server, monkeypatch):
+    """Serve the values of genesets 1 to 20, with 13 missing."""
+    monkeypatch.setattr(settings, "API_URL", stub_server.url + "/api")
+    for geneset_id in range(1, 21):
+        stub_server.add_json(
+            "GET", f"/api/genesets/{geneset_id}/values", {"data": [geneset_id]}
+        )
+    stub_server.add_json("GET", "/api/genesets/13/values", {"detail": "no"}, 404)
+    return stub_server
+
+
+def test_get_values_many(values_server):
+    """Test every id is fetched and failures are reported per id."""
+    values_server.routes[("GET", "/api/genesets/2/values")] = [
+        (429, b"{}", {"Retry-After": "0"}),
+        (200, b'{"data": [2]}'),
+    ]
+    results = list(genesets.get_values_many("tok", range(1, 21), concurrency=4))
+
+    assert sorted(r.geneset_id for r in results) == list(range(1, 21))
+    failed = [r for r in results if not r.ok]
+    assert [r.geneset_id for r in failed] == [13]
+    assert isinstance(failed[0].error, GeneweaverAPIError)
+    assert all(r.result == {"data": [r.geneset_id]} for r in results if r.ok)
+    assert len(values_server.requests) == 21
+
+
+def test_get_values_many_to_disk(values_server, tmp_path):
+    """Test values are written to one file per geneset."""
+    results = list(
+        genesets.get_values_many("tok", [3, 13, 4], directory=tmp_path / "out")
+    )
+    written = {r.geneset_id: r.path for r in results if r.ok}
+
+    assert sorted(written) == [3, 4]
+    assert json.loads(written[3].read_text()) == {"data": [3]}
+    assert sorted(p.name for p in (tmp_path / "out").iterdir()) == [
+        "3.json",
+        "4.json",
+    ]
+
+
+def test_get_values_many_stops_early(values_server):
+    """Test a consumer stopping early stops the fetching."""
+    results = genesets.get_values_many("tok", range(1, 21), concurrency=2)
+    first = next(results)
+    results.close()
+
+    assert first.ok
+    assert len(values_server.requests) <= 4
+
+
+@pytest.fixture()
+def pages_server(stub_server, monkeypatch):
+    """Serve 25 genesets with limit and offset, filtered by species."""
+    monkeypatch.setattr(settings, "API_URL", stub_server.url + "/api")
+    genesets_ = [{"geneset_id": i, "species": i % 2} for i in range(25)]
+
+    def page(handler, body) -> tuple:
+        query = parse_qs(urlsplit(handler.path).query)
+        offset, limit = int(query["offset"][0]), int(query["limit"][0])
+        items = genesets_
+        if "species" in query:
+            items = [g for g in items if g["species"] == int(query["species"][0])]
+        data = {"data": items[offset : offset + limit]}
+        return 200, json.dumps(data).encode()
+
+    stub_server.routes[("GET", "/api/genesets")] = page
+    return stub_server
+
+
+@pytest.mark.parametrize(("page_size", "pages"), [(10, 3), (5, 6), (25, 2), (100, 1)])
+def test_iter_genesets(pages_server, page_size, pages):
+    """Test every geneset is yielded once, in order, page by page."""
+    items = list(genesets.iter_genesets("tok", page_size=page_size))
+    assert [g["geneset_id"] for g in items] == list(range(25))
+    assert len(pages_server.requests) == pages
+
+
+def test_iter_genesets_filters_and_early_stop(pages_server):
+    """Test filters reach the server and stopping early stops fetching."""
+    items = list(genesets.iter_genesets("tok", page_size=4, filters={"species": 1}))
+    assert [g["geneset_id"] for g in items] == list(range(1, 25, 2))
+
+    pages_server.requests.clear()
+    iterator = genesets.iter_genesets("tok", page_size=5)
+    assert next(iterator)["geneset_id"] == 0
+    iterator.close()
+    assert len(pages_server.requests) <= 2
+
+
+def test_iter_genesets_ignored_offset(stub_server, monkeypatch):
+    """Test a server repeating full pages ends the iteration."""
+    monkeypatch.setattr(settings, "API_URL", stub_server.url + "/api")
+    page = [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}]
+    stub_server.add_json("GET", "/api/genesets", {"data": page})
+    assert list(genesets.iter_genesets("tok", page_size=2)) == page
+    assert len(stub_server.requests) == 2
+
+
+def test_iter_genesets_skips_repeats(stub_server, monkeypatch):
+    """Test genesets repeated across shifted pages are yielded once."""
+    monkeypatch.setattr(settings, "API_URL", stub_server.url + "/api")
+    stub_server.routes[("GET", "/api/genesets")] = [
+        (200, json.dumps({"data": [{"id": 1}, {"id": 2}]}).encode()),
+        (200, json.dumps({"data": [{"id": 2}, {"id": 3}]}).encode()),
+        (200, json.dumps({"data": [{"id": 4}]}).encode()),
+    ]
+    items = list(genesets.iter_genesets("tok", page_size=2))
+    assert [g["id"] for g in items] == [1, 2, 3, 4]
@@ -5,6 +5,8 @@ from unittest.mock import patch
 import pytest
 from geneweaver.client.api import mapping
 from geneweaver.client.api.aon import OrthologAlgorithms
+from geneweaver.client.api.exc import GeneweaverAPIError
+from geneweaver.client.core.cache import MappingCache
 from geneweaver.core.enum import Species
 
 
@@ -67,3 +69,217 @@ def test_ensembl_mouse_mapping(
     assert mock_aon_ortholog_mapping.call_count == expected_api_calls
     assert mock_genes_mappings.call_count == expected_api_calls
     assert mock_aon_map_symbols.call_count == expected_mapping_calls
+
+
+@patch("geneweaver.client.api.mapping.genes.mappings")
+@patch("geneweaver.client.api.mapping.aon.ortholog_mapping")
+def test_mapping_cache_skips_known_genes(mock_orthologs, mock_mappings):
+    """Test genes mapped before, by any geneset, are not requested again."""
+    mock_orthologs.side_effect = lambda genes, *args, **kwargs: [
+        {"from_gene": g, "to_gene": "M" + g} for g in genes if g != "C"
+    ]
+    mock_mappings.side_effect = lambda token, genes, *args: {
+        "gene_ids_map": [
+            {"original_ref_id": g, "mapped_ref_id": "E" + g} for g in genes
+        ]
+    }
+    cache = MappingCache(":memory:")
+
+    assert mapping.prefetch_mouse_mappings("tok", ["A", "B", "C"], cache) == 2
+    assert mock_orthologs.call_args[0][0] == ["A", "B", "C"]
+
+    edges = mapping.mouse_orthologs(["C", "B", "D"], cache=cache)
+    assert edges == [("B", "MB"), ("D", "MD")]
+    assert mock_orthologs.call_args[0][0] == ["D"]
+    assert mapping.mouse_ensembl_ids("tok", ["MA", "MB"], cache) == [
+        ("MA", "EMA"),
+        ("MB", "EMB"),
+    ]
+    assert mock_mappings.call_count == 1
+    assert mapping.mouse_orthologs(["D"], algorithm_id=7, cache=cache) == [("D", "MD")]
+    assert mock_orthologs.call_count == 3
+
+
+@patch("geneweaver.client.api.mapping.genesets.get")
+@patch("geneweaver.client.api.mapping.genesets.get_values")
+@patch("geneweaver.client.api.mapping.genes.mappings")
+@patch("geneweaver.client.api.mapping.aon.ortholog_mapping")
+def test_ensembl_mouse_mapping_with_cache(
+    mock_orthologs, mock_mappings, mock_get_values, mock_get
+):
+    """Test a second geneset of the same genes is mapped locally."""
+    mock_get.return_value = {"geneset": {"species_id": int(Species.HOMO_SAPIENS)}}
+    mock_get_values.return_value = {
+        "data": [{"symbol": "A", "value": 1.0}, {"symbol": "B", "value": -3.0}]
+    }
+    mock_orthologs.return_value = [
+        {"from_gene": "A", "to_gene": "M1"},
+        {"from_gene": "B", "to_gene": "M1"},
+    ]
+    mock_mappings.return_value = {
+        "gene_ids_map": [{"original_ref_id": "M1", "mapped_ref_id": "E1"}]
+    }
+    cache = MappingCache(":memory:")
+
+    first = mapping.ensembl_mouse_mapping("tok", 1, True, cache=cache)
+    second = mapping.ensembl_mouse_mapping("tok", 2, True, cache=cache)
+
+    assert first == second == [{"symbol": "E1", "value": -3.0}]
+    assert mock_orthologs.call_count == 1
+    assert mock_mappings.call_count == 1
+
+
+@patch("geneweaver.client.api.mapping.aon.ortholog_mapping")
+def test_edges_keep_identifier_order_with_cache(mock_orthologs):
+    """Test edges are ordered by identifier whether cached or fetched."""
+    mock_orthologs.side_effect = lambda genes, *args, **kwargs: [
+        {"from_gene": g, "to_gene": "M"} for g in sorted(genes)
+    ]
+    cache = MappingCache(":memory:")
+    cold = mapping.mouse_orthologs(["B", "A"])
+    mapping.mouse_orthologs(["A"], cache=cache)
+    warm = mapping.mouse_orthologs(["B", "A"], cache=cache)
+
+    assert cold == warm == [("B", "M"), ("A", "M")]
+    assert mock_orthologs.call_args[0][0] == ["B"]
+
+
+GENESETS = {
+    1: (Species.HOMO_SAPIENS, {"A": 1.0, "B": -2.0, "C": 0.5}),
+    2: (Species.HOMO_SAPIENS, {"B": 4.0, "D": -1.0}),
+    3: (Species.MUS_MUSCULUS, {"E": 2.0}),
+    5: (Species.RATTUS_NORVEGICUS, {"A": 3.0}),
+}
+ORTHOLOGS = {"A": ["M1", "M2"], "B": ["M1"], "C": ["M3"], "D": ["M2"]}
+
+
+def _fake_api(monkeypatch) -> dict:
+    """Replace the API functions used by the mappings with fakes."""
+    calls = {"orthologs": [], "mappings": [], "algorithms": 0}
+
+    def get(token, geneset_id) -> dict:
+        if geneset_id not in GENESETS:
+            raise GeneweaverAPIError("no geneset {}".format(geneset_id))
+        return {"geneset": {"species_id": int(GENESETS[geneset_id][0])}}
+
+    def get_values(token, geneset_id, gene_id_type, in_threshold) -> dict:
+        values = GENESETS[geneset_id][1]
+        return {"data": [{"symbol": k, "value": v} for k, v in values.items()]}
+
+    def ortholog_mapping(identifiers, to_species, algorithm_id=None) -> list:
+        calls["orthologs"].append(list(identifiers))
+        return [
+            {"from_gene": g, "to_gene": t}
+            for g in sorted(identifiers)
+            for t in ORTHOLOGS.get(g, [])
+        ]
+
+    def mappings(token, source_ids, target_id_type, species) -> dict:
+        calls["mappings"].append(list(source_ids))
+        return {
+            "gene_ids_map": [
+                {"original_ref_id": s, "mapped_ref_id": "E" + s}
+                for s in sorted(source_ids)
+            ]
+        }
+
+    def algorithm_id_from_name(name) -> int:
+        calls["algorithms"] += 1
+        return 3
+
+    monkeypatch.setattr(mapping.genesets, "get", get)
+    monkeypatch.setattr(mapping.genesets, "get_values", get_values)
+    monkeypatch.setattr(mapping.aon, "ortholog_mapping", ortholog_mapping)
+    monkeypatch.setattr(mapping.aon, "algorithm_id_from_name", algorithm_id_from_name)
+    monkeypatch.setattr(mapping.genes, "mappings", mappings)
+    return calls
+
+
+def test_ensembl_mouse_mappings(monkeypatch):
+    """Test the batch gives the single results, looking each gene up once."""
+    calls = _fake_api(monkeypatch)
+    ids = [1, 2, 3, 4, 5]
+    expected = {
+        i: mapping.ensembl_mouse_mapping("tok", i, True, OrthologAlgorithms.PANTHER)
+        for i in (1, 2, 3, 5)
+    }
+    calls.update(orthologs=[], mappings=[], algorithms=0)
+
+    results = list(
+        mapping.ensembl_mouse_mappings(
+            "tok", ids, True, OrthologAlgorithms.PANTHER, chunk_size=2
+        )
+    )
+
+    assert sorted(r.geneset_id for r in results) == ids
+    for result in results:
+        if result.geneset_id == 4:
+            assert isinstance(result.error, GeneweaverAPIError)
+        else:
+            assert result.result == expected[result.geneset_id]
+    # Human and rat genes are looked up apart, each gene once per species.
+    assert sorted(g for chunk in calls["orthologs"] for g in chunk) == [
+        "A",
+        "A",
+        "B",
+        "C",
+        "D",
+    ]
+    assert max(len(chunk) for chunk in calls["orthologs"]) <= 2
+    assert sorted(g for chunk in calls["mappings"] for g in chunk) == [
+        "M1",
+        "M2",
+        "M3",
+    ]
+    assert calls["algorithms"] == 1
+
+
+def test_ensembl_mouse_mappings_break_ties_as_single(monkeypatch):
+    """Test a tie is broken by the geneset's own symbol order in the batch."""
+    _fake_api(monkeypatch)
+    monkeypatch.setitem(GENESETS, 6, (Species.HOMO_SAPIENS, {"B": -1.0, "A": 1.0}))
+    single = {i: mapping.ensembl_mouse_mapping("tok", i, True) for i in (1, 6)}
+    results = mapping.ensembl_mouse_mappings("tok", [1, 6], True, concurrency=1)
+
+    assert {r.geneset_id: r.result for r in results} == single
+    assert {"symbol": "EM1", "value": -1.0} in single[6]
+
+
+def test_ensembl_mouse_mappings_lookup_errors(monkeypatch):
+    """Test a failed lookup fails its geneset only."""
+    _fake_api(monkeypatch)
+    ortholog_mapping = mapping.aon.ortholog_mapping
+
+    def failing(identifiers, to_species, algorithm_id=None) -> list:
+        if "C" in identifiers:
+            raise GeneweaverAPIError("AON is down")
+        return ortholog_mapping(identifiers, to_species, algorithm_id)
+
+    monkeypatch.setattr(mapping.aon, "ortholog_mapping", failing)
+    results = {
+        r.geneset_id: r
+        for r in mapping.ensembl_mouse_mappings("tok", [1, 2, 3, 5], True)
+    }
+
+    assert str(results[1].error) == "AON is down"
+    assert results[1].result is None
+    for geneset_id in (2, 3, 5):
+        assert results[geneset_id].error is None
+        assert results[geneset_id].result == mapping.ensembl_mouse_mapping(
+            "tok", geneset_id, True
+        )
+
+
+def test_ensembl_mouse_mappings_with_cache(monkeypatch):
+    """Test the batch fills and then uses a mapping cache."""
+    calls = _fake_api(monkeypatch)
+    cache = MappingCache(":memory:")
+    first = list(mapping.ensembl_mouse_mappings("tok", [1, 2], True, cache=cache))
+    requests = len(calls["orthologs"]), len(calls["mappings"])
+    second = list(mapping.ensembl_mouse_mappings("tok", [2, 1], True, cache=cache))
+
+    assert {r.geneset_id: r.result for r in first} == {
+        r.geneset_id: r.result for r in second
+    }
+    assert sorted(g for chunk in calls["orthologs"] for g in chunk) == list("ABCD")
+    assert (len(calls["orthologs"]), len(calls["mappings"])) == requests
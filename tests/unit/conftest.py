@@ -23,6 +23,8 @@ from numpy.random import Generator
 from pandas import DataFrame
 from requests.exceptions import HTTPError
 
+from .stub_server import StubServer
+
 
 @pytest.fixture(scope="session", autouse=True)
 def test_client():
@@ -59,6 +61,22 @@ def test_client():
     return test_client
 
 
+@pytest.fixture(scope="session")
+def shared_stub_server():
+    """Run one local stub server for the whole test session."""
+    server = StubServer()
+    yield server
+    server.stop()
+
+
+@pytest.fixture()
+def stub_server(shared_stub_server):
+    """Yield the local stub server with no routes registered."""
+    shared_stub_server.reset()
+    yield shared_stub_server
+    shared_stub_server.reset()
+
+
 class MockGeneExpressionDatabaseClient(GeneExpressionDatabaseClient):
     """Mock Client.
 
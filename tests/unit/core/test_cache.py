@@ -0,0 +1,197 @@
+"""Test the on-disk FrameCache."""
+
+import os
+import time
+
+import numpy
+import pandas
+import pytest
+from geneweaver.client.core.cache import (
+    FrameCache,
+    MappingCache,
+    ResponseCache,
+    cache_key,
+)
+from pandas.testing import assert_frame_equal
+
+
+@pytest.fixture()
+def frame():
+    """Build a frame with text, float, int and missing values."""
+    return pandas.DataFrame(
+        {
+            "geneid": ["ENSMUSG1", "ENSMUSG2", "ENSMUSG1", numpy.nan],
+            "exprvalue": [0.5, -1.25, 2.0, numpy.nan],
+            "count": [1, 2, 3, 4],
+        }
+    )
+
+
+def test_cache_key_depends_on_every_part():
+    """Test the key is stable and separates its parts."""
+    assert cache_key("a", "b") == cache_key("a", "b")
+    assert cache_key("a", "b") != cache_key("ab", "")
+    assert cache_key("a", None) == cache_key("a", "")
+
+
+def test_round_trip(tmp_path, frame):
+    """Test a stored frame is loaded back with equal values."""
+    cache = FrameCache(tmp_path)
+    assert cache.get(("ingest", "v1")) is None
+
+    cache.put(("ingest", "v1"), frame)
+    loaded = cache.get(("ingest", "v1"))
+
+    assert ("ingest", "v1") in cache
+    assert ("ingest", "v2") not in cache
+    assert_frame_equal(loaded.astype({"geneid": object}), frame, check_dtype=False)
+    assert isinstance(loaded["geneid"].dtype, pandas.CategoricalDtype)
+
+
+def test_numeric_columns_are_memory_mapped(tmp_path, frame):
+    """Test numeric columns are views onto the files on disk."""
+    cache = FrameCache(tmp_path)
+    cache.put(("ingest", "v1"), frame)
+    loaded = cache.get(("ingest", "v1"))
+    values = loaded["exprvalue"].to_numpy()
+    assert isinstance(values.base, numpy.memmap) or isinstance(values, numpy.memmap)
+
+
+def test_put_replaces_entry(tmp_path, frame):
+    """Test storing the same key twice keeps the latest frame."""
+    cache = FrameCache(tmp_path)
+    cache.put(("ingest", "v1"), frame)
+    cache.put(("ingest", "v1"), frame.head(2))
+    assert len(cache.get(("ingest", "v1"))) == 2
+    assert not [p for p in tmp_path.iterdir() if p.name.startswith(".")]
+
+
+def test_least_recently_used_is_evicted(tmp_path, frame):
+    """Test the entry used longest ago is evicted first."""
+    cache = FrameCache(tmp_path)
+    cache.put(("a",), frame)
+    entry_size = cache.size
+    cache.max_bytes = entry_size * 2
+
+    cache.put(("b",), frame)
+    os.utime(tmp_path / cache_key("a"), (1, 1))
+    os.utime(tmp_path / cache_key("b"), (2, 2))
+    # Reading "a" makes it the most recently used entry.
+    cache.get(("a",))
+
+    cache.put(("c",), frame)
+    assert ("a",) in cache
+    assert ("b",) not in cache
+    assert ("c",) in cache
+    assert cache.size <= cache.max_bytes
+
+
+def test_new_entry_is_never_evicted(tmp_path, frame):
+    """Test an entry larger than the limit is kept until the next put."""
+    cache = FrameCache(tmp_path, max_bytes=1)
+    cache.put(("a",), frame)
+    assert ("a",) in cache
+    cache.put(("b",), frame)
+    assert ("a",) not in cache
+    assert ("b",) in cache
+
+
+def test_mixed_object_columns_keep_their_values(tmp_path):
+    """Test object columns which are not text are not coerced to str."""
+    cache = FrameCache(tmp_path)
+    mixed = pandas.DataFrame({"mixed": pandas.Series([1, "a", numpy.nan, 2.5])})
+    cache.put(("m",), mixed)
+    loaded = cache.get(("m",))
+    assert loaded["mixed"].dtype == object
+    assert_frame_equal(loaded, mixed)
+
+
+def test_clear(tmp_path, frame):
+    """Test clear removes every entry."""
+    cache = FrameCache(tmp_path)
+    cache.put(("a",), frame)
+    cache.put(("b",), frame)
+    cache.clear()
+    assert cache.size == 0
+    assert cache.get(("a",)) is None
+
+
+def test_default_directory(monkeypatch, tmp_path):
+    """Test the cache defaults to the client cache directory."""
+    monkeypatch.setattr("geneweaver.client.core.cache.get_cache_dir", lambda: tmp_path)
+    assert FrameCache().directory == tmp_path / "frames"
+
+
+def test_response_cache_ttl_and_persistence(tmp_path, monkeypatch):
+    """Test entries expire after the ttl and are reloaded from disk."""
+    cache = ResponseCache(tmp_path, ttl=60)
+    assert cache.get("http://gedb/meta/distinct/tissue") is None
+
+    entry = cache.put("http://gedb/meta/distinct/tissue", ["heart"], etag='"v1"')
+    assert cache.is_fresh(entry)
+
+    reloaded = ResponseCache(tmp_path, ttl=60).get("http://gedb/meta/distinct/tissue")
+    assert reloaded == entry
+
+    monkeypatch.setattr("time.time", lambda: entry.stored + 61)
+    assert not cache.is_fresh(reloaded)
+    assert cache.is_fresh(cache.refresh("http://gedb/meta/distinct/tissue"))
+
+
+def test_response_cache_in_memory_only(tmp_path):
+    """Test a cache which does not persist writes nothing to disk."""
+    cache = ResponseCache(tmp_path / "responses", persist=False)
+    cache.put("key", {"a": 1})
+    assert cache.get("key").body == {"a": 1}
+    assert not (tmp_path / "responses").exists()
+
+
+def test_response_cache_invalidate(tmp_path):
+    """Test single keys, or every key, can be invalidated."""
+    cache = ResponseCache(tmp_path)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("c", 3)
+
+    cache.invalidate("a", "missing")
+    assert cache.get("a") is None
+    assert ResponseCache(tmp_path).get("b").body == 2
+
+    cache.invalidate()
+    assert cache.get("b") is None
+    assert ResponseCache(tmp_path).get("c") is None
+    assert cache.refresh("c") is None
+
+
+def test_mapping_cache_lookup(tmp_path):
+    """Test looked up genes, with or without edges, are known across opens."""
+    cache = MappingCache(tmp_path)
+    cache.store("ortholog", "10090:None", ["a", "b", "c"], [("a", "x"), ("a", "y")])
+    cache.store("ortholog", "10090:7", ["a"], [("a", "z")])
+    cache.close()
+
+    cache = MappingCache(tmp_path)
+    edges, missing = cache.lookup("ortholog", "10090:None", ["d", "a", "b", "a"])
+    assert edges == [("a", "x"), ("a", "y")]
+    assert missing == ["d"]
+    assert cache.lookup("ortholog", "10090:7", ["a", "b"]) == ([("a", "z")], ["b"])
+
+    cache.store("ortholog", "10090:None", ["a"], [("a", "w")])
+    assert cache.lookup("ortholog", "10090:None", ["a"]) == ([("a", "w")], [])
+
+    cache.clear("ortholog")
+    assert cache.lookup("ortholog", "10090:7", ["a"]) == ([], ["a"])
+
+
+def test_mapping_cache_ttl_and_batches(monkeypatch):
+    """Test lookups expire, and many genes are looked up in batches."""
+    cache = MappingCache(":memory:", ttl=60)
+    genes = ["g{}".format(i) for i in range(1200)]
+    cache.store("identifier", "s", genes, [(g, g.upper()) for g in genes[::2]])
+    edges, missing = cache.lookup("identifier", "s", genes)
+    assert len(edges) == 600
+    assert missing == []
+
+    now = time.time()
+    monkeypatch.setattr("time.time", lambda: now + 61)
+    assert cache.lookup("identifier", "s", genes[:3]) == ([], genes[:3])
@@ -0,0 +1,153 @@
+"""Test the pluggable JSON decoder and its use by the HTTP clients."""
+
+import json
+import random
+import time
+
+import pytest
+import requests
+from geneweaver.client.api import genesets
+from geneweaver.client.core import decode
+from geneweaver.client.core.http import DecodedResponse
+from geneweaver.client.gedb import DataRequest, GeneExpressionDatabaseClient
+
+
+@pytest.fixture()
+def counting_decoder():
+    """Plug in a decoder which counts its calls, restoring the default after."""
+    calls = []
+
+    def loads(data) -> object:
+        calls.append(len(data))
+        return json.loads(data)
+
+    decode.set_json_decoder(loads, name="counting")
+    yield calls
+    decode.set_json_decoder()
+
+
+def _values_payload(size: int) -> bytes:
+    rng = random.Random(0)
+    data = [
+        {"symbol": "ENSMUSG{:011d}".format(i), "value": rng.uniform(-5, 5)}
+        for i in range(size)
+    ]
+    return json.dumps({"data": data}).encode()
+
+
+def _search_expression_payload(strains: int, individuals: int, genes: int) -> bytes:
+    rng = random.Random(0)
+    gene_ids = ["ENSMUSG{:011d}".format(i) for i in range(genes)]
+    data = [
+        {
+            "strain": "strain{}".format(s),
+            "gene_ids": gene_ids,
+            "gene_names": gene_ids,
+            "strain_expressions": {
+                "s{}@Female".format(i): [rng.random() for _ in range(genes)]
+                for i in range(individuals)
+            },
+        }
+        for s in range(strains)
+    ]
+    return json.dumps(data).encode()
+
+
+def test_default_backend_is_fastest_installed():
+    """Test the default is the first importable backend."""
+    assert decode.json_decoder_name() in decode.BACKENDS
+    assert decode.loads(b'{"a": [1, 2.5]}') == {"a": [1, 2.5]}
+    assert decode.loads('{"a": null}') == {"a": None}
+
+
+def test_set_json_decoder(counting_decoder):
+    """Test a plugged in decoder is used and reported."""
+    assert decode.json_decoder_name() == "counting"
+    assert decode.loads(b"[1]") == [1]
+    assert counting_decoder == [3]
+
+
+def test_decoded_response_falls_back_with_kwargs():
+    """Test keyword arguments are handed to the requests implementation."""
+    response = DecodedResponse()
+    response._content = b'{"a": 1.5}'
+    response.status_code = 200
+    assert response.json() == {"a": 1.5}
+    assert response.json(parse_float=str) == {"a": "1.5"}
+
+
+@pytest.mark.parametrize("backend", decode.BACKENDS)
+def test_malformed_body_raises_requests_error(backend):
+    """Test every decoder raises the JSONDecodeError of requests."""
+    pytest.importorskip(backend)
+    decode.set_json_decoder(__import__(backend).loads, name=backend)
+    try:
+        response = DecodedResponse()
+        response._content = b'{"a": '
+        response.status_code = 200
+        with pytest.raises(requests.exceptions.JSONDecodeError):
+            response.json()
+    finally:
+        decode.set_json_decoder()
+
+
+def test_declared_charset_is_respected(counting_decoder):
+    """Test a body in another charset is decoded as text by requests."""
+    response = DecodedResponse()
+    response._content = '{"name": "Sm\u00f6"}'.encode("utf-16")
+    response.status_code = 200
+    response.encoding = "utf-16"
+    assert response.json() == {"name": "Sm\u00f6"}
+    assert counting_decoder == []
+
+    response.encoding = "UTF8"
+    response._content = b'{"a": 1}'
+    assert response.json() == {"a": 1}
+    assert counting_decoder == [8]
+
+
+def test_api_calls_use_decoder(stub_server, monkeypatch, counting_decoder):
+    """Test the API session utilities decode with the plugged in decoder."""
+    monkeypatch.setattr("geneweaver.client.api.utils.settings.API_URL", stub_server.url)
+    stub_server.routes[("GET", "/genesets/1/values")] = (200, _values_payload(10))
+    result = genesets.get_values("token", 1)
+    assert len(result["data"]) == 10
+    assert len(counting_decoder) == 1
+
+
+def test_gedb_calls_use_decoder(stub_server, counting_decoder):
+    """Test the GEDB client decodes with the plugged in decoder."""
+    stub_server.routes[("POST", "/gene/expression/search-expression")] = (
+        200,
+        _search_expression_payload(2, 2, 5),
+    )
+    with GeneExpressionDatabaseClient(stub_server.url) as client:
+        results = client.search_expression(DataRequest(tissue="maxilla"))
+    assert len(results) == 2
+    assert len(counting_decoder) == 1
+
+
+@pytest.mark.parametrize(
+    ("name", "build", "args"),
+    [
+        ("get_values 50k genes", _values_payload, (50000,)),
+        ("search_expression 100x5x1000", _search_expression_payload, (100, 5, 1000)),
+    ],
+)
+def test_decoder_benchmark(name, build, args):
+    """Compare the standard library decoder with the default one."""
+    payload = build(*args)
+    b4 = time.perf_counter()
+    expected = json.loads(payload)
+    stdlib = time.perf_counter() - b4
+
+    b4 = time.perf_counter()
+    result = decode.loads(payload)
+    fastest = time.perf_counter() - b4
+
+    print(
+        "\n{} ({:.1f}MB): json {:.4f}s {} {:.4f}s".format(
+            name, len(payload) / 1e6, stdlib, decode.json_decoder_name(), fastest
+        )
+    )
+    assert result == expected
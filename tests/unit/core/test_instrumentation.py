@@ -0,0 +1,167 @@
+"""Test the per-call events of the HTTP clients and their summary."""
+
+import asyncio
+import json
+from typing import List
+
+import pytest
+from geneweaver.client.api.utils import sessionmanager
+from geneweaver.client.core import instrumentation
+from geneweaver.client.core.http import create_session
+from geneweaver.client.gedb import DataRequest, GeneExpressionDatabaseClient
+from geneweaver.client.gedb_async import AsyncGeneExpressionDatabaseClient
+from requests.exceptions import HTTPError
+
+SEARCH = "/gene/expression/search"
+
+
+@pytest.fixture()
+def events():
+    """Collect the events of every call made during a test."""
+    collected: List[instrumentation.CallEvent] = []
+    instrumentation.add_listener(collected.append)
+    yield collected
+    instrumentation.remove_listener(collected.append)
+
+
+def _request() -> DataRequest:
+    return DataRequest(geneIds=["g1"], strains=["*"], tissue="heart")
+
+
+def test_no_listener_no_events(stub_server):
+    """Test calls are not measured while nobody listens."""
+    assert not instrumentation.active()
+    stub_server.add_json("GET", "/meta/distinct/tissue", ["heart"])
+    with GeneExpressionDatabaseClient(stub_server.url) as client:
+        assert client.distinct("tissue") == ["heart"]
+
+
+def test_gedb_event(stub_server, events):
+    """Test a GEDB call reports its size, status, latency and decode time."""
+    body = json.dumps(["heart", "liver"]).encode()
+    stub_server.routes[("GET", "/meta/distinct/tissue")] = (200, body)
+    with GeneExpressionDatabaseClient(stub_server.url) as client:
+        assert client.distinct("tissue") == ["heart", "liver"]
+
+    (event,) = events
+    assert event.service == "gedb"
+    assert event.method == "GET"
+    assert event.endpoint == "/meta/distinct/tissue"
+    assert event.status == 200
+    assert event.bytes_out == 0
+    assert event.bytes_in == len(body)
+    assert event.latency > 0
+    assert event.decode_time > 0
+    assert event.error is None
+
+
+def test_retries_are_counted(stub_server, events):
+    """Test each attempt of a retried search is numbered."""
+    stub_server.routes[("POST", SEARCH)] = [
+        (502, b"{}"),
+        (200, b'[{"strain": "A/J", "values": [1.0]}]'),
+    ]
+    with GeneExpressionDatabaseClient(stub_server.url, backoff_factor=0) as client:
+        client.search(_request())
+
+    assert [(e.status, e.retries) for e in events] == [(502, 0), (200, 1)]
+    assert events[0].bytes_out > 0
+    assert events[0].decode_time == 0
+
+
+def test_api_error_event(stub_server, events):
+    """Test a call raising in the sessionmanager still reports its status."""
+    stub_server.add_json("GET", "/api/genesets/1", {"detail": "no"}, status=404)
+    with pytest.raises(Exception, match="Geneweaver API"):
+        with sessionmanager() as session:
+            session.get(stub_server.url + "/api/genesets/1")
+
+    (event,) = events
+    assert event.status == 404
+    assert event.error == "HTTPError"
+    assert event.service == "127.0.0.1"
+
+
+def test_streamed_body_is_not_read(stub_server, events):
+    """Test a streamed response is left for the caller to read."""
+    stub_server.add_json("GET", "/big", [1, 2, 3])
+    session = create_session(service="test")
+    response = session.get(stub_server.url + "/big", stream=True)
+    assert events[0].bytes_in is None
+    assert response.json() == [1, 2, 3]
+
+
+def test_async_gedb_event(stub_server, events):
+    """Test the asyncio client reports its calls too."""
+    stub_server.add_json("GET", "/meta/distinct/tissue", ["heart"])
+    stub_server.add_json("POST", SEARCH, {"detail": "bad"}, status=500)
+
+    async def run() -> None:
+        async with AsyncGeneExpressionDatabaseClient(stub_server.url) as client:
+            await client.distinct("tissue")
+            with pytest.raises(Exception):  # noqa: B017, PT011
+                await client.search(_request())
+
+    asyncio.run(run())
+    assert [(e.method, e.status) for e in events] == [("GET", 200), ("POST", 500)]
+    assert events[0].decode_time > 0
+    assert events[1].error == "ClientResponseError"
+
+
+def test_timing_summary(stub_server):
+    """Test the summary totals calls per endpoint."""
+    stub_server.add_json("GET", "/meta/distinct/tissue", ["heart"])
+    stub_server.routes[("POST", SEARCH)] = (500, b"{}")
+    summary = instrumentation.add_listener(instrumentation.TimingSummary())
+    try:
+        with GeneExpressionDatabaseClient(stub_server.url) as client:
+            client.distinct("tissue")
+            client.invalidate_metadata()
+            client.distinct("tissue")
+            with pytest.raises(HTTPError):
+                client.search(_request())
+    finally:
+        instrumentation.remove_listener(summary)
+
+    totals = summary.totals[("gedb", "GET", "/meta/distinct/tissue")]
+    assert totals.calls == 2
+    assert totals.errors == 0
+    assert summary.totals[("gedb", "POST", SEARCH)].errors == 1
+    report = summary.report()
+    assert "/meta/distinct/tissue" in report
+    assert len(report.splitlines()) == 3
+
+
+def test_opentelemetry_spans():
+    """Test events become spans on a tracer."""
+
+    class Span:
+        def __init__(self, name: str, start_time: int) -> None:
+            self.name, self.start, self.attributes = name, start_time, {}
+
+        def set_attribute(self, key: str, value: object) -> None:
+            self.attributes[key] = value
+
+        def end(self, end_time: int) -> None:
+            self.end_time = end_time
+
+    class Tracer:
+        spans: List[Span] = []
+
+        def start_span(self, name: str, start_time: int) -> Span:
+            self.spans.append(Span(name, start_time))
+            return self.spans[-1]
+
+    tracer = Tracer()
+    listener = instrumentation.use_opentelemetry(tracer)
+    try:
+        with instrumentation.record("aon", "GET", "http://x/api/genes?a=1") as event:
+            event.status = 200
+    finally:
+        instrumentation.remove_listener(listener)
+
+    (span,) = tracer.spans
+    assert span.name == "aon GET /api/genes"
+    assert span.attributes["http.status_code"] == 200
+    assert "http.response_content_length" not in span.attributes
+    assert span.end_time >= span.start
@@ -0,0 +1,220 @@
+"""Test the retry policy and circuit breaker."""
+
+import io
+import random
+from typing import List
+
+import pytest
+import requests
+from geneweaver.client.core.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    backoff_delay,
+)
+
+
+class FakeClock:
+    """A clock which only moves when told to."""
+
+    def __init__(self) -> None:
+        """Start at zero."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Get the current time."""
+        return self.now
+
+
+def _response(status: int, headers: dict = None) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    response._content = b"{}"
+    response.raw = io.BytesIO()
+    return response
+
+
+def _sender(outcomes: list) -> tuple:
+    sent: List[int] = []
+
+    def send() -> requests.Response:
+        outcome = outcomes[min(len(sent), len(outcomes) - 1)]
+        sent.append(1)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return _response(*outcome) if isinstance(outcome, tuple) else _response(outcome)
+
+    return send, sent
+
+
+def test_backoff_delay_is_jittered_and_capped():
+    """Test delays stay under an exponentially growing, capped ceiling."""
+    rng = random.Random(0)
+    for attempt in range(10):
+        delays = [backoff_delay(attempt, 0.5, 8.0, rng) for _ in range(200)]
+        assert max(delays) <= min(8.0, 0.5 * 2**attempt)
+        assert min(delays) >= 0
+        assert len(set(delays)) > 1
+
+
+def test_breaker_opens_half_opens_and_closes():
+    """Test the breaker walks through its states and reports them."""
+    clock, events = FakeClock(), []
+    breaker = CircuitBreaker(
+        failure_threshold=2,
+        reset_timeout=10,
+        metrics=lambda event, details: events.append((event, dict(details))),
+        clock=clock,
+    )
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError, match="resume in 10.0s"):
+        breaker.before_call()
+
+    clock.now = 10
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 20
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+
+    states = [d["state"] for e, d in events if e == "breaker_state"]
+    assert states == ["open", "open", "closed"]
+    assert [e for e, _ in events].count("breaker_rejected") == 2
+
+
+def test_policy_retries_transient_failures():
+    """Test connection errors and retryable statuses are retried."""
+    sleeps, events = [], []
+    policy = RetryPolicy(
+        retries=3,
+        backoff_factor=1,
+        metrics=lambda event, details: events.append((event, dict(details))),
+        sleep=sleeps.append,
+    )
+    send, sent = _sender(
+        [requests.ConnectionError(), 502, (429, {"Retry-After": "7"}), 200]
+    )
+    assert policy.call(send, "http://gedb/search").status_code == 200
+    assert len(sent) == 4
+    assert sleeps[0] <= 1
+    assert sleeps[1] <= 2
+    assert sleeps[2] == 7
+    retries = [d for e, d in events if e == "retry"]
+    assert [d["reason"] for d in retries] == ["ConnectionError", 502, 429]
+    assert [d["attempt"] for d in retries] == [1, 2, 3]
+
+
+def test_policy_gives_up():
+    """Test the last response is returned, or the last error raised."""
+    events = []
+    policy = RetryPolicy(
+        retries=2,
+        backoff_factor=0,
+        metrics=lambda event, details: events.append((event, dict(details))),
+    )
+    send, sent = _sender([503])
+    assert policy.call(send, "u").status_code == 503
+    assert len(sent) == 3
+    assert events[-1] == ("give_up", {"url": "u", "attempts": 3, "reason": 503})
+
+    send, sent = _sender([requests.Timeout()])
+    with pytest.raises(requests.Timeout):
+        policy.call(send, "u", retries=0)
+    assert len(sent) == 1
+
+
+def test_policy_does_not_retry_other_statuses():
+    """Test a 500 or 404 is returned at once."""
+    policy = RetryPolicy(backoff_factor=0)
+    for status in (200, 404, 500):
+        send, sent = _sender([status])
+        assert policy.call(send, "u").status_code == status
+        assert len(sent) == 1
+
+
+def test_breaker_stops_retries_when_open():
+    """Test an open breaker rejects the remaining attempts of a call."""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    policy = RetryPolicy(retries=5, backoff_factor=0, breaker=breaker)
+    send, sent = _sender([requests.ConnectionError()])
+    with pytest.raises(CircuitOpenError):
+        policy.call(send, "u")
+    assert len(sent) == 2
+
+    with pytest.raises(CircuitOpenError):
+        policy.call(send, "u")
+    assert len(sent) == 2
+
+
+def test_rate_limits_do_not_open_the_breaker():
+    """Test 429s are retried without counting as the service being down."""
+    breaker = CircuitBreaker(failure_threshold=1)
+    policy = RetryPolicy(retries=2, backoff_factor=0, breaker=breaker)
+    send, _ = _sender([429, 200])
+    assert policy.call(send, "u").status_code == 200
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.parametrize(
+    "outcome", [429, requests.exceptions.ChunkedEncodingError(), ValueError("bad")]
+)
+def test_half_open_trial_is_always_released(outcome):
+    """Test any trial outcome frees the breaker for later calls."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    policy = RetryPolicy(retries=0, backoff_factor=0, breaker=breaker)
+    breaker.record_failure()
+    clock.now = 10
+
+    send, sent = _sender([outcome])
+    if isinstance(outcome, Exception):
+        with pytest.raises(type(outcome)):
+            policy.call(send, "u")
+        # An exception counts as a failed trial, reopening the breaker.
+        assert breaker.state == CircuitBreaker.OPEN
+        clock.now = 20
+    else:
+        assert policy.call(send, "u").status_code == 429
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    send, sent = _sender([200])
+    assert policy.call(send, "u").status_code == 200
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_rate_limited_trial_retries_within_the_call():
+    """Test a 429 trial lets the next attempt of the same call through."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    policy = RetryPolicy(retries=2, backoff_factor=0, breaker=breaker)
+    breaker.record_failure()
+    clock.now = 10
+    send, sent = _sender([429, 200])
+    assert policy.call(send, "u").status_code == 200
+    assert len(sent) == 2
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_read_timeouts_can_be_left_unretried():
+    """Test a long running call gives up on a read timeout but not a connect one."""
+    policy = RetryPolicy(retries=3, backoff_factor=0)
+    send, sent = _sender([requests.exceptions.ReadTimeout()])
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        policy.call(send, "u", retry_read_timeout=False)
+    assert len(sent) == 1
+
+    send, sent = _sender([requests.exceptions.ConnectTimeout(), 200])
+    assert policy.call(send, "u", retry_read_timeout=False).status_code == 200
+    assert len(sent) == 2
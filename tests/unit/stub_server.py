@@ -0,0 +1,99 @@
+"""A small local HTTP server used to stub out remote services in tests."""
+
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Tuple, Union
+from urllib.parse import urlsplit
+
+Reply = Union[Tuple[int, bytes], Tuple[int, bytes, Dict[str, str]]]
+Route = Union[Reply, List[Reply], Callable[["StubHandler", bytes], Reply]]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answer requests from the routes registered on the StubServer."""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self) -> None:
+        """Count every new TCP connection made to the server."""
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.server.stub.connections += 1
+
+    def log_message(self, *args) -> None:  # noqa: ANN002
+        """Keep the test output quiet."""
+
+    def _reply(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+        stub: StubServer = self.server.stub
+        path = urlsplit(self.path).path
+        stub.requests.append((self.command, self.path, body))
+
+        route = stub.routes.get((self.command, path))
+        if route is None:
+            reply = 404, b'{"error": "not found"}'
+        elif callable(route):
+            reply = route(self, body)
+        elif isinstance(route, list):
+            reply = route.pop(0) if len(route) > 1 else route[0]
+        else:
+            reply = route
+
+        status, content = reply[0], reply[1]
+        headers = {"Content-Type": "application/json"}
+        headers.update(reply[2] if len(reply) > 2 else {})
+
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = _reply  # noqa: N815
+    do_POST = _reply  # noqa: N815
+
+
+class StubServer:
+    """A threaded HTTP server answering from a dict of routes.
+
+    Routes are keyed on (method, path). A route is either a (status, body)
+    tuple with an optional third dict of extra headers, a list of them which
+    are answered in turn (the last one repeats), or a callable taking the
+    handler and request body.
+    """
+
+    def __init__(self) -> None:
+        """Start the server on a free local port."""
+        self.routes: Dict[Tuple[str, str], Route] = {}
+        self.requests: List[Tuple[str, str, bytes]] = []
+        self.connections = 0
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.stub = self
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def url(self) -> str:
+        """The base URL of the server."""
+        host, port = self._httpd.server_address
+        return "http://{}:{}".format(host, port)
+
+    def add_json(self, method: str, path: str, data: object, status: int = 200):
+        """Answer a route with a JSON encoded object."""
+        self.routes[(method, path)] = (status, json.dumps(data).encode())
+
+    def reset(self) -> None:
+        """Forget the routes, requests and connections seen so far."""
+        self.routes.clear()
+        self.requests.clear()
+        self.connections = 0
+
+    def stop(self) -> None:
+        """Stop serving."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
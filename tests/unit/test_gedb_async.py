@@ -0,0 +1,142 @@
+"""Test the asyncio GEDB client against a local stub server."""
+
+import asyncio
+import json
+import threading
+import time
+from typing import Callable, Tuple
+
+import aiohttp
+import pytest
+from geneweaver.client.gedb import DataRequest, DataResult, SourceType, StrainResult
+from geneweaver.client.gedb_async import (
+    AsyncGeneExpressionDatabaseClient,
+    gather_bounded,
+)
+
+TISSUES = ["heart", "liver", "maxilla", "striatum", "kidney", "ovary"]
+
+
+def _request(tissue: str) -> DataRequest:
+    return DataRequest(
+        geneIds=["ENSMUSG00000000001"],
+        strains=["*"],
+        sourceType=SourceType.IMPUTED.name,
+        tissue=tissue,
+    )
+
+
+def _slow_search(delay: float) -> Tuple[Callable, dict]:
+    """Echo the tissue back after a delay, recording peak concurrency."""
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0}
+
+    def route(handler, body) -> Tuple[int, bytes]:
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        time.sleep(delay)
+        with lock:
+            state["active"] -= 1
+        tissue = json.loads(body)["tissue"]
+        return 200, json.dumps([{"tissue": tissue, "values": [1.0]}]).encode()
+
+    return route, state
+
+
+def test_search_and_metadata(stub_server):
+    """Test each method returns the same result types as the sync client."""
+    stub_server.add_json("POST", "/gene/expression/search", [{"strain": "A/J"}])
+    stub_server.add_json(
+        "POST",
+        "/gene/expression/search-expression",
+        [{"strain": "A/J", "gene_ids": ["g1"], "strain_expressions": {"s1@Male": [1]}}],
+    )
+    stub_server.add_json("GET", "/meta/distinct/tissue", ["heart"])
+    stub_server.add_json(
+        "GET", "/meta/where/tissue/is/heart", [{"ingestid": "i1", "tissue": "heart"}]
+    )
+    stub_server.add_json("POST", "/bulk/random/spearmanrho/", [0.1, 0.2])
+    stub_server.routes[("GET", "/bulk/random/where/ingest/is/i1")] = (
+        200,
+        b"s1,0.5\ns1,0.25\ns2,0.1\ns2,0.3",
+    )
+
+    async def run() -> object:
+        async with AsyncGeneExpressionDatabaseClient(stub_server.url) as client:
+            return (
+                await client.search(_request("heart")),
+                await client.search_expression(_request("heart")),
+                await client.distinct("tissue"),
+                await client.get_meta("heart"),
+                await client.random("i1", 2, 2),
+                await client.random_spearmanrho("i1", [0.1, 0.2], r_size=2),
+            )
+
+    search, expression, distinct, meta, randoms, rhos = asyncio.run(run())
+    assert search == [DataResult(strain="A/J")]
+    assert isinstance(expression[0], StrainResult)
+    assert expression[0].strain_expressions == {"s1@Male": [1]}
+    assert distinct == ["heart"]
+    assert meta[0].ingestid == "i1"
+    assert len(randoms) == 2
+    assert list(randoms[1]["score"]) == [0.1, 0.3]
+    assert rhos == [0.1, 0.2]
+    assert stub_server.connections == 1
+
+
+def test_fan_out_is_bounded_and_ordered(stub_server):
+    """Test fan_out limits requests in flight and keeps the input order."""
+    route, state = _slow_search(0.1)
+    stub_server.routes[("POST", "/gene/expression/search")] = route
+
+    async def run() -> object:
+        async with AsyncGeneExpressionDatabaseClient(stub_server.url) as client:
+            return await client.fan_out(
+                client.search, [_request(t) for t in TISSUES], concurrency=2
+            )
+
+    b4 = time.perf_counter()
+    results = asyncio.run(run())
+    elapsed = time.perf_counter() - b4
+
+    assert [r[0].tissue for r in results] == TISSUES
+    assert state["peak"] == 2
+    # Three rounds of two concurrent requests, rather than six in series.
+    assert elapsed < 0.1 * len(TISSUES)
+
+
+def test_fan_out_defaults_to_client_concurrency(stub_server):
+    """Test the client concurrency is used when none is given."""
+    route, state = _slow_search(0.05)
+    stub_server.routes[("POST", "/gene/expression/search")] = route
+
+    async def run() -> object:
+        async with AsyncGeneExpressionDatabaseClient(
+            stub_server.url, concurrency=3
+        ) as client:
+            return await client.fan_out(client.search, [_request(t) for t in TISSUES])
+
+    asyncio.run(run())
+    assert state["peak"] == 3
+
+
+def test_errors_are_raised(stub_server):
+    """Test that a failing status raises a ClientResponseError."""
+
+    async def run() -> object:
+        async with AsyncGeneExpressionDatabaseClient(stub_server.url) as client:
+            await client.distinct("NOT-THERE")
+
+    with pytest.raises(aiohttp.ClientResponseError):
+        asyncio.run(run())
+
+
+def test_gather_bounded_empty():
+    """Test that no items gives no results."""
+
+    async def double(x) -> int:
+        return x * 2
+
+    assert asyncio.run(gather_bounded(double, [], 2)) == []
+    assert asyncio.run(gather_bounded(double, [1, 2, 3], 1)) == [2, 4, 6]
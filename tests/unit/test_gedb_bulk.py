@@ -0,0 +1,150 @@
+"""Test streaming bulk expression data from the GEDB client."""
+
+import gzip
+from typing import Iterator
+
+import pandas
+import pytest
+from geneweaver.client.core.cache import FrameCache
+from geneweaver.client.gedb import GeneExpressionDatabaseClient
+from pandas.testing import assert_frame_equal
+from requests.exceptions import HTTPError
+
+INGEST_ID = "95c8aa44-5d5a-42d9-9f10-33a20904ad1e"
+BULK_PATH = "/bulk/all/where/ingest/is/" + INGEST_ID
+ROWS = 1050
+
+
+def _bulk_csv() -> bytes:
+    lines = ["geneid,genename,exprvalue,weightvalue"]
+    for i in range(ROWS):
+        lines.append("ENSMUSG{:011d},Gene{},{},{}".format(i, i, i / 7, i % 5))
+    return ("\n".join(lines) + "\n").encode()
+
+
+@pytest.fixture()
+def bulk_client(stub_server):
+    """Yield a client with bulk data for INGEST_ID on the stub server."""
+    stub_server.routes[("GET", BULK_PATH)] = (200, _bulk_csv(), {})
+    with GeneExpressionDatabaseClient(stub_server.url) as client:
+        yield client
+
+
+def test_read_expression_data(bulk_client):
+    """Test the whole ingest is read into one frame."""
+    frame = bulk_client.read_expression_data(INGEST_ID)
+    assert len(frame) == ROWS
+    assert list(frame.columns) == ["geneid", "genename", "exprvalue", "weightvalue"]
+
+
+def test_iter_expression_data_chunks(bulk_client):
+    """Test the ingest is yielded in bounded chunks which add up to the whole."""
+    chunks = list(bulk_client.iter_expression_data(INGEST_ID, chunksize=100))
+    assert [len(c) for c in chunks] == [100] * 10 + [50]
+    assert_frame_equal(
+        pandas.concat(chunks, ignore_index=True),
+        bulk_client.read_expression_data(INGEST_ID),
+    )
+
+
+def test_iter_expression_data_stops_early(bulk_client):
+    """Test that callers can stop without reading every chunk."""
+    chunks = bulk_client.iter_expression_data(INGEST_ID, chunksize=10)
+    first = next(chunks)
+    chunks.close()
+    assert len(first) == 10
+    assert first["genename"][0] == "Gene0"
+
+
+def test_iter_expression_data_gzip(stub_server):
+    """Test a gzip encoded body is decoded while streaming."""
+    stub_server.routes[("GET", BULK_PATH)] = (
+        200,
+        gzip.compress(_bulk_csv()),
+        {"Content-Encoding": "gzip"},
+    )
+    with GeneExpressionDatabaseClient(stub_server.url) as client:
+        chunks = list(client.iter_expression_data(INGEST_ID, chunksize=500))
+    assert sum(len(c) for c in chunks) == ROWS
+
+
+def test_iter_expression_data_not_found(stub_server):
+    """Test a missing ingest raises before any chunk is yielded."""
+    with GeneExpressionDatabaseClient(stub_server.url) as client:
+        with pytest.raises(HTTPError):
+            next(client.iter_expression_data("NOT-THERE"))
+
+
+@pytest.mark.parametrize("file_format", ["parquet", "feather"])
+def test_download_expression_data(bulk_client, tmp_path, file_format):
+    """Test the ingest is written chunk by chunk to a columnar file."""
+    pytest.importorskip("pyarrow")
+    path = bulk_client.download_expression_data(
+        INGEST_ID, tmp_path / "bulk", file_format=file_format, chunksize=100
+    )
+    read = pandas.read_parquet if file_format == "parquet" else pandas.read_feather
+    assert_frame_equal(read(path), bulk_client.read_expression_data(INGEST_ID))
+
+
+@pytest.mark.parametrize("file_format", ["parquet", "feather"])
+def test_download_expression_data_changing_types(stub_server, tmp_path, file_format):
+    """Test columns whose parsed type changes between chunks are unified."""
+    pytest.importorskip("pyarrow")
+    lines = ["geneid,count,note"]
+    lines += ["g{},{},".format(i, i) for i in range(10)]
+    lines += ["g10,1.5,text", "g11,2,"]
+    stub_server.routes[("GET", BULK_PATH)] = (200, "\n".join(lines).encode(), {})
+    with GeneExpressionDatabaseClient(stub_server.url) as client:
+        path = client.download_expression_data(
+            INGEST_ID, tmp_path / "bulk", file_format=file_format, chunksize=5
+        )
+        whole = client.read_expression_data(INGEST_ID)
+
+    read = pandas.read_parquet if file_format == "parquet" else pandas.read_feather
+    written = read(path)
+    assert written["count"].dtype == "float64"
+    assert written["count"].tolist() == whole["count"].tolist()
+    assert written["note"].tolist() == [None] * 10 + ["text", None]
+    assert not [p for p in tmp_path.iterdir() if p.name != "bulk"]
+
+
+def test_download_expression_data_failure_removes_file(
+    bulk_client, tmp_path, monkeypatch
+):
+    """Test a download failing after the first chunk leaves no file."""
+    pytest.importorskip("pyarrow")
+    iter_expression_data = bulk_client.iter_expression_data
+
+    def dropped(ingest_id, chunksize) -> Iterator[pandas.DataFrame]:  # noqa: ANN001
+        chunks = iter_expression_data(ingest_id, chunksize)
+        yield next(chunks)
+        chunks.close()
+        raise ConnectionError("connection dropped")
+
+    monkeypatch.setattr(bulk_client, "iter_expression_data", dropped)
+    with pytest.raises(ConnectionError):
+        bulk_client.download_expression_data(INGEST_ID, tmp_path / "bulk", chunksize=5)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_download_expression_data_unknown_format(bulk_client, tmp_path):
+    """Test an unsupported format is rejected."""
+    pytest.importorskip("pyarrow")
+    with pytest.raises(ValueError, match="Unknown file format"):
+        bulk_client.download_expression_data(INGEST_ID, tmp_path / "b", "xlsx")
+
+
+def test_read_expression_data_cached(stub_server, tmp_path):
+    """Test a second read of an ingest comes from the cache, not the server."""
+    stub_server.routes[("GET", BULK_PATH)] = (200, _bulk_csv(), {})
+    cache = FrameCache(tmp_path)
+    with GeneExpressionDatabaseClient(stub_server.url, bulk_cache=cache) as client:
+        first = client.read_expression_data(INGEST_ID, "ridge_v1_2_1")
+        second = client.read_expression_data(INGEST_ID, "ridge_v1_2_1")
+        client.read_expression_data(INGEST_ID, "ridge_v2")
+
+    assert len(stub_server.requests) == 2
+    assert (INGEST_ID, "ridge_v1_2_1") in cache
+    # A miss returns the frame as a hit loads it, with the same dtypes.
+    assert_frame_equal(second, first)
+    assert isinstance(first["geneid"].dtype, pandas.CategoricalDtype)
@@ -0,0 +1,113 @@
+"""Test the columnar search result type."""
+
+import gzip
+import json
+import time
+
+import numpy
+import pytest
+from geneweaver.client.gedb import (
+    BaseGeneExpressionDatabaseClient,
+    ColumnarDataResult,
+    DataRequest,
+    DataResult,
+    GeneExpressionDatabaseClient,
+)
+
+
+@pytest.fixture(scope="module")
+def imputations():
+    """Load the recorded maxilla search response."""
+    with gzip.open("tests/unit/imputations.json.gz", "rb") as f:
+        return json.loads(f.read())
+
+
+def test_rows_match_data_results(imputations):
+    """Test every lazy row equals the DataResult built by search."""
+    client = BaseGeneExpressionDatabaseClient("http://localhost")
+    expected = client._data_results(imputations, columnar=False)
+    columnar = ColumnarDataResult.from_json(imputations)
+
+    assert len(columnar) == len(expected)
+    assert list(columnar) == expected
+    assert columnar[-1] == expected[-1]
+    assert columnar[10:13] == expected[10:13]
+
+
+def test_columns(imputations):
+    """Test the columns are flat NumPy arrays and Categoricals."""
+    columnar = ColumnarDataResult.from_json(imputations)
+    assert columnar.values.dtype == numpy.float64  # noqa: PD011
+    assert len(columnar.values) == 3 * len(imputations)
+    assert numpy.isnan(columnar.weights).all()
+    assert columnar.strains.categories.size == 657
+    assert columnar.gene_ids[0] == "ENSMUSG00000027204"
+    assert list(columnar.offsets[:3]) == [0, 3, 6]
+
+
+def test_to_frame(imputations):
+    """Test the long frame has one row per value."""
+    frame = ColumnarDataResult.from_json(imputations).to_frame()
+    assert len(frame) == 3 * len(imputations)
+    first = frame.iloc[0]
+    assert first["gene_id"] == "ENSMUSG00000027204"
+    assert first["strain"] == "C57BL/6J"
+    assert first["name"] == "s1"
+    assert first["sex"] == "Female"
+    assert first["value"] == imputations[0]["values"][0]
+
+
+def test_ragged_and_missing_fields():
+    """Test rows of different lengths, weights and missing fields."""
+    items = [
+        {"geneIds": ["g1"], "strain": "A/J", "values": [1.0, 2.0], "weights": [0.5, 1]},
+        {"geneIds": [], "values": []},
+        {"geneIds": ["g2"], "strain": "B6", "values": [3.0], "names": ["s1"]},
+    ]
+    columnar = ColumnarDataResult.from_json(items)
+    assert columnar[0] == DataResult(
+        values=[1.0, 2.0], weights=[0.5, 1.0], geneIds=["g1"], strain="A/J"
+    )
+    assert columnar[1] == DataResult(values=[], names=[], sexes=[])
+    assert columnar[2] == DataResult(
+        values=[3.0], names=["s1"], geneIds=["g2"], strain="B6"
+    )
+    with pytest.raises(IndexError):
+        columnar[3]
+
+
+def test_empty():
+    """Test an empty response."""
+    columnar = ColumnarDataResult.from_json([])
+    assert len(columnar) == 0
+    assert list(columnar) == []
+    assert len(columnar.to_frame()) == 0
+
+
+def test_search_columnar(stub_server, imputations):
+    """Test search returns columns when asked to."""
+    stub_server.add_json("POST", "/gene/expression/search", imputations[:50])
+    with GeneExpressionDatabaseClient(stub_server.url) as client:
+        columnar = client.search(DataRequest(tissue="maxilla"), columnar=True)
+        rows = client.search(DataRequest(tissue="maxilla"))
+    assert isinstance(columnar, ColumnarDataResult)
+    assert list(columnar) == rows
+
+
+def test_columnar_benchmark(imputations):
+    """Compare building DataResults with building columns."""
+    client = BaseGeneExpressionDatabaseClient("http://localhost")
+
+    b4 = time.perf_counter()
+    client._data_results(imputations, columnar=False)
+    rows = time.perf_counter() - b4
+
+    b4 = time.perf_counter()
+    ColumnarDataResult.from_json(imputations)
+    columns = time.perf_counter() - b4
+
+    print(
+        "\nBuild {} results: rows {:.4f}s columnar {:.4f}s".format(
+            len(imputations), rows, columns
+        )
+    )
@@ -0,0 +1,153 @@
+"""Test splitting searches for many genes into concurrent chunks."""
+
+import asyncio
+import json
+
+import numpy
+import pytest
+from geneweaver.client.gedb import (
+    DEFAULT_GENE_CHUNK_SIZE,
+    BaseGeneExpressionDatabaseClient,
+    DataRequest,
+    GeneExpressionDatabaseClient,
+)
+from geneweaver.client.gedb_async import AsyncGeneExpressionDatabaseClient
+
+GENES = ["ENSMUSG{:011d}".format(i) for i in range(25)]
+STRAINS = ["C57BL/6J", "DBA/2J"]
+
+
+def _expression(strain: str, individual: int, gene: str) -> float:
+    return float(len(strain) * 100 + individual * 10 + int(gene[-4:]))
+
+
+@pytest.fixture()
+def gene_server(stub_server):
+    """Answer search and search-expression for whichever genes are posted."""
+
+    def search(handler, body) -> tuple:  # noqa: ANN001
+        genes = json.loads(body)["geneIds"]
+        items = [
+            {"geneIds": [gene], "strain": strain, "values": [1.0]}
+            for gene in genes
+            for strain in STRAINS
+        ]
+        return 200, json.dumps(items).encode()
+
+    def search_expression(handler, body) -> tuple:  # noqa: ANN001
+        genes = json.loads(body)["geneIds"]
+        items = [
+            {
+                "strain": strain,
+                "gene_ids": genes,
+                "gene_names": [g.lower() for g in genes],
+                "strain_expressions": {
+                    "s{}@Female".format(i): [_expression(strain, i, g) for g in genes]
+                    for i in range(3)
+                },
+            }
+            for strain in STRAINS
+        ]
+        return 200, json.dumps(items).encode()
+
+    stub_server.routes[("POST", "/gene/expression/search")] = search
+    stub_server.routes[("POST", "/gene/expression/search-expression")] = (
+        search_expression
+    )
+    return stub_server
+
+
+def _posted_sizes(server) -> list:
+    return sorted(len(json.loads(body)["geneIds"]) for _, _, body in server.requests)
+
+
+def test_search_is_chunked_and_ordered(gene_server):
+    """Test a large search is posted in chunks and merged in gene order."""
+    drequest = DataRequest(geneIds=list(GENES), strains=STRAINS, tissue="heart")
+    with GeneExpressionDatabaseClient(gene_server.url, gene_chunk_size=None) as client:
+        whole = client.search(drequest)
+    gene_server.requests.clear()
+
+    with GeneExpressionDatabaseClient(gene_server.url, gene_chunk_size=10) as client:
+        chunked = client.search(drequest)
+        columnar = client.search(drequest, columnar=True)
+
+    assert chunked == whole
+    assert list(columnar) == whole
+    assert _posted_sizes(gene_server) == [5, 5, 10, 10, 10, 10]
+    assert drequest.geneIds == GENES
+
+
+def test_search_expression_merges_strains(gene_server):
+    """Test strain results are joined per strain across chunks."""
+    drequest = DataRequest(geneIds=list(GENES), strains=STRAINS, tissue="heart")
+    with GeneExpressionDatabaseClient(gene_server.url, gene_chunk_size=None) as client:
+        whole = client.search_expression(drequest)
+    with GeneExpressionDatabaseClient(gene_server.url, gene_chunk_size=7) as client:
+        chunked = client.search_expression(drequest)
+
+    assert chunked == whole
+    assert chunked[0].gene_ids == GENES
+    assert len(chunked[1].strain_expressions["s2@Female"]) == 25
+
+
+def test_chunking_is_opt_in(gene_server):
+    """Test a client splits no search unless given a chunk size."""
+    genes = ["ENSMUSG{:011d}".format(i) for i in range(DEFAULT_GENE_CHUNK_SIZE + 1)]
+    with GeneExpressionDatabaseClient(gene_server.url) as client:
+        client.search_expression(DataRequest(geneIds=genes, strains=STRAINS))
+    assert _posted_sizes(gene_server) == [len(genes)]
+
+
+def test_small_requests_are_not_split(gene_server):
+    """Test requests within the chunk size, or without genes, go as one call."""
+    with GeneExpressionDatabaseClient(gene_server.url, gene_chunk_size=25) as client:
+        client.search(DataRequest(geneIds=list(GENES), strains=STRAINS))
+    assert _posted_sizes(gene_server) == [25]
+
+    client = BaseGeneExpressionDatabaseClient("http://localhost", gene_chunk_size=2)
+    drequest = DataRequest(strains=STRAINS)
+    assert client._gene_chunks(drequest) == [drequest]
+
+
+def test_missing_individuals_are_padded():
+    """Test an individual absent from a chunk gets NaN for its genes."""
+    merged = BaseGeneExpressionDatabaseClient._merge_strain_items(
+        [
+            [{"strain": "A", "gene_ids": ["g1"], "strain_expressions": {"x": [1.0]}}],
+            [
+                {
+                    "strain": "A",
+                    "gene_ids": ["g2", "g3"],
+                    "strain_expressions": {"y": [2.0, 3.0]},
+                },
+                {"strain": "B", "gene_ids": ["g2"], "strain_expressions": {"z": [4.0]}},
+            ],
+        ]
+    )
+    assert [m["strain"] for m in merged] == ["A", "B"]
+    assert merged[0]["gene_ids"] == ["g1", "g2", "g3"]
+    x, y = merged[0]["strain_expressions"]["x"], merged[0]["strain_expressions"]["y"]
+    assert x[0] == 1.0
+    assert numpy.isnan(x[1:]).all()
+    assert numpy.isnan(y[0])
+    assert y[1:] == [2.0, 3.0]
+
+
+def test_async_search_is_chunked(gene_server):
+    """Test the async client splits and merges in the same way."""
+    drequest = DataRequest(geneIds=list(GENES), strains=STRAINS, tissue="heart")
+
+    async def run() -> object:
+        async with AsyncGeneExpressionDatabaseClient(
+            gene_server.url, gene_chunk_size=10
+        ) as client:
+            return (
+                await client.search(drequest),
+                await client.search_expression(drequest),
+            )
+
+    search, expression = asyncio.run(run())
+    assert [r.geneIds[0] for r in search[::2]] == GENES
+    assert expression[0].gene_ids == GENES
+    assert len(gene_server.requests) == 6
@@ -0,0 +1,130 @@
+"""Test the TTL cache of the GEDB metadata endpoints."""
+
+import asyncio
+import json
+
+import pytest
+from geneweaver.client.core.cache import ResponseCache
+from geneweaver.client.gedb import GeneExpressionDatabaseClient
+from geneweaver.client.gedb_async import AsyncGeneExpressionDatabaseClient
+
+META = [{"ingestid": "i1", "tissue": "heart", "modelversion": "v1"}]
+
+
+@pytest.fixture()
+def metadata_server(stub_server):
+    """Serve distinct and get_meta with an ETag, answering 304 when it matches."""
+
+    def distinct(handler, body) -> tuple:  # noqa: ANN001
+        if handler.headers.get("If-None-Match") == '"tissues-1"':
+            return 304, b"", {"ETag": '"tissues-1"'}
+        return 200, json.dumps(["heart"]).encode(), {"ETag": '"tissues-1"'}
+
+    stub_server.routes[("GET", "/meta/distinct/tissue")] = distinct
+    stub_server.add_json("GET", "/meta/where/tissue/is/heart", META)
+    return stub_server
+
+
+def _metadata_requests(server) -> int:
+    return sum(1 for _, path, _ in server.requests if path.startswith("/meta/"))
+
+
+def test_warm_start_makes_no_requests(metadata_server, tmp_path):
+    """Test a second client reads every metadata response from disk."""
+    with GeneExpressionDatabaseClient(
+        metadata_server.url, meta_cache=ResponseCache(tmp_path)
+    ) as client:
+        assert client.distinct("tissue") == ["heart"]
+        assert client.get_meta("heart")[0].ingestid == "i1"
+        assert client.distinct("tissue") == ["heart"]
+    assert _metadata_requests(metadata_server) == 2
+
+    with GeneExpressionDatabaseClient(
+        metadata_server.url, meta_cache=ResponseCache(tmp_path)
+    ) as client:
+        assert client.distinct("tissue") == ["heart"]
+        assert client.get_meta("heart")[0].modelversion == "v1"
+    assert _metadata_requests(metadata_server) == 2
+
+
+def test_expired_entries_are_revalidated(metadata_server, tmp_path):
+    """Test an expired entry is revalidated with If-None-Match."""
+    cache = ResponseCache(tmp_path, ttl=0, revalidate=True)
+    with GeneExpressionDatabaseClient(metadata_server.url, meta_cache=cache) as client:
+        assert client.distinct("tissue") == ["heart"]
+        assert client.distinct("tissue") == ["heart"]
+        assert client.get_meta("heart")[0].ingestid == "i1"
+        assert client.get_meta("heart")[0].ingestid == "i1"
+
+    assert _metadata_requests(metadata_server) == 4
+    entry = cache.get("{}/meta/distinct/tissue".format(metadata_server.url))
+    assert entry.etag == '"tissues-1"'
+
+
+def test_invalidate_metadata(metadata_server, tmp_path):
+    """Test invalidation forces the next call to the server."""
+    with GeneExpressionDatabaseClient(
+        metadata_server.url, meta_cache=ResponseCache(tmp_path)
+    ) as client:
+        client.distinct("tissue")
+        client.invalidate_metadata()
+        client.distinct("tissue")
+    assert _metadata_requests(metadata_server) == 2
+
+
+def test_without_cache_every_call_is_a_request(metadata_server):
+    """Test the client makes a request per call when it has no cache."""
+    with GeneExpressionDatabaseClient(metadata_server.url) as client:
+        client.distinct("tissue")
+        client.distinct("tissue")
+        client.invalidate_metadata()
+    assert _metadata_requests(metadata_server) == 2
+
+
+def test_async_client_shares_the_cache(metadata_server, tmp_path):
+    """Test the async client reads and revalidates the same cache."""
+    GeneExpressionDatabaseClient(
+        metadata_server.url, meta_cache=ResponseCache(tmp_path)
+    ).distinct("tissue")
+
+    async def run() -> object:
+        async with AsyncGeneExpressionDatabaseClient(
+            metadata_server.url, meta_cache=ResponseCache(tmp_path)
+        ) as client:
+            warm = await client.distinct("tissue")
+            client.meta_cache.ttl = 0
+            client.meta_cache.revalidate = True
+            revalidated = await client.distinct("tissue")
+            metas = await client.get_meta("heart")
+            return warm, revalidated, metas
+
+    warm, revalidated, metas = asyncio.run(run())
+    assert warm == revalidated == ["heart"]
+    assert metas[0].tissue == "heart"
+    assert _metadata_requests(metadata_server) == 3
+
+
+def test_304_after_invalidation_downloads_again(stub_server, tmp_path):
+    """Test a 304 for an entry invalidated in flight is answered in full."""
+    cache = ResponseCache(tmp_path, ttl=0, revalidate=True)
+
+    def distinct(handler, body) -> tuple:  # noqa: ANN001
+        if handler.headers.get("If-None-Match") == '"tissues-1"':
+            # The entry is dropped while the request is being answered.
+            cache.invalidate()
+            return 304, b"", {"ETag": '"tissues-1"'}
+        return 200, json.dumps(["heart"]).encode(), {"ETag": '"tissues-1"'}
+
+    stub_server.routes[("GET", "/meta/distinct/tissue")] = distinct
+    with GeneExpressionDatabaseClient(stub_server.url, meta_cache=cache) as client:
+        assert client.distinct("tissue") == ["heart"]
+        assert client.distinct("tissue") == ["heart"]
+
+    async def run() -> object:
+        async with AsyncGeneExpressionDatabaseClient(
+            stub_server.url, meta_cache=cache
+        ) as client:
+            return await client.distinct("tissue")
+
+    assert asyncio.run(run()) == ["heart"]
+    assert _metadata_requests(stub_server) == 5
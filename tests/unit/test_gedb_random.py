@@ -0,0 +1,90 @@
+"""Test parsing the random endpoint's CSV body in a single pass."""
+
+import random
+import time
+from typing import List
+
+import numpy
+import pandas
+import pytest
+from geneweaver.client.gedb import (
+    BaseGeneExpressionDatabaseClient,
+    GeneExpressionDatabaseClient,
+    RandomResult,
+)
+
+
+def _random_text(size: int, count: int, trailing: str = "\n") -> str:
+    rng = random.Random(0)
+    lines: List[str] = []
+    for _ in range(count):
+        name = "s{}".format(rng.randint(0, 2000))
+        lines.extend("{},{}".format(name, rng.uniform(-1, 1)) for _ in range(size))
+    return "\n".join(lines) + trailing
+
+
+def _split_frames(text: str, size: int) -> List[pandas.DataFrame]:
+    client = BaseGeneExpressionDatabaseClient("http://localhost")
+    return [client._frame(r) for r in client._split_list(text.split("\n"), size)]
+
+
+@pytest.mark.parametrize("trailing", ["\n", ""])
+def test_frames_match_per_chunk_parse(trailing):
+    """Test the views equal one read_csv per geneset."""
+    text = _random_text(7, 30, trailing)
+    result = RandomResult.from_text(text, 7)
+    expected = _split_frames(text, 7)
+
+    assert len(result) == 30
+    assert result.scores.shape == (30, 7)
+    for frame, other in zip(result.frames(), expected):
+        pandas.testing.assert_frame_equal(frame, other)
+    pandas.testing.assert_frame_equal(result[-1], expected[-1])
+    assert len(result[2:5]) == 3
+
+
+def test_shared_name_index():
+    """Test names are held once and indexed by codes."""
+    text = "a,0.5\na,0.25\nb,-1.0\nb,2.0\n"
+    result = RandomResult.from_text(text, 2)
+    assert sorted(result.names) == ["a", "b"]
+    assert result.indiv_names().tolist() == [["a", "a"], ["b", "b"]]
+    assert result.scores.tolist() == [[0.5, 0.25], [-1.0, 2.0]]
+    with pytest.raises(IndexError):
+        result[2]
+
+
+def test_partial_and_empty_bodies():
+    """Test lines short of a whole geneset are dropped and empty is empty."""
+    assert len(RandomResult.from_text("a,1\na,2\na,3\n", 2)) == 1
+    assert RandomResult.from_text("", 3).scores.shape == (0, 3)
+    assert RandomResult.from_text("a,1\n", 0).frames() == []
+
+
+def test_random_columnar(stub_server):
+    """Test the client returns frames or the array form from one response."""
+    stub_server.routes[("GET", "/bulk/random/where/ingest/is/i1")] = (
+        200,
+        _random_text(5, 4).encode(),
+        {"Content-Type": "text/csv"},
+    )
+    with GeneExpressionDatabaseClient(stub_server.url) as client:
+        frames = client.random("i1", 5, 4)
+        columnar = client.random("i1", 5, 4, columnar=True)
+
+    assert len(frames) == 4
+    assert isinstance(columnar, RandomResult)
+    assert numpy.array_equal(columnar.scores[0], frames[0]["score"].to_numpy())
+
+
+def test_random_parse_benchmark():
+    """Compare one parse with a parse per geneset for 5000 genesets."""
+    text = _random_text(25, 5000)
+    b4 = time.perf_counter()
+    _split_frames(text, 25)
+    chunked = time.perf_counter() - b4
+
+    b4 = time.perf_counter()
+    RandomResult.from_text(text, 25)
+    single = time.perf_counter() - b4
+    print("\nrandom 25x5000: per geneset {:.3f}s, once {:.4f}s".format(chunked, single))
@@ -0,0 +1,108 @@
+"""Test retries, timeouts and the circuit breaker of the GEDB client."""
+
+import pytest
+from geneweaver.client.core.resilience import CircuitBreaker, CircuitOpenError
+from geneweaver.client.gedb import DataRequest, GeneExpressionDatabaseClient
+from requests.exceptions import HTTPError
+
+SEARCH = "/gene/expression/search"
+
+
+def _request() -> DataRequest:
+    return DataRequest(geneIds=["g1"], strains=["*"], tissue="heart")
+
+
+def _searches(server) -> int:
+    return sum(1 for _, path, _ in server.requests if path == SEARCH)
+
+
+def test_search_is_retried_on_502(stub_server):
+    """Test a transient gateway error no longer fails the search."""
+    events = []
+    stub_server.routes[("POST", SEARCH)] = [
+        (502, b"{}"),
+        (503, b"{}"),
+        (200, b'[{"strain": "A/J", "values": [1.0]}]'),
+    ]
+    with GeneExpressionDatabaseClient(
+        stub_server.url,
+        backoff_factor=0,
+        metrics=lambda event, details: events.append(event),
+    ) as client:
+        assert client.search(_request())[0].strain == "A/J"
+
+    assert _searches(stub_server) == 3
+    assert events == ["retry", "retry"]
+
+
+def test_search_raises_after_retries(stub_server):
+    """Test the HTTPError of the last attempt is raised."""
+    stub_server.routes[("POST", SEARCH)] = (502, b"{}")
+    with GeneExpressionDatabaseClient(
+        stub_server.url, retries=2, backoff_factor=0
+    ) as client:
+        with pytest.raises(HTTPError):
+            client.search(_request())
+    assert _searches(stub_server) == 3
+
+
+def test_server_errors_are_not_retried(stub_server):
+    """Test a 500 is raised without retrying."""
+    stub_server.routes[("POST", SEARCH)] = (500, b"{}")
+    with GeneExpressionDatabaseClient(stub_server.url, backoff_factor=0) as client:
+        with pytest.raises(HTTPError):
+            client.search(_request())
+    assert _searches(stub_server) == 1
+
+
+def test_breaker_fails_fast(stub_server):
+    """Test an open breaker rejects calls without contacting the server."""
+    events = []
+    breaker = CircuitBreaker(
+        failure_threshold=3,
+        reset_timeout=60,
+        metrics=lambda event, details: events.append((event, details.get("state"))),
+    )
+    stub_server.routes[("POST", SEARCH)] = (503, b"{}")
+    with GeneExpressionDatabaseClient(
+        stub_server.url, retries=5, backoff_factor=0, breaker=breaker
+    ) as client:
+        with pytest.raises(CircuitOpenError):
+            client.search(_request())
+        with pytest.raises(CircuitOpenError):
+            client.distinct("tissue")
+
+    assert _searches(stub_server) == 3
+    assert len(stub_server.requests) == 3
+    assert ("breaker_state", "open") in events
+
+
+def test_connect_and_read_timeouts(stub_server, monkeypatch):
+    """Test requests are sent with separate connect and read timeouts."""
+    stub_server.add_json("POST", SEARCH, [])
+    stub_server.add_json("GET", "/meta/distinct/tissue", [])
+    stub_server.add_json("POST", "/bulk/random/spearmanrho/", [0.1])
+    client = GeneExpressionDatabaseClient(
+        stub_server.url, connect_timeout=2, read_timeout=30
+    )
+    timeouts = []
+    send = client.session.send
+
+    def record(request, **kwargs) -> object:  # noqa: ANN001, ANN003
+        timeouts.append(kwargs["timeout"])
+        return send(request, **kwargs)
+
+    monkeypatch.setattr(client.session, "send", record)
+    client.search(_request())
+    client.distinct("tissue")
+    client.random_spearmanrho("i1", [0.1], timeout=90)
+    client.close()
+    assert timeouts == [(2, 30), (2, 30), (2, 90)]
+
+
+def test_connect_errors_are_retried_once_per_attempt():
+    """Test the session does not retry under the retry policy."""
+    client = GeneExpressionDatabaseClient("http://localhost", retries=4)
+    adapter = client.session.get_adapter("http://localhost")
+    assert adapter.max_retries.total == 0
+    client.close()
@@ -0,0 +1,133 @@
+"""Test reading signature score files into a ScoreTable."""
+
+import bz2
+import gzip
+import lzma
+import random
+import time
+
+import numpy
+import pytest
+from geneweaver.client.gedb import GeneExpressionDatabaseClient, ScoreTable
+
+SIGNATURE = "tests/unit/connective_tissue_disorder_log2fc_test.csv"
+
+
+@pytest.fixture()
+def client():
+    """Build a client which is never connected."""
+    return GeneExpressionDatabaseClient("http://localhost")
+
+
+def test_matches_read_scores(client):
+    """Test the table holds the same genes, in order, as float scores."""
+    expected = client.read_scores(SIGNATURE)
+    table = client.read_scores(SIGNATURE, columnar=True)
+
+    assert isinstance(table, ScoreTable)
+    assert list(table) == list(expected)
+    assert table.values.dtype == numpy.float64  # noqa: PD011
+    assert table.values.tolist() == [float(v) for v in expected.values()]  # noqa: PD011
+    assert table["ENSMUSG00000000782"] == pytest.approx(-1.56066863762706)
+    assert table.malformed == []
+    assert table.to_series().index.equals(table.gene_ids)
+
+
+def test_pandas_parser_matches(monkeypatch):
+    """Test the pandas parser, used without pyarrow, gives the same table."""
+    fast = ScoreTable.read_csv(SIGNATURE)
+    monkeypatch.setattr("geneweaver.client.gedb._read_scores_arrow", lambda _: None)
+    table = ScoreTable.read_csv(SIGNATURE)
+    assert list(table.items()) == list(fast.items())
+    assert table.gene_ids.dtype == fast.gene_ids.dtype
+
+
+def test_both_parsers_strip_leading_spaces(tmp_path, client):
+    """Test gene ids are the same, with the same dtype, from either parser."""
+    path = tmp_path / "signature.csv"
+    path.write_text(" A,1\nB , 2\n  C,3\n")
+    fast = ScoreTable.read_csv(path)
+    malformed = tmp_path / "malformed.csv"
+    malformed.write_text(" A,1\nB , 2\n  C,3\nD,x\n")
+    slow = ScoreTable.read_csv(malformed)
+
+    assert list(fast) == list(slow) == ["A", "B ", "C"]
+    assert list(fast) == list(client.read_scores(str(path)))
+    assert fast.gene_ids.dtype == slow.gene_ids.dtype
+
+
+@pytest.mark.parametrize(("suffix", "compress"), [(".bz2", bz2), (".xz", lzma)])
+def test_other_compressions(tmp_path, suffix, compress):
+    """Test bz2 and xz files are read, also when rows are malformed."""
+    path = tmp_path / ("signature.csv" + suffix)
+    with open(SIGNATURE, "rb") as f:
+        path.write_bytes(compress.compress(f.read() + b"g,x\n"))
+    table = ScoreTable.read_csv(path)
+    plain = ScoreTable.read_csv(SIGNATURE)
+    assert list(table.items()) == list(plain.items())
+    assert len(table.malformed) == 1
+
+
+def test_gzip_input(tmp_path, client):
+    """Test a gzipped file is read the same as the plain one."""
+    path = tmp_path / "signature.csv.gz"
+    with open(SIGNATURE, "rb") as f, gzip.open(path, "wb") as out:
+        out.write(f.read())
+    plain = ScoreTable.read_csv(SIGNATURE)
+    zipped = ScoreTable.read_csv(path)
+    assert list(zipped.items()) == list(plain.items())
+
+
+def test_malformed_rows_are_reported(tmp_path):
+    """Test rows without a gene or numeric score are skipped with their line."""
+    path = tmp_path / "signature.csv"
+    path.write_text(
+        "# gene_id,log2fc\n"
+        "g1,1.5,extra\n"
+        "g2\n"
+        "\n"
+        "g3,abc\n"
+        ",2.0\n"
+        "g4, -0.5\n"
+    )
+    table = ScoreTable.read_csv(path)
+    assert list(table.items()) == [("g1", 1.5), ("g4", -0.5)]
+    assert table.malformed == [(3, "g2", ""), (5, "g3", "abc"), (6, "", "2.0")]
+
+    gz_path = tmp_path / "signature.csv.gz"
+    gz_path.write_bytes(gzip.compress(path.read_bytes()))
+    assert ScoreTable.read_csv(gz_path).malformed == table.malformed
+
+    with pytest.raises(ValueError, match="3 malformed score rows"):
+        ScoreTable.read_csv(path, strict=True)
+
+
+def test_duplicates_keep_first_position_and_last_score(tmp_path, client):
+    """Test a repeated gene behaves as it does in the dict of read_scores."""
+    path = tmp_path / "signature.csv"
+    path.write_text("g1,1\ng2,2\ng1,3\n")
+    expected = {k: float(v) for k, v in client.read_scores(str(path)).items()}
+    table = ScoreTable.read_csv(path)
+    assert dict(table.items()) == expected
+    assert list(table) == ["g1", "g2"]
+
+
+def test_read_scores_benchmark(tmp_path, client):
+    """Compare both readers on a 300000 gene signature."""
+    rng = random.Random(0)
+    path = tmp_path / "large.csv"
+    with open(path, "w") as f:
+        f.write("# gene_id,log2fc,species\n")
+        for i in range(300000):
+            f.write("ENSMUSG{:011d},{},mouse\n".format(i, rng.uniform(-5, 5)))
+
+    b4 = time.perf_counter()
+    scores = {k: float(v) for k, v in client.read_scores(str(path)).items()}
+    lines = time.perf_counter() - b4
+
+    b4 = time.perf_counter()
+    table = client.read_scores(str(path), columnar=True)
+    columnar = time.perf_counter() - b4
+
+    print("\nread_scores 300k: lines {:.3f}s, columnar {:.3f}s".format(lines, columnar))
+    assert len(table) == len(scores)
@@ -0,0 +1,143 @@
+"""Test batched searches with request deduplication and coalescing."""
+
+import asyncio
+import json
+import time
+
+import pytest
+from geneweaver.client.gedb import (
+    DataRequest,
+    DataResult,
+    GeneExpressionDatabaseClient,
+)
+from geneweaver.client.gedb_async import AsyncGeneExpressionDatabaseClient
+
+STRAINS = ["C57BL/6J", "DBA/2J"]
+
+
+@pytest.fixture()
+def search_server(stub_server):
+    """Answer searches with one item per requested gene and strain."""
+
+    def search(handler, body) -> tuple:  # noqa: ANN001
+        request = json.loads(body)
+        time.sleep(0.05)
+        genes = request["geneIds"] or ["ALL1", "ALL2"]
+        items = [
+            {
+                "geneIds": [gene],
+                "strain": strain,
+                "tissue": request["tissue"],
+                "values": [1.0],
+            }
+            for gene in genes
+            for strain in request["strains"]
+        ]
+        return 200, json.dumps(items).encode()
+
+    stub_server.routes[("POST", "/gene/expression/search")] = search
+    return stub_server
+
+
+def _request(tissue: str, *genes: str) -> DataRequest:
+    return DataRequest(
+        geneIds=list(genes) if genes else None,
+        strains=list(STRAINS),
+        tissue=tissue,
+        sourceType="IMPUTED",
+    )
+
+
+def _sent(server) -> list:
+    return [json.loads(body) for _, _, body in server.requests]
+
+
+def test_results_match_single_searches(search_server):
+    """Test each input gets exactly the results a search of its own would."""
+    drequests = [
+        _request("heart", "g1", "g2"),
+        _request("liver", "g1"),
+        _request("heart", "g2", "g3"),
+        _request("heart", "g1", "g2"),
+        _request("heart"),
+    ]
+    with GeneExpressionDatabaseClient(search_server.url) as client:
+        batch = client.search_many(drequests)
+        singles = [client.search(d) for d in drequests]
+
+    assert len(batch) == 5
+    for results, expected in zip(batch, singles):
+        key = lambda r: (r.geneIds[0], r.strain)  # noqa: E731
+        assert sorted(results, key=key) == sorted(expected, key=key)
+    assert all(isinstance(r, DataResult) for r in batch[0])
+
+
+def test_empty_gene_lists_are_not_merged(search_server):
+    """Test a request for every gene, as geneIds=[], is sent on its own."""
+    every_gene = _request("heart")
+    every_gene.geneIds = []
+    drequests = [_request("heart", "g1"), every_gene, _request("heart", "g2")]
+    with GeneExpressionDatabaseClient(search_server.url) as client:
+        batch = client.search_many(drequests)
+        singles = [client.search(d) for d in drequests]
+
+    assert list(batch) == singles
+    assert {r.geneIds[0] for r in batch[1]} == {"ALL1", "ALL2"}
+    sent = _sent(search_server)[: len(batch.calls)]
+    assert sorted(len(body["geneIds"]) for body in sent) == [0, 2]
+
+
+def test_identical_and_compatible_requests_share_calls(search_server):
+    """Test duplicates are sent once and gene lists are coalesced by tissue."""
+    drequests = [
+        _request("heart", "g1", "g2"),
+        _request("liver", "g1"),
+        _request("heart", "g2", "g3"),
+        _request("heart", "g1", "g2"),
+        _request("heart"),
+        _request("heart"),
+    ]
+    with GeneExpressionDatabaseClient(search_server.url) as client:
+        batch = client.search_many(drequests)
+
+    sent = _sent(search_server)
+    assert len(sent) == 3
+    heart = [r for r in sent if r["tissue"] == "heart" and r["geneIds"]]
+    assert heart[0]["geneIds"] == ["g1", "g2", "g3"]
+    assert [call.inputs for call in batch.calls] == [[0, 2, 3], [1], [4, 5]]
+    assert batch.call(3) is batch.call(0)
+    assert batch.call(0).results == 6
+    assert drequests[0].geneIds == ["g1", "g2"]
+
+
+def test_calls_run_concurrently_with_timing(search_server):
+    """Test one call per tissue runs at once, and each is timed."""
+    drequests = [_request("tissue{}".format(i), "g1") for i in range(8)]
+    with GeneExpressionDatabaseClient(search_server.url) as client:
+        b4 = time.perf_counter()
+        batch = client.search_many(drequests, concurrency=8)
+        elapsed = time.perf_counter() - b4
+
+    assert elapsed < 8 * 0.05
+    assert len(batch.timing) == 8
+    assert all(t >= 0.05 for t in batch.timing)
+    assert [r[0].tissue for r in batch] == [d.tissue for d in drequests]
+
+
+def test_async_search_many(search_server):
+    """Test the async client coalesces in the same way."""
+    drequests = [
+        _request("heart", "g1"),
+        _request("heart", "g2"),
+        _request("liver", "g1"),
+    ]
+
+    async def run() -> object:
+        async with AsyncGeneExpressionDatabaseClient(search_server.url) as client:
+            return await client.search_many(drequests)
+
+    batch = asyncio.run(run())
+    assert len(_sent(search_server)) == 2
+    assert [len(r) for r in batch] == [2, 2, 2]
+    assert batch[1][0].geneIds == ["g2"]
+    assert all(t is not None for t in batch.timing)
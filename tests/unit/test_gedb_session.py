@@ -0,0 +1,146 @@
+"""Test the pooled session of the GEDB client against a local stub server."""
+
+import time
+
+import pytest
+import requests
+from geneweaver.client.core.http import create_session
+from geneweaver.client.gedb import (
+    DataRequest,
+    GeneExpressionDatabaseClient,
+    SourceType,
+)
+from requests.exceptions import HTTPError
+
+CALLS = 50
+
+
+def _search_request() -> DataRequest:
+    return DataRequest(
+        geneIds=["ENSMUSG00000000001"],
+        strains=["*"],
+        sourceType=SourceType.IMPUTED.name,
+        tissue="maxilla",
+    )
+
+
+def test_client_reuses_one_connection(stub_server):
+    """Test that many calls are made over one kept-alive connection."""
+    stub_server.add_json("GET", "/meta/distinct/tissue", ["heart", "maxilla"])
+
+    with GeneExpressionDatabaseClient(stub_server.url) as client:
+        for _ in range(CALLS):
+            assert client.distinct("tissue") == ["heart", "maxilla"]
+
+    assert stub_server.connections == 1
+
+
+def test_client_context_manager_closes_session(stub_server):
+    """Test that leaving the context closes the session, which is then recreated."""
+    stub_server.add_json("GET", "/meta/distinct/tissue", ["heart"])
+
+    client = GeneExpressionDatabaseClient(stub_server.url)
+    with client:
+        first = client.session
+        client.distinct("tissue")
+    assert client._session is None
+
+    client.distinct("tissue")
+    assert client.session is not first
+    client.close()
+
+
+def test_client_pool_size_is_configurable():
+    """Test that the pool size is passed on to the mounted adapters."""
+    client = GeneExpressionDatabaseClient("http://localhost", pool_size=3)
+    adapter = client.session.get_adapter("http://localhost")
+    assert adapter._pool_maxsize == 3
+    assert adapter._pool_connections == 3
+    client.close()
+
+
+def test_client_retries_transient_errors(stub_server):
+    """Test that idempotent calls are retried on a 503."""
+    stub_server.routes[("GET", "/meta/distinct/strain")] = [
+        (503, b"{}"),
+        (200, b'["A/J"]'),
+    ]
+    with GeneExpressionDatabaseClient(stub_server.url, backoff_factor=0) as client:
+        assert client.distinct("strain") == ["A/J"]
+
+
+def test_client_raises_once_retries_are_exhausted(stub_server):
+    """Test that an HTTPError is raised when every attempt fails."""
+    stub_server.routes[("GET", "/meta/distinct/strain")] = (503, b"{}")
+    with GeneExpressionDatabaseClient(
+        stub_server.url, retries=1, backoff_factor=0
+    ) as client:
+        with pytest.raises(HTTPError):
+            client.distinct("strain")
+
+
+def test_concurrent_first_use_creates_one_session(stub_server, monkeypatch):
+    """Test that worker threads using the session first share one session."""
+    created = []
+
+    def slow_session(*args, **kwargs) -> requests.Session:  # noqa: ANN002, ANN003
+        time.sleep(0.05)
+        created.append(create_session(*args, **kwargs))
+        return created[-1]
+
+    monkeypatch.setattr("geneweaver.client.gedb.create_session", slow_session)
+    stub_server.add_json("POST", "/gene/expression/search", [])
+    tissues = ["heart", "liver", "maxilla", "spleen"]
+    drequests = [
+        DataRequest(
+            geneIds=["ENSMUSG00000000001"],
+            strains=["*"],
+            sourceType=SourceType.IMPUTED.name,
+            tissue=tissue,
+        )
+        for tissue in tissues
+    ]
+    with GeneExpressionDatabaseClient(stub_server.url) as client:
+        client.search_many(drequests, concurrency=len(tissues))
+        assert created == [client.session]
+
+    assert len(stub_server.requests) == len(tissues)
+
+
+def test_client_search_posts_through_session(stub_server):
+    """Test that search is sent through the pooled session."""
+    stub_server.add_json(
+        "POST", "/gene/expression/search", [{"strain": "A/J", "values": [1.0]}]
+    )
+    with GeneExpressionDatabaseClient(stub_server.url, auth_proxy="c") as client:
+        for _ in range(3):
+            results = client.search(_search_request())
+            assert results[0].strain == "A/J"
+
+    assert stub_server.connections == 1
+
+
+def test_pooled_session_benchmark(stub_server):
+    """Compare per-call latency of a fresh session per call with the pooled one."""
+    stub_server.add_json("GET", "/meta/distinct/tissue", ["heart"])
+    url = stub_server.url + "/meta/distinct/tissue"
+
+    b4 = time.perf_counter()
+    for _ in range(CALLS):
+        with requests.Session() as s:
+            s.get(url).json()
+    unpooled = (time.perf_counter() - b4) / CALLS
+    unpooled_connections = stub_server.connections
+
+    stub_server.connections = 0
+    with GeneExpressionDatabaseClient(stub_server.url) as client:
+        b4 = time.perf_counter()
+        for _ in range(CALLS):
+            client.distinct("tissue")
+        pooled = (time.perf_counter() - b4) / CALLS
+
+    print(
+        "\nPer call latency: unpooled {:.6f}s pooled {:.6f}s".format(unpooled, pooled)
+    )
+    assert unpooled_connections == CALLS
+    assert stub_server.connections == 1
@@ -0,0 +1,104 @@
+"""Test the compact float32 storage of strain expressions."""
+
+import pickle
+import random
+import sys
+from typing import List
+
+import numpy
+import pytest
+from geneweaver.client.gedb import (
+    BaseGeneExpressionDatabaseClient,
+    GeneExpressionDatabaseClient,
+    Sex,
+    StrainExpressions,
+    StrainResult,
+)
+from geneweaver.client.utils.concordance import SpearmanConcordance
+
+
+@pytest.fixture(scope="module")
+def items() -> List[dict]:
+    """Load the recorded maxilla search_expression results as response items."""
+    with open("tests/unit/strain-expressions.pkl", "rb") as f:
+        return [result.__dict__ for result in pickle.load(f)]
+
+
+def _results(items: List[dict], columnar: bool) -> List[StrainResult]:
+    client = BaseGeneExpressionDatabaseClient("http://localhost")
+    return client._strain_results(items, columnar)
+
+
+def test_compact_results_match_lists(items):
+    """Test every row equals the list it replaces, to float32 precision."""
+    lists = _results(items, columnar=False)
+    compact = _results(items, columnar=True)
+
+    assert len(compact) == len(lists)
+    for full, small in zip(lists, compact):
+        expressions = small.strain_expressions
+        assert isinstance(expressions, StrainExpressions)
+        assert small.gene_ids == full.gene_ids
+        assert small.strain == full.strain
+        assert list(expressions) == list(full.strain_expressions)
+        assert expressions.matrix.dtype == numpy.float32
+        for key, values in full.strain_expressions.items():
+            assert numpy.allclose(expressions[key], values, rtol=1e-6)
+
+
+def test_frame_is_a_view(items):
+    """Test frame returns the same columns as before, over the shared array."""
+    lists = {r.strain: r for r in _results(items, columnar=False)}
+    compact = {r.strain: r for r in _results(items, columnar=True)}
+    client = GeneExpressionDatabaseClient("http://localhost")
+
+    expected = client.frame(lists, "C57BL/6J", "s1", Sex.Female)
+    frame = client.frame(compact, "C57BL/6J", "s1", Sex.Female)
+    expressions = compact["C57BL/6J"].strain_expressions
+
+    assert list(frame.columns) == ["gene_id", "expr"]
+    assert frame["gene_id"].tolist() == expected["gene_id"].tolist()
+    assert numpy.allclose(frame["expr"], expected["expr"], rtol=1e-6)
+    assert numpy.shares_memory(frame["expr"].to_numpy(), expressions.matrix)
+
+    wide = expressions.to_frame()
+    assert wide.shape == (len(expressions), 25)
+    assert numpy.shares_memory(wide.to_numpy(), expressions.matrix)
+
+
+def test_empty_expressions():
+    """Test a strain without individuals has an empty array."""
+    results = _results([{"strain": "A", "gene_ids": ["g1", "g2"]}], columnar=True)
+    assert results[0].strain_expressions.matrix.shape == (0, 2)
+    assert len(results[0].strain_expressions) == 0
+
+
+def test_concordance_accepts_compact_results(items):
+    """Test the concordance engine gives the same rhos for compact results."""
+    scores = {
+        gene: random.Random(i).random() for i, gene in enumerate(items[0]["gene_ids"])
+    }
+    lists = SpearmanConcordance(scores, _results(items, columnar=False))
+    compact = SpearmanConcordance(scores, _results(items, columnar=True))
+    assert compact.keys == lists.keys
+    assert numpy.allclose(compact.observed(), lists.observed())
+
+
+def test_memory_benchmark():
+    """Compare the memory of 100 individuals x 15000 genes as lists and array."""
+    rng = numpy.random.default_rng(0)
+    genes = ["ENSMUSG{:011d}".format(i) for i in range(15000)]
+    expressions = {
+        "s{}@Female".format(i): rng.random(15000).tolist() for i in range(100)
+    }
+    boxed = sum(
+        sys.getsizeof(values) + sum(sys.getsizeof(v) for v in values)
+        for values in expressions.values()
+    )
+    compact = StrainExpressions.from_json(expressions, genes)
+    print(
+        "\n100x15000 expressions: lists {:.1f}MB, float32 {:.1f}MB".format(
+            boxed / 1e6, compact.matrix.nbytes / 1e6
+        )
+    )
+    assert compact.matrix.nbytes * 4 < boxed
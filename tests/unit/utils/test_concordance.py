@@ -0,0 +1,173 @@
+"""Test the local Spearman concordance engine."""
+
+import pickle
+import time
+from typing import List
+
+import numpy
+import pandas
+import pytest
+from geneweaver.client.gedb import GeneExpressionDatabaseClient, StrainResult
+from geneweaver.client.utils.concordance import (
+    SpearmanConcordance,
+    rankdata,
+    unit_ranks,
+)
+
+
+@pytest.fixture(scope="module")
+def strain_results() -> List[StrainResult]:
+    """Load the recorded maxilla search_expression results."""
+    with open("tests/unit/strain-expressions.pkl", "rb") as f:
+        return pickle.load(f)
+
+
+@pytest.fixture(scope="module")
+def scores():
+    """Read the connective tissue disorder signature."""
+    return GeneExpressionDatabaseClient("http://localhost").read_scores(
+        "tests/unit/connective_tissue_disorder_log2fc_test.csv"
+    )
+
+
+@pytest.mark.parametrize(
+    ("values", "expected"),
+    [
+        ([3.0, 1.0, 2.0], [3.0, 1.0, 2.0]),
+        ([1.0, 2.0, 2.0, 3.0], [1.0, 2.5, 2.5, 4.0]),
+        ([5.0, 5.0, 5.0], [2.0, 2.0, 2.0]),
+        ([0.5, -1.0, 0.5, -1.0, 2.0], [3.5, 1.5, 3.5, 1.5, 5.0]),
+        ([], []),
+    ],
+)
+def test_rankdata(values, expected):
+    """Test ranks match average tie ranking."""
+    assert rankdata(values).tolist() == expected
+
+
+def test_unit_ranks_constant_row_is_nan():
+    """Test a constant row has no defined correlation."""
+    ranks = unit_ranks([[1.0, 2.0, 3.0], [1.0, 1.0, 1.0]])
+    assert numpy.allclose(numpy.linalg.norm(ranks[0]), 1.0)
+    assert numpy.isnan(ranks[1]).all()
+
+
+def test_unit_ranks_nan_row_is_nan():
+    """Test a row with a missing value is not ranked."""
+    ranks = unit_ranks([[1.0, numpy.nan, 3.0], [3.0, 2.0, 1.0]])
+    assert numpy.isnan(ranks[0]).all()
+    assert numpy.allclose(numpy.linalg.norm(ranks[1]), 1.0)
+
+
+def test_observed_matches_pandas(scores, strain_results):
+    """Test the observed rho equals the Pearson correlation of pandas ranks."""
+    engine = SpearmanConcordance(scores, strain_results)
+    assert len(engine.gene_ids) == 25
+    assert len(engine.keys) == 1971
+
+    observed = engine.observed()
+    for index in (0, 1, 500, 1970):
+        expected = (
+            pandas.Series(engine.scores)
+            .rank()
+            .corr(pandas.Series(engine.expressions[index]).rank())
+        )
+        assert observed[index] == pytest.approx(expected)
+
+    frame = engine.frame()
+    assert list(frame.columns) == ["strain", "individual", "rho"]
+    assert frame.iloc[0]["strain"] == "C57BL/6J"
+    assert frame.iloc[0]["individual"] == "s1@Female"
+
+
+def test_genes_are_aligned_by_id():
+    """Test genes missing from either side are dropped and order is followed."""
+    results = [
+        StrainResult(
+            gene_ids=["g1", "g2", "g3", "g4"],
+            strain="A",
+            strain_expressions={"s1@Male": [1.0, 2.0, 3.0, 4.0]},
+        ),
+        StrainResult(
+            gene_ids=["g3", "g2", "g1", "g4"],
+            strain="B",
+            strain_expressions={"s2@Male": [3.0, 2.0, 1.0, 9.0]},
+        ),
+    ]
+    engine = SpearmanConcordance({"g3": "0.3", "g1": "0.1", "g2": "0.2"}, results)
+    assert engine.gene_ids == ["g1", "g2", "g3"]
+    assert engine.observed() == pytest.approx([1.0, 1.0])
+
+
+def test_nulls_are_reproducible(scores, strain_results):
+    """Test a seed gives the same nulls."""
+    engine = SpearmanConcordance(scores, strain_results)
+    first = engine.null_distribution(250, seed=7, batch_size=250)
+    second = engine.null_distribution(250, seed=7, batch_size=250)
+    assert first.shape == (250, 1971)
+    assert numpy.array_equal(first, second)
+    assert numpy.abs(first).max() <= 1.0 + 1e-9
+    assert engine.null_distribution(0).shape == (0, 1971)
+
+
+def test_p_values(scores, strain_results):
+    """Test p-values are bounded and agree with the stored null."""
+    engine = SpearmanConcordance(scores, strain_results)
+    p_values = engine.p_values(200, seed=3, batch_size=64)
+    null = engine.null_distribution(200, seed=3, batch_size=64)
+
+    extreme = (numpy.abs(null) >= numpy.abs(engine.observed()) - 1e-12).sum(axis=0)
+    assert numpy.allclose(p_values, (extreme + 1) / 201)
+    assert ((p_values > 0) & (p_values <= 1)).all()
+
+
+def test_perfect_concordance_is_significant():
+    """Test an individual matching the signature has the smallest p-value."""
+    genes = ["g{}".format(i) for i in range(30)]
+    rng = numpy.random.default_rng(0)
+    values = rng.normal(size=30)
+    result = StrainResult(
+        gene_ids=genes,
+        strain="A",
+        strain_expressions={
+            "match@Male": list(values * 2),
+            "noise@Male": list(rng.normal(size=30)),
+        },
+    )
+    engine = SpearmanConcordance(dict(zip(genes, values)), [result])
+    p_values = engine.p_values(999, seed=1)
+    assert engine.observed()[0] == pytest.approx(1.0)
+    assert p_values[0] == pytest.approx(1 / 1000)
+
+
+def test_null_benchmark(scores, strain_results):
+    """Time ten thousand permutations against every individual."""
+    engine = SpearmanConcordance(scores, strain_results)
+    b4 = time.perf_counter()
+    engine.p_values(10000, seed=0)
+    print(
+        "\n10000 permutations x {} individuals: {:.3f}s".format(
+            len(engine.keys), time.perf_counter() - b4
+        )
+    )
+
+
+def test_undefined_rho_has_nan_p_value():
+    """Test constant or missing expression gives NaN, not a tiny p-value."""
+    genes = ["g1", "g2", "g3", "g4"]
+    result = StrainResult(
+        gene_ids=genes,
+        strain="A",
+        strain_expressions={
+            "flat@Male": [1.0, 1.0, 1.0, 1.0],
+            "missing@Male": [1.0, numpy.nan, 3.0, 4.0],
+            "ok@Male": [1.0, 2.0, 4.0, 3.0],
+        },
+    )
+    engine = SpearmanConcordance(dict(zip(genes, [0.1, 0.2, 0.3, 0.4])), [result])
+    p_values = engine.p_values(99, seed=0)
+    assert numpy.isnan(p_values[:2]).all()
+    assert 0 < p_values[2] <= 1
+
+    flat_scores = SpearmanConcordance(dict.fromkeys(genes, 1.0), [result])
+    assert numpy.isnan(flat_scores.p_values(99, seed=0)).all()
@@ -0,0 +1,145 @@
+"""Test the local multi-process random geneset null."""
+
+import time
+
+import numpy
+import pandas
+import pytest
+from geneweaver.client.utils.permutation import (
+    RandomGenesetNull,
+    draw_rhos,
+    random_genesets,
+)
+
+
+@pytest.fixture(scope="module")
+def expression():
+    """Build a random expression matrix of 40 individuals by 500 genes."""
+    return numpy.random.default_rng(0).lognormal(size=(40, 500))
+
+
+@pytest.fixture(scope="module")
+def scores():
+    """Build a random signature of 25 scores."""
+    return numpy.random.default_rng(1).normal(size=25)
+
+
+def test_draws_are_spearman_rhos(expression, scores):
+    """Test each draw is the rho of the scores with a random geneset."""
+    seed = numpy.random.SeedSequence(5)
+    null = RandomGenesetNull(expression, scores, workers=0)
+    rhos = draw_rhos(expression, null.score_ranks, 20, seed)
+
+    rng = numpy.random.default_rng(seed)
+    rows = rng.integers(0, 40, size=20)
+    for rho, row, genes in zip(rhos, rows, random_genesets(rng, 500, 25, 20)):
+        expected = (
+            pandas.Series(scores)
+            .rank()
+            .corr(pandas.Series(expression[row, genes]).rank())
+        )
+        assert rho == pytest.approx(expected)
+
+
+def test_tied_expression_gets_average_ranks(scores):
+    """Test rhos over tied expression values match the average rank rho."""
+    expression = numpy.random.default_rng(2).integers(0, 4, size=(10, 60))
+    null = RandomGenesetNull(expression, scores, workers=0)
+    seed = numpy.random.SeedSequence(3)
+    rhos = draw_rhos(null.expression, null.score_ranks, 30, seed)
+
+    rng = numpy.random.default_rng(seed)
+    rows = rng.integers(0, 10, size=30)
+    for rho, row, genes in zip(rhos, rows, random_genesets(rng, 60, 25, 30)):
+        expected = (
+            pandas.Series(scores)
+            .rank()
+            .corr(pandas.Series(expression[row, genes]).rank())
+        )
+        assert rho == pytest.approx(expected)
+
+
+@pytest.mark.parametrize(("genes", "size"), [(500, 25), (60, 25), (30, 30)])
+def test_random_genesets_are_distinct_genes(genes, size):
+    """Test every geneset holds distinct genes, and every gene is drawn."""
+    drawn = random_genesets(numpy.random.default_rng(0), genes, size, 2000)
+    assert drawn.shape == (2000, size)
+    assert all(len(set(row)) == size for row in drawn)
+    assert set(drawn.ravel()) == set(range(genes))
+    # Every position of a geneset is equally likely to hold any gene.
+    first = numpy.bincount(drawn[:, 0], minlength=genes) / 2000
+    assert first.max() < 3 / genes
+
+
+def test_expression_is_held_once(expression, scores):
+    """Test the matrix is moved into shared memory, and back out on close."""
+    with RandomGenesetNull(expression, scores, workers=1, chunk_size=50) as null:
+        null.rhos(100, seed=0)
+        assert null.expression.base is not None
+        assert numpy.array_equal(null.expression, expression)
+    assert null.expression.flags.owndata
+    assert numpy.array_equal(null.expression, expression)
+    with null:
+        assert null.rhos(100, seed=0).shape == (100,)
+
+
+def test_same_seed_on_any_pool_size(expression, scores):
+    """Test the nulls for a seed do not depend on the number of workers."""
+    with RandomGenesetNull(expression, scores, workers=0, chunk_size=64) as null:
+        local = null.rhos(300, seed=11)
+    with RandomGenesetNull(expression, scores, workers=2, chunk_size=64) as null:
+        pooled = null.rhos(300, seed=11)
+        again = null.rhos(300, seed=11)
+        other = null.rhos(300, seed=12)
+
+    assert local.shape == (300,)
+    assert numpy.array_equal(local, pooled)
+    assert numpy.array_equal(pooled, again)
+    assert not numpy.array_equal(pooled, other)
+    assert numpy.abs(local).max() <= 1.0 + 1e-9
+
+
+def test_progress_and_partial_results(expression, scores):
+    """Test progress is reported per chunk and chunks can be consumed early."""
+    calls = []
+    with RandomGenesetNull(expression, scores, workers=2, chunk_size=100) as null:
+        null.rhos(250, seed=0, progress=lambda done, total: calls.append(done))
+        chunks = null.iter_chunks(1000, seed=0)
+        index, first = next(chunks)
+        chunks.close()
+
+    assert sorted(calls) == calls
+    assert calls[-1] == 250
+    assert len(calls) == 3
+    assert 0 <= index < 10
+    assert len(first) == 100
+
+
+def test_frame_input_and_empty_null(expression, scores):
+    """Test a frame is accepted and zero draws give an empty null."""
+    frame = pandas.DataFrame(expression)
+    with RandomGenesetNull(frame, scores, workers=0) as null:
+        assert null.rhos(0, seed=0).shape == (0,)
+        assert null.rhos(10, seed=0).shape == (10,)
+
+
+def test_too_many_scores(scores):
+    """Test a geneset larger than the ingest is rejected."""
+    with pytest.raises(ValueError, match="more scores than genes"):
+        RandomGenesetNull(numpy.ones((3, 10)), scores)
+
+
+def test_permutation_benchmark():
+    """Time 20000 random geneset draws in one process and in a pool."""
+    rng = numpy.random.default_rng(0)
+    expression = rng.lognormal(size=(500, 15000))
+    scores = rng.normal(size=100)
+    for workers in (0, 4):
+        with RandomGenesetNull(expression, scores, workers=workers) as null:
+            b4 = time.perf_counter()
+            null.rhos(20000, seed=0)
+            print(
+                "\n20000 draws, {} workers: {:.3f}s".format(
+                    workers, time.perf_counter() - b4
+                )
+            )